@@ -0,0 +1,121 @@
+import re
+
+from contact_extraction import clean_text
+
+STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
+    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
+    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
+    'WI': 'Wisconsin', 'WY': 'Wyoming', 'DC': 'District of Columbia',
+}
+
+STATE_CODES_BY_NAME = {name.lower(): code for code, name in STATE_NAMES.items()}
+
+# USPS 3-digit ZIP prefix ranges (inclusive) for the states and DC
+ZIP3_RANGES = [
+    (5, 5, 'NY'), (10, 27, 'MA'), (28, 29, 'RI'), (30, 38, 'NH'), (39, 49, 'ME'),
+    (50, 54, 'VT'), (55, 55, 'MA'), (56, 59, 'VT'), (60, 69, 'CT'), (70, 89, 'NJ'),
+    (100, 149, 'NY'), (150, 196, 'PA'), (197, 199, 'DE'), (200, 200, 'DC'), (201, 201, 'VA'),
+    (202, 205, 'DC'), (206, 219, 'MD'), (220, 246, 'VA'), (247, 268, 'WV'), (270, 289, 'NC'),
+    (290, 299, 'SC'), (300, 319, 'GA'), (320, 339, 'FL'), (341, 349, 'FL'), (350, 369, 'AL'),
+    (370, 385, 'TN'), (386, 397, 'MS'), (398, 399, 'GA'), (400, 427, 'KY'), (430, 459, 'OH'),
+    (460, 479, 'IN'), (480, 499, 'MI'), (500, 528, 'IA'), (530, 549, 'WI'), (550, 567, 'MN'),
+    (569, 569, 'DC'), (570, 577, 'SD'), (580, 588, 'ND'), (590, 599, 'MT'), (600, 629, 'IL'),
+    (630, 658, 'MO'), (660, 679, 'KS'), (680, 693, 'NE'), (700, 714, 'LA'), (716, 729, 'AR'),
+    (730, 732, 'OK'), (733, 733, 'TX'), (734, 749, 'OK'), (750, 799, 'TX'), (800, 816, 'CO'),
+    (820, 831, 'WY'), (832, 838, 'ID'), (840, 847, 'UT'), (850, 865, 'AZ'), (870, 884, 'NM'),
+    (885, 885, 'TX'), (889, 898, 'NV'), (900, 961, 'CA'), (967, 968, 'HI'), (970, 979, 'OR'),
+    (980, 994, 'WA'), (995, 999, 'AK'),
+]
+
+# Flat array indexed by ZIP prefix: one list lookup per address
+ZIP3_STATES = [None] * 1000
+for _low, _high, _state in ZIP3_RANGES:
+    for _prefix in range(_low, _high + 1):
+        ZIP3_STATES[_prefix] = _state
+
+ZIP_TOKEN = re.compile(r'\d{5}(?:-\d{4})?')
+COUNTRY_NAMES = {'us', 'usa', 'united states', 'united states of america'}
+
+
+def get_state_name(state_code):
+    return STATE_NAMES.get(state_code.upper(), state_code)
+
+
+def state_for_zip(zip_code):
+    if not zip_code:
+        return None
+    return ZIP3_STATES[int(zip_code[:3])]
+
+
+def _is_country(text):
+    return text.replace('.', '').strip().lower() in COUNTRY_NAMES
+
+
+def _pop_state(words):
+    """Strip a trailing state code or name ("CA", "N.Y.", "New York") off words"""
+    if words:
+        code = words[-1].replace('.', '').upper()
+        if code in STATE_NAMES:
+            return code, words[:-1]
+    for size in (3, 2, 1):
+        if len(words) >= size:
+            code = STATE_CODES_BY_NAME.get(' '.join(words[-size:]).lower())
+            if code:
+                return code, words[:-size]
+    return None, words
+
+
+def parse_address(address_text):
+    """Split an address into (address, city, state, zip_code).
+
+    Works from the end of the address: the last segment usually reads
+    "Los Angeles, CA 90012", possibly followed by the country. The state
+    comes from an explicit state code or name when present and from the ZIP
+    prefix otherwise.
+    """
+    address_text = clean_text(address_text)
+    if not address_text:
+        return None, None, None, None
+
+    segments = [segment.strip() for segment in address_text.split(',') if segment.strip()]
+    # "..., Austin, TX 78701, USA" or "... TX 78701 USA": the country is not part of the state/ZIP tail
+    if len(segments) > 1 and _is_country(segments[-1]):
+        segments.pop()
+    words = segments[-1].split()
+    if len(words) > 1 and _is_country(words[-1]):
+        words.pop()
+
+    zip_code = None
+    if words and ZIP_TOKEN.fullmatch(words[-1]):
+        zip_code = words.pop()
+        if not words and len(segments) > 1:
+            # "..., CA, 90012": the state or city sits in its own segment
+            segments.pop()
+            words = segments[-1].split()
+
+    state, words = _pop_state(words)
+    if state is None:
+        state = state_for_zip(zip_code)
+
+    # "Street, City, ST 12345" leaves nothing in the tail but the state, while
+    # "Street, City ST 12345" keeps the city in front of it
+    city = None
+    if len(segments) > 1:
+        if words and (state or zip_code):
+            city = ' '.join(words)
+        elif not words:
+            city = segments[-2]
+    if city and any(char.isdigit() for char in city):
+        city = None
+
+    return address_text, city, state, zip_code
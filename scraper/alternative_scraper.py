@@ -1,6 +1,4 @@
 import requests
-from bs4 import BeautifulSoup
-import time
 import re
 import logging
 from urllib.parse import urljoin, quote
@@ -9,14 +7,48 @@ import os
 from dotenv import load_dotenv
 import random
 
+from address_parser import parse_address
+from contact_extraction import clean_text, extract_contacts, extract_phone
+from dedup import DedupIndex
+from directory_routing import transport_url
+from html_parsing import find_class, make_soup, strainer
+from http_cache import shared_cache
+from rate_limiter import shared_scheduler
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+PAGE_PARSERS = {
+    'nolo': 'parse_nolo_page',
+    'lawyers_com': 'parse_lawyers_com_page',
+    'martindale': 'parse_martindale_page',
+}
+
+# Listing pages only need the card containers the page parsers search
+NOLO_CARDS = strainer(['div', 'article'], ['lawyer-listing', 'directory-item', 'lawyer'])
+LAWYERS_COM_CARDS = strainer('div', ['lawyer-info', 'listing-item'])
+MARTINDALE_CARDS = strainer(['article', 'div'], ['lawyer', 'serp-lawyer'])
+
+# Class patterns of the fields inside a card
+NOLO_NAME = re.compile('name|title')
+NOLO_NAME_LINK = re.compile('lawyer-name')
+NOLO_FIRM = re.compile('firm|company|office')
+NOLO_ADDRESS = re.compile('address|location')
+NOLO_PHONE = re.compile('phone|tel')
+LAWYERS_COM_NAME = re.compile('lawyer|attorney|name')
+LAWYERS_COM_FIRM = re.compile('firm|office')
+LAWYERS_COM_ADDRESS = re.compile('address')
+MARTINDALE_NAME = re.compile('lawyer-name|attorney-name')
+MARTINDALE_FIRM = re.compile('law-firm|firm-name')
+
 class AlternativeLawyerScraper:
-    def __init__(self):
-        self.delay = float(os.getenv('SCRAPER_DELAY', 3))
+    def __init__(self, scheduler=None, parse_pool=None, http_cache=None, checkpoint=None):
+        self.scheduler = scheduler or shared_scheduler()
+        self.http_cache = http_cache or shared_cache()
+        self.checkpoint = checkpoint
+        self.parse_pool = parse_pool
         self.session = requests.Session()
         
         # Use more realistic headers
@@ -42,70 +74,36 @@ class AlternativeLawyerScraper:
     def get_random_headers(self):
         return random.choice(self.headers_list)
     
-    def extract_email(self, text):
-        if not text:
-            return None
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return emails[0] if emails else None
+    def fetch(self, url):
+        cached, headers = self.http_cache.prepare(url)
+        if cached:
+            return cached
+        self.scheduler.wait(url)
+        response = self.session.get(transport_url(url), headers={**self.get_random_headers(), **headers}, timeout=15)
+        return self.http_cache.resolve(url, response.status_code, response.headers, response.content) or response
     
-    def extract_phone(self, text):
-        if not text:
-            return None
-        phone_patterns = [
-            r'(\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\(\d{3}\)\s*\d{3}-\d{4}',
-        ]
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, text)
-            if phones:
-                return phones[0]
-        return None
+    def parse_page(self, source, content, url, *args):
+        # Hand raw bytes to the process pool when one is attached
+        if self.parse_pool:
+            return self.parse_pool.parse(source, content, url, *args)
+        return getattr(self, PAGE_PARSERS[source])(content, url, *args)
     
-    def clean_text(self, text):
-        if not text:
-            return None
-        text = ' '.join(text.split())
-        text = text.strip()
-        return text if text else None
+    def finished_unit(self, *unit):
+        """Lawyers a unit produced before a restart, or None if it still has to run"""
+        return self.checkpoint.get(unit) if self.checkpoint else None
     
-    def parse_address_components(self, address_text):
-        if not address_text:
-            return None, None, None, None
-        
-        # Common state abbreviations
-        states = {
-            'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID',
-            'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS',
-            'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK',
-            'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV',
-            'WI', 'WY'
-        }
-        
-        zip_pattern = r'\b\d{5}(?:-\d{4})?\b'
-        zip_match = re.search(zip_pattern, address_text)
-        zip_code = zip_match.group() if zip_match else None
-        
-        state = None
-        for st in states:
-            if f' {st} ' in address_text or address_text.endswith(f' {st}'):
-                state = st
-                break
-        
-        city = None
-        if state:
-            city_pattern = rf'([^,]+),\s*{state}'
-            city_match = re.search(city_pattern, address_text)
-            if city_match:
-                city = city_match.group(1).strip()
-        
-        return address_text, city, state, zip_code
+    def finish_unit(self, lawyers, *unit):
+        if self.checkpoint:
+            self.checkpoint.record(unit, lawyers)
     
     def scrape_nolo_lawyers(self, state, city=None):
         """Scrape from Nolo.com lawyer directory"""
         lawyers = []
         
+        finished = self.finished_unit('nolo', state, city)
+        if finished is not None:
+            return finished
+        
         try:
             base_url = "https://www.nolo.com/lawyers/divorce-child-custody-support"
             state_lower = state.lower()
@@ -117,29 +115,34 @@ class AlternativeLawyerScraper:
             
             logger.info(f"Scraping Nolo: {url}")
             
-            response = self.session.get(url, headers=self.get_random_headers(), timeout=15)
+            response = self.fetch(url)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find lawyer listings
-                lawyer_cards = soup.find_all('div', class_='lawyer-listing') or \
-                              soup.find_all('div', class_='directory-item') or \
-                              soup.find_all('article', class_='lawyer')
-                
-                for card in lawyer_cards[:20]:  # Limit to 20 per page
-                    lawyer_data = self.parse_nolo_lawyer(card, url, state)
-                    if lawyer_data and lawyer_data['lawyer_name']:
-                        lawyers.append(lawyer_data)
-                
+                lawyers = self.parse_page('nolo', response.content, url, state)
                 logger.info(f"Found {len(lawyers)} lawyers from Nolo")
+                self.finish_unit(lawyers, 'nolo', state, city)
             else:
                 logger.warning(f"Nolo returned status {response.status_code}")
                 
         except Exception as e:
             logger.error(f"Error scraping Nolo: {e}")
         
-        time.sleep(self.delay)
+        return lawyers
+    
+    def parse_nolo_page(self, content, url, state):
+        soup = make_soup(content, NOLO_CARDS)
+        lawyers = []
+        
+        # Find lawyer listings
+        lawyer_cards = soup.find_all('div', class_='lawyer-listing') or \
+                      soup.find_all('div', class_='directory-item') or \
+                      soup.find_all('article', class_='lawyer')
+        
+        for card in lawyer_cards[:20]:  # Limit to 20 per page
+            lawyer_data = self.parse_nolo_lawyer(card, url, state)
+            if lawyer_data and lawyer_data['lawyer_name']:
+                lawyers.append(lawyer_data)
+        
         return lawyers
     
     def parse_nolo_lawyer(self, card, source_url, state):
@@ -163,24 +166,24 @@ class AlternativeLawyerScraper:
             }
             
             # Try various selectors
-            name_elem = card.find(['h2', 'h3', 'h4'], class_=re.compile('name|title')) or \
-                       card.find('a', class_=re.compile('lawyer-name'))
+            name_elem = find_class(card, NOLO_NAME, ['h2', 'h3', 'h4']) or \
+                       find_class(card, NOLO_NAME_LINK, 'a')
             if name_elem:
-                lawyer_data['lawyer_name'] = self.clean_text(name_elem.get_text())
+                lawyer_data['lawyer_name'] = clean_text(name_elem.get_text())
             
-            firm_elem = card.find(class_=re.compile('firm|company|office'))
+            firm_elem = find_class(card, NOLO_FIRM)
             if firm_elem:
-                lawyer_data['firm_name'] = self.clean_text(firm_elem.get_text())
+                lawyer_data['firm_name'] = clean_text(firm_elem.get_text())
             
-            address_elem = card.find(class_=re.compile('address|location'))
+            address_elem = find_class(card, NOLO_ADDRESS)
             if address_elem:
-                address_text = self.clean_text(address_elem.get_text())
+                address_text = clean_text(address_elem.get_text())
                 lawyer_data['office_address'], lawyer_data['city'], _, lawyer_data['zip_code'] = \
-                    self.parse_address_components(address_text)
+                    parse_address(address_text)
             
-            phone_elem = card.find(class_=re.compile('phone|tel'))
+            phone_elem = find_class(card, NOLO_PHONE)
             if phone_elem:
-                phone = self.extract_phone(phone_elem.get_text())
+                phone = extract_phone(phone_elem.get_text())
                 if phone:
                     lawyer_data['phone_number'] = phone
             
@@ -194,6 +197,10 @@ class AlternativeLawyerScraper:
         """Scrape from Lawyers.com directory"""
         lawyers = []
         
+        finished = self.finished_unit('lawyers_com', state, city)
+        if finished is not None:
+            return finished
+        
         try:
             base_url = "https://www.lawyers.com"
             if city:
@@ -203,31 +210,39 @@ class AlternativeLawyerScraper:
             
             logger.info(f"Scraping Lawyers.com: {url}")
             
-            response = self.session.get(url, headers=self.get_random_headers(), timeout=15)
+            response = self.fetch(url)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find lawyer cards
-                lawyer_cards = soup.find_all('div', class_='lawyer-info') or \
-                              soup.find_all('div', class_='listing-item')
-                
-                for card in lawyer_cards[:20]:
-                    lawyer_data = self.parse_lawyers_com_lawyer(card, url, state)
-                    if lawyer_data and lawyer_data['lawyer_name']:
-                        lawyers.append(lawyer_data)
-                
+                lawyers = self.parse_page('lawyers_com', response.content, url, state)
                 logger.info(f"Found {len(lawyers)} lawyers from Lawyers.com")
+                self.finish_unit(lawyers, 'lawyers_com', state, city)
             else:
                 logger.warning(f"Lawyers.com returned status {response.status_code}")
                 
         except Exception as e:
             logger.error(f"Error scraping Lawyers.com: {e}")
         
-        time.sleep(self.delay)
         return lawyers
     
-    def parse_lawyers_com_lawyer(self, card, source_url, state):
+    def parse_lawyers_com_page(self, content, url, state):
+        soup = make_soup(content, LAWYERS_COM_CARDS)
+        lawyers = []
+        
+        # Find lawyer cards
+        lawyer_cards = soup.find_all('div', class_='lawyer-info') or \
+                      soup.find_all('div', class_='listing-item')
+        
+        lawyer_cards = lawyer_cards[:20]
+        contacts = extract_contacts([card.get_text(' ') for card in lawyer_cards])
+        
+        for card, contact in zip(lawyer_cards, contacts):
+            lawyer_data = self.parse_lawyers_com_lawyer(card, url, state, contact)
+            if lawyer_data and lawyer_data['lawyer_name']:
+                lawyers.append(lawyer_data)
+        
+        return lawyers
+    
+    def parse_lawyers_com_lawyer(self, card, source_url, state, contact=None):
         try:
             lawyer_data = {
                 'lawyer_name': None,
@@ -248,27 +263,27 @@ class AlternativeLawyerScraper:
             }
             
             # Extract name
-            name_elem = card.find(['h2', 'h3'], class_=re.compile('lawyer|attorney|name'))
+            name_elem = find_class(card, LAWYERS_COM_NAME, ['h2', 'h3'])
             if name_elem:
-                lawyer_data['lawyer_name'] = self.clean_text(name_elem.get_text())
+                lawyer_data['lawyer_name'] = clean_text(name_elem.get_text())
             
             # Extract firm
-            firm_elem = card.find(class_=re.compile('firm|office'))
+            firm_elem = find_class(card, LAWYERS_COM_FIRM)
             if firm_elem:
-                lawyer_data['firm_name'] = self.clean_text(firm_elem.get_text())
+                lawyer_data['firm_name'] = clean_text(firm_elem.get_text())
             
             # Extract address
-            address_elem = card.find(class_=re.compile('address'))
+            address_elem = find_class(card, LAWYERS_COM_ADDRESS)
             if address_elem:
-                address_text = self.clean_text(address_elem.get_text())
+                address_text = clean_text(address_elem.get_text())
                 lawyer_data['office_address'], lawyer_data['city'], _, lawyer_data['zip_code'] = \
-                    self.parse_address_components(address_text)
+                    parse_address(address_text)
             
-            # Extract phone
-            phone_text = card.get_text()
-            phone = self.extract_phone(phone_text)
-            if phone:
-                lawyer_data['phone_number'] = phone
+            # Extract phone and email (the page parser batches these for all cards)
+            if contact is None:
+                contact = extract_contacts([card.get_text(' ')])[0]
+            lawyer_data['phone_number'] = contact['phone_number']
+            lawyer_data['email'] = contact['email']
             
             return lawyer_data
             
@@ -280,6 +295,10 @@ class AlternativeLawyerScraper:
         """Scrape from Martindale-Hubbell directory"""
         lawyers = []
         
+        finished = self.finished_unit('martindale', state, city)
+        if finished is not None:
+            return finished
+        
         try:
             if city:
                 url = f"https://www.martindale.com/by-location/divorce-lawyers/{city.lower().replace(' ', '-')}-{state.lower()}-attorneys/"
@@ -288,31 +307,39 @@ class AlternativeLawyerScraper:
             
             logger.info(f"Scraping Martindale-Hubbell: {url}")
             
-            response = self.session.get(url, headers=self.get_random_headers(), timeout=15)
+            response = self.fetch(url)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find lawyer listings
-                lawyer_cards = soup.find_all('article', class_='lawyer') or \
-                              soup.find_all('div', class_='serp-lawyer')
-                
-                for card in lawyer_cards[:15]:
-                    lawyer_data = self.parse_martindale_lawyer(card, url, state)
-                    if lawyer_data and lawyer_data['lawyer_name']:
-                        lawyers.append(lawyer_data)
-                
+                lawyers = self.parse_page('martindale', response.content, url, state)
                 logger.info(f"Found {len(lawyers)} lawyers from Martindale-Hubbell")
+                self.finish_unit(lawyers, 'martindale', state, city)
             else:
                 logger.warning(f"Martindale-Hubbell returned status {response.status_code}")
                 
         except Exception as e:
             logger.error(f"Error scraping Martindale-Hubbell: {e}")
         
-        time.sleep(self.delay)
         return lawyers
     
-    def parse_martindale_lawyer(self, card, source_url, state):
+    def parse_martindale_page(self, content, url, state):
+        soup = make_soup(content, MARTINDALE_CARDS)
+        lawyers = []
+        
+        # Find lawyer listings
+        lawyer_cards = soup.find_all('article', class_='lawyer') or \
+                      soup.find_all('div', class_='serp-lawyer')
+        
+        lawyer_cards = lawyer_cards[:15]
+        contacts = extract_contacts([card.get_text(' ') for card in lawyer_cards])
+        
+        for card, contact in zip(lawyer_cards, contacts):
+            lawyer_data = self.parse_martindale_lawyer(card, url, state, contact)
+            if lawyer_data and lawyer_data['lawyer_name']:
+                lawyers.append(lawyer_data)
+        
+        return lawyers
+    
+    def parse_martindale_lawyer(self, card, source_url, state, contact=None):
         try:
             lawyer_data = {
                 'lawyer_name': None,
@@ -333,19 +360,19 @@ class AlternativeLawyerScraper:
             }
             
             # Extract lawyer info
-            name_elem = card.find(['h2', 'h3'], class_=re.compile('lawyer-name|attorney-name'))
+            name_elem = find_class(card, MARTINDALE_NAME, ['h2', 'h3'])
             if name_elem:
-                lawyer_data['lawyer_name'] = self.clean_text(name_elem.get_text())
+                lawyer_data['lawyer_name'] = clean_text(name_elem.get_text())
             
-            firm_elem = card.find(class_=re.compile('law-firm|firm-name'))
+            firm_elem = find_class(card, MARTINDALE_FIRM)
             if firm_elem:
-                lawyer_data['firm_name'] = self.clean_text(firm_elem.get_text())
+                lawyer_data['firm_name'] = clean_text(firm_elem.get_text())
             
-            # Get full text for phone extraction
-            card_text = card.get_text()
-            phone = self.extract_phone(card_text)
-            if phone:
-                lawyer_data['phone_number'] = phone
+            # Get full text for phone and email extraction
+            if contact is None:
+                contact = extract_contacts([card.get_text(' ')])[0]
+            lawyer_data['phone_number'] = contact['phone_number']
+            lawyer_data['email'] = contact['email']
             
             return lawyer_data
             
@@ -353,10 +380,16 @@ class AlternativeLawyerScraper:
             logger.error(f"Error parsing Martindale lawyer: {e}")
             return None
     
-    def scrape_state_with_multiple_sources(self, state, cities=None):
+    def scrape_state_with_multiple_sources(self, state, cities=None, dedup=None):
         """Scrape a state using multiple sources"""
-        all_lawyers = []
+        return list(self.iter_state_with_multiple_sources(state, cities, dedup))
+    
+    def iter_state_with_multiple_sources(self, state, cities=None, dedup=None):
+        """Yield unique lawyers for a state as each city and source finishes.
         
+        Pass a shared DedupIndex to deduplicate across states or against the
+        database; by default duplicates are only removed within the state.
+        """
         # Major cities for each state (sample)
         default_cities = {
             'CA': ['Los Angeles', 'San Francisco', 'San Diego', 'Sacramento'],
@@ -373,30 +406,18 @@ class AlternativeLawyerScraper:
         
         cities_to_search = cities or default_cities.get(state, [None])
         
+        # The same lawyer often appears on several sources
+        dedup = dedup or DedupIndex()
+        unique = 0
+        
         for city in cities_to_search[:3]:  # Limit to 3 cities per state
             logger.info(f"Scraping {state} - {city if city else 'Statewide'}")
             
             # Try different sources
-            nolo_lawyers = self.scrape_nolo_lawyers(state, city)
-            all_lawyers.extend(nolo_lawyers)
-            
-            lawyers_com = self.scrape_lawyers_com(state, city)
-            all_lawyers.extend(lawyers_com)
-            
-            martindale = self.scrape_martindale_hubbell(state, city)
-            all_lawyers.extend(martindale)
-            
-            # Add delay between cities
-            time.sleep(self.delay * 2)
-        
-        # Remove duplicates based on name and firm
-        seen = set()
-        unique_lawyers = []
-        for lawyer in all_lawyers:
-            key = (lawyer.get('lawyer_name'), lawyer.get('firm_name'))
-            if key not in seen and lawyer.get('lawyer_name'):
-                seen.add(key)
-                unique_lawyers.append(lawyer)
+            for scrape in (self.scrape_nolo_lawyers, self.scrape_lawyers_com, self.scrape_martindale_hubbell):
+                named = (lawyer for lawyer in scrape(state, city) if lawyer.get('lawyer_name'))
+                for lawyer in dedup.filter(named):
+                    unique += 1
+                    yield lawyer
         
-        logger.info(f"Total unique lawyers for {state}: {len(unique_lawyers)}")
-        return unique_lawyers
\ No newline at end of file
+        logger.info(f"Total unique lawyers for {state}: {unique}")
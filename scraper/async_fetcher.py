@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import aiohttp
+from dotenv import load_dotenv
+
+from directory_routing import transport_url
+from http_cache import shared_cache
+from rate_limiter import shared_scheduler
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FetchResult = namedtuple('FetchResult', ['url', 'status', 'content'])
+
+
+class AsyncFetcher:
+    """Fetch many pages concurrently with a separate concurrency cap per host"""
+
+    def __init__(self, headers=None, per_host_limit=None, host_limits=None, scheduler=None, cache=None, timeout=10):
+        self.headers = dict(headers or {})
+        self.per_host_limit = per_host_limit or int(os.getenv('MAX_CONNECTIONS_PER_HOST', 2))
+        # Overrides for individual hosts, e.g. {'www.avvo.com': 1}
+        self.host_limits = dict(host_limits or {})
+        self.scheduler = scheduler or shared_scheduler()
+        self.cache = cache or shared_cache()
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self._semaphores = {}
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(headers=self.headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def _semaphore(self, host):
+        if host not in self._semaphores:
+            limit = self.host_limits.get(host, self.per_host_limit)
+            self._semaphores[host] = asyncio.Semaphore(limit)
+        return self._semaphores[host]
+
+    async def fetch(self, url):
+        cached, headers = self.cache.prepare(url)
+        if cached:
+            return FetchResult(url, cached.status_code, cached.content)
+
+        host = urlparse(url).netloc
+
+        async with self._semaphore(host):
+            await self.scheduler.wait_async(url)
+            try:
+                async with self.session.get(transport_url(url), headers=headers) as response:
+                    content = await response.read()
+                    cached = self.cache.resolve(url, response.status, response.headers, content)
+                    if cached:
+                        result = FetchResult(url, cached.status_code, cached.content)
+                    else:
+                        result = FetchResult(url, response.status, content)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error fetching {url}: {e}")
+                result = FetchResult(url, None, None)
+
+        return result
+
+    async def fetch_all(self, urls):
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
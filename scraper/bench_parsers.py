@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+import sys
+import json
+import logging
+import argparse
+import os
+import re
+import time
+import tracemalloc
+
+from html_parsing import FAST_PARSE, LXML_AVAILABLE
+from parse_pool import parse_page
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'parsers')
+BASELINE = os.path.join(CORPUS_DIR, 'baseline.json')
+
+BACKEND = 'lxml' if FAST_PARSE and LXML_AVAILABLE else 'html.parser'
+
+
+def load_corpus(sources=None):
+    with open(os.path.join(CORPUS_DIR, 'corpus.json'), encoding='utf-8') as f:
+        pages = json.load(f)
+    if sources:
+        pages = [page for page in pages if page['source'] in sources]
+    for page in pages:
+        with open(os.path.join(CORPUS_DIR, page['page']), 'rb') as f:
+            page['content'] = f.read()
+    return pages
+
+
+def expected_path(page):
+    return os.path.join(CORPUS_DIR, page['page'][:-len('.html')] + '.expected.json')
+
+
+def parse(page):
+    return parse_page(page['source'], page['content'], page['url'], *page['args'])
+
+
+CALIBRATION_TEXT = ' '.join(f'Attorney {i} (555) 010-{i:04d} Suite {i}' for i in range(2000))
+CALIBRATION_PATTERN = re.compile(r'\((\d{3})\) (\d{3})-(\d{4})')
+
+
+def calibrate():
+    """Seconds for a fixed pure-Python workload. Throughput is compared in
+    units of this, so a baseline recorded on a faster, slower or busier
+    machine still applies."""
+    start = time.perf_counter()
+    for _ in range(4):
+        records = [{'phone': ''.join(match.groups()), 'offset': match.start()}
+                   for match in CALIBRATION_PATTERN.finditer(CALIBRATION_TEXT)]
+        sorted(CALIBRATION_TEXT.split(), key=str.lower)
+        json.dumps(records)
+    return time.perf_counter() - start
+
+
+def check_outputs(pages):
+    """Compare every page's records with its .expected.json; returns the number of mismatching pages"""
+    mismatches = 0
+    for page in pages:
+        with open(expected_path(page), encoding='utf-8') as f:
+            expected = json.load(f)
+        actual = json.loads(json.dumps(parse(page)))
+        if actual == expected:
+            continue
+        mismatches += 1
+        logger.error(f"{page['page']}: expected {len(expected)} records, got {len(actual)}")
+        for index, (want, got) in enumerate(zip(expected, actual)):
+            changed = sorted(key for key in set(want) | set(got) if want.get(key) != got.get(key))
+            if changed:
+                for key in changed:
+                    logger.error(f"  record {index} {key}: expected {want.get(key)!r}, got {got.get(key)!r}")
+                break
+    return mismatches
+
+
+def measure(pages, rounds):
+    """pages/s and cards/s from the fastest of `rounds` passes over the pages,
+    and peak traced memory of parsing any single page. Each pass runs right
+    after a calibration workload, so both see the same machine load."""
+    cards = sum(len(parse(page)) for page in pages)
+    best = calibration = None
+    for _ in range(rounds):
+        unit = calibrate()
+        calibration = unit if calibration is None else min(calibration, unit)
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = 0
+    for page in pages:
+        tracemalloc.start()
+        parse(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'pages': len(pages),
+        'cards': cards,
+        'pages_per_sec': round(len(pages) / best, 1),
+        'cards_per_sec': round(cards / best, 1),
+        'peak_kib': round(peak / 1024),
+        'calibration': calibration,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check page parsers against the fixture corpus and benchmark them')
+    parser.add_argument('--sources', nargs='+', help='Only these sources (avvo, justia, findlaw, nolo, lawyers_com, martindale)')
+    parser.add_argument('--rounds', type=int, default=20, help='Timed passes over each source\'s pages; the fastest counts')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                       help='Allowed throughput drop against the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--update', action='store_true',
+                       help='Rewrite the expected records and the baseline from the current parsers')
+
+    args = parser.parse_args()
+
+    pages = load_corpus(args.sources)
+    if not pages:
+        logger.error("No fixture pages match the given sources")
+        return 1
+
+    if args.update:
+        for page in pages:
+            with open(expected_path(page), 'w', encoding='utf-8') as f:
+                json.dump(parse(page), f, indent=2, ensure_ascii=False)
+                f.write('\n')
+        logger.info(f"Wrote expected records for {len(pages)} pages")
+    elif check_outputs(pages):
+        logger.error("Parser output differs from the expected records; run with --update if the change is intended")
+        return 1
+
+    try:
+        with open(BASELINE, encoding='utf-8') as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+    baseline = baselines.get(BACKEND)
+
+    results = {}
+    slower = []
+    logger.info(f"Parsing with {BACKEND}")
+    for source in sorted({page['source'] for page in pages}):
+        result = measure([page for page in pages if page['source'] == source], args.rounds)
+        results[source] = result
+        line = f"{source:<12} {result['pages_per_sec']:>8.1f} pages/s {result['cards_per_sec']:>9.1f} cards/s {result['peak_kib']:>6} KiB peak"
+
+        previous = (baseline or {}).get('parsers', {}).get(source)
+        if previous:
+            # Both sides in cards per calibration unit
+            ratio = (result['cards_per_sec'] * result['calibration']) / (previous['cards_per_sec'] * previous['calibration'])
+            line += f"  {ratio:6.1%} of baseline"
+            if ratio < 1 - args.tolerance:
+                slower.append(source)
+        logger.info(line)
+
+    if args.update:
+        parsers = dict((baseline or {}).get('parsers', {}))
+        parsers.update(results)
+        baselines[BACKEND] = {'parsers': dict(sorted(parsers.items()))}
+        with open(BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        logger.info(f"Updated {BACKEND} baseline in {BASELINE}")
+        return 0
+
+    if baseline is None:
+        logger.warning(f"No {BACKEND} baseline yet; run with --update to record one")
+    if slower:
+        logger.error(f"Slower than the baseline by more than {args.tolerance:.0%}: {', '.join(slower)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
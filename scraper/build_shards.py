@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import sys
+import logging
+import argparse
+
+from database import Database
+from shard_export import DEFAULT_DIRECTORY, build_shards
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Write per-state and per-city JSON shards of lawyers for the website')
+    parser.add_argument('--output-dir', default=DEFAULT_DIRECTORY, help='Shard directory (default: public/data/lawyers)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only rebuild states with lawyers added, updated or removed since the last build')
+
+    args = parser.parse_args()
+
+    db = Database()
+    if not db.connect():
+        logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
+        return 1
+
+    if not db.create_lawyers_table():
+        db.close()
+        return 1
+
+    try:
+        stats = build_shards(db, args.output_dir, incremental=args.incremental)
+    finally:
+        db.close()
+    logger.info(f"Shards built for {stats['states']} states: {stats['written']} written, {stats['unchanged']} unchanged, {stats['removed']} removed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
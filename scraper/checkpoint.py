@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+
+from directory_routing import stand_in_path
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the lawyers of a finished unit once they have been handed out
+FINISHED = ()
+
+
+class CheckpointStore:
+    """Append-only journal of finished crawl units and the lawyers they produced.
+
+    A unit is a tuple such as ('avvo', 'CA', 3) for a listing page or
+    ('justia', 'CA', city_url) for a city; listing pages also keep their
+    pagination hints (next link, result count). Each finished unit is
+    appended as one JSON line in a single write, so a crash can at worst
+    leave a torn last line, which is ignored on load. Nothing is rewritten
+    during the crawl.
+
+    Only the lawyers of units loaded from an earlier run are held in memory,
+    and only until they are replayed; units finished in this run just keep
+    their key.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = stand_in_path(path)
+        self.finished = {}
+        self.hints = {}
+        self.lock = threading.Lock()
+
+        if resume:
+            self._load()
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _key(unit):
+        return json.dumps(list(unit))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logger.info(f"No checkpoint at {self.path}; starting from the beginning")
+            return
+
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn final line from an interrupted write
+                    break
+                entry = json.loads(line)
+                key = self._key(entry['unit'])
+                self.finished[key] = entry['lawyers']
+                if entry.get('hints'):
+                    self.hints[key] = entry['hints']
+                complete += len(line)
+
+        # Drop the torn tail so new entries start on a fresh line
+        if complete < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+
+        logger.info(f"Resuming from {self.path}: {len(self.finished)} units already finished")
+
+    def get(self, unit):
+        """Lawyers a unit produced in an earlier run, an empty tuple if it was
+        already handed out or finished in this run, or None if the unit still
+        has to run"""
+        key = self._key(unit)
+        with self.lock:
+            lawyers = self.finished.get(key)
+            if lawyers:
+                self.finished[key] = FINISHED
+        return lawyers
+
+    def get_hints(self, unit):
+        """Pagination hints (see pagination.page_hints) recorded with a unit of an earlier run, or None"""
+        return self.hints.get(self._key(unit))
+
+    def record(self, unit, lawyers, hints=None):
+        entry = {'unit': list(unit), 'lawyers': lawyers}
+        if hints:
+            entry['hints'] = hints
+        line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.finished[self._key(unit)] = FINISHED
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+import sys
+import logging
+
+from database import Database
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """One-off migration: merge lawyers stored more than once under different
+    name/firm/address spellings and key the table by identity_key"""
+    db = Database()
+    if not db.connect():
+        logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
+        return 1
+
+    if not db.create_lawyers_table():
+        db.close()
+        return 1
+
+    stats = db.compact_lawyers()
+    db.close()
+    return 0 if stats is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import re
+from bisect import bisect_right
+
+# US/NANP numbers with an optional +1 prefix; digit lookarounds stop matches
+# inside longer numbers such as bar IDs or ZIP+4 codes
+PHONE_PATTERN = r'(?<!\d)(?:\+?1[-.\s]?)?\(?(\d{3})\)?[-.\s]?(\d{3})[-.\s]?(\d{4})(?!\d)'
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'
+
+PHONE_RE = re.compile(PHONE_PATTERN)
+EMAIL_RE = re.compile(EMAIL_PATTERN)
+# One alternation so a batch is scanned once for both kinds of contact
+CONTACT_RE = re.compile(rf'(?P<email>{EMAIL_PATTERN})|(?P<phone>{PHONE_PATTERN})')
+
+# Separator between batch texts; neither pattern can match across it
+SEPARATOR = '\x00'
+
+
+def clean_text(text):
+    if not text:
+        return None
+    text = ' '.join(text.split())
+    return text if text else None
+
+
+def _e164(area, exchange, line):
+    return f"+1{area}{exchange}{line}"
+
+
+def extract_phone(text):
+    """First phone number in text, normalized to E.164 (+1XXXXXXXXXX)"""
+    if not text:
+        return None
+    match = PHONE_RE.search(text)
+    return _e164(*match.groups()) if match else None
+
+
+def extract_email(text):
+    """First email address in text, lowercased"""
+    if not text:
+        return None
+    match = EMAIL_RE.search(text)
+    return match.group().lower() if match else None
+
+
+def extract_contacts(texts):
+    """Extract the first phone and email from every text in one regex pass.
+
+    Returns one {'phone_number': ..., 'email': ...} dict per input text, with
+    phones in E.164 and emails lowercased.
+    """
+    texts = [text or '' for text in texts]
+    contacts = [{'phone_number': None, 'email': None} for _ in texts]
+    if not texts:
+        return contacts
+
+    # Start offset of every text inside the joined batch
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(SEPARATOR)
+
+    for match in CONTACT_RE.finditer(SEPARATOR.join(texts)):
+        contact = contacts[bisect_right(starts, match.start()) - 1]
+        if match.group('email'):
+            if contact['email'] is None:
+                contact['email'] = match.group('email').lower()
+        elif contact['phone_number'] is None:
+            contact['phone_number'] = _e164(*match.group(3, 4, 5))
+
+    return contacts
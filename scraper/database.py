@@ -2,28 +2,143 @@ import os
 try:
     import psycopg2
     from psycopg2.extras import RealDictCursor
+    from psycopg2.pool import ThreadedConnectionPool
 except ImportError:
     import psycopg2_binary as psycopg2
     from psycopg2_binary.extras import RealDictCursor
+    from psycopg2_binary.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
+from contextlib import contextmanager
+from dedup import identity_key
+from directory_routing import DIRECTORY_BASE_URL, is_local_database
+from geo import DISTANCE_SQL, GEO_CELL_SQL, bounding_boxes, cell_ranges
+from summary_tables import (
+    REFRESH_SUMMARIES_SQL, SUMMARY_FUNCTION_SOURCE, SUMMARY_FUNCTION_SOURCE_SQL, SUMMARY_FUNCTION_SQL,
+    SUMMARY_LOCK_SQL, SUMMARY_SCHEMA_SQL, SUMMARY_TRIGGER_COUNT_SQL, SUMMARY_TRIGGER_NAMES, SUMMARY_TRIGGERS_SQL,
+)
+from itertools import islice
+import hashlib
+import io
+import json
 import logging
+import re
+import threading
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+LAWYER_COLUMNS = [
+    'lawyer_name', 'firm_name', 'office_address', 'city', 'state',
+    'zip_code', 'phone_number', 'website', 'email', 'practice_areas',
+    'bar_admission', 'years_experience', 'rating', 'review_count', 'source_url',
+    'latitude', 'longitude',
+]
+
+# Columns refreshed when a scraped lawyer already exists
+UPDATE_COLUMNS = [
+    'phone_number', 'website', 'email', 'practice_areas',
+    'bar_admission', 'years_experience', 'rating', 'review_count',
+]
+
+CONFLICT_COLUMNS = ['lawyer_name', 'firm_name', 'office_address']
+
+# Once lawyers are keyed by identity_key these are no longer part of the key,
+# so they are refreshed too (keeping the stored value when a source omits it)
+IDENTITY_UPDATE_COLUMNS = ['firm_name', 'office_address', 'city', 'zip_code', 'source_url']
+
+# Filled in by the geocoder; a lawyer that could not be located keeps the
+# stored coordinates
+LOCATION_COLUMNS = ['latitude', 'longitude']
+
+# Fields an upsert can change; their hash tells whether a re-scraped row changed
+HASH_COLUMNS = UPDATE_COLUMNS + IDENTITY_UPDATE_COLUMNS + LOCATION_COLUMNS
+
+# Columns written for every upserted lawyer
+STORED_COLUMNS = LAWYER_COLUMNS + ['identity_key', 'content_hash']
+
+# How compaction merges the columns update_schema.sql adds for the website
+# (sponsorship, Google, usage counters) when it folds duplicates into one
+# row: counters are added up, these take the smallest value, booleans are
+# OR-ed and everything else keeps the newest non-empty value
+COUNTER_COLUMNS = [
+    'search_count', 'profile_views', 'phone_clicks', 'website_clicks',
+    'directions_requests', 'contact_form_submissions',
+]
+EARLIEST_COLUMNS = ['first_seen_at', 'priority_rank']
+# Never merged: the group key, bookkeeping compaction sets itself and
+# lawyer_name, which stays as the kept row has it
+UNMERGED_COLUMNS = ['id', 'lawyer_name', 'identity_key', 'content_hash', 'scraped_at', 'updated_at']
+
+IDENTITY_CONSTRAINT = 'lawyers_identity_key_key'
+LEGACY_CONSTRAINT = 'lawyers_lawyer_name_firm_name_office_address_key'
+
+# Read order for streaming and paging: NULL cities and names sort as empty
+# strings so (city, lawyer_name, id) can be compared as a keyset
+PAGE_ORDER = "COALESCE(city, ''), COALESCE(lawyer_name, ''), id"
+PAGE_KEY_COLUMNS = ['city', 'lawyer_name', 'id']
+
+COLUMN_NAME = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+# Returned by find_lawyers_near() unless other columns are asked for
+NEARBY_COLUMNS = [
+    'id', 'lawyer_name', 'firm_name', 'office_address', 'city', 'state', 'zip_code',
+    'phone_number', 'website', 'rating', 'review_count', 'latitude', 'longitude',
+]
+
+def _copy_value(value):
+    # COPY text format: \N for NULL, backslash-escape the delimiters
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def _select_list(columns):
+    """Comma-separated column names for a projection; '*' when None"""
+    if not columns:
+        return '*'
+    for column in columns:
+        if not COLUMN_NAME.match(column):
+            raise ValueError(f"Invalid column name: {column!r}")
+    return ', '.join(columns)
+
+def content_hash(lawyer):
+    """Hash of a lawyer's normalized updatable fields, so re-scraping an
+    unchanged listing can be recognized without comparing column by column"""
+    values = []
+    for column in HASH_COLUMNS:
+        value = lawyer.get(column)
+        if isinstance(value, str):
+            value = ' '.join(value.split()) or None
+        values.append(None if value is None else str(value))
+    return hashlib.blake2b(json.dumps(values).encode('utf-8'), digest_size=16).hexdigest()
+
+def _stored_values(lawyer):
+    values = {column: lawyer.get(column) for column in LAWYER_COLUMNS}
+    # The dedup index may already have pointed this lawyer at a stored row
+    values['identity_key'] = lawyer.get('identity_key') or identity_key(lawyer)
+    values['content_hash'] = content_hash(lawyer)
+    return values
+
 class Database:
     def __init__(self):
         self.connection = None
         self.cursor = None
+        self.pool = None
+        self._pool_slots = None
+        self._identity_keyed = None
         
+    def _database_url(self):
+        database_url = os.getenv('DATABASE_URL')
+        if not database_url:
+            raise ValueError("DATABASE_URL not found in environment variables")
+        if DIRECTORY_BASE_URL and not is_local_database(database_url):
+            raise ValueError("DIRECTORY_BASE_URL is set; stand-in directory data is only written to a local database")
+        return database_url
+    
     def connect(self):
         try:
-            database_url = os.getenv('DATABASE_URL')
-            if not database_url:
-                raise ValueError("DATABASE_URL not found in environment variables")
-            
-            self.connection = psycopg2.connect(database_url)
+            self.connection = psycopg2.connect(self._database_url())
             self.cursor = self.connection.cursor(cursor_factory=RealDictCursor)
             logger.info("Database connection established")
             return True
@@ -31,9 +146,72 @@ class Database:
             logger.error(f"Database connection failed: {e}")
             return False
     
+    def connect_pool(self, min_size=None, max_size=None):
+        """Open a thread-safe pool so several writer threads can share a
+        bounded number of connections (see checkout)"""
+        try:
+            min_size = min_size or int(os.getenv('DB_POOL_MIN', 1))
+            max_size = max_size or int(os.getenv('DB_POOL_MAX', os.getenv('MAX_WORKERS', 5)))
+            self.pool = ThreadedConnectionPool(min_size, max_size, self._database_url())
+            # getconn raises instead of waiting when the pool is exhausted
+            self._pool_slots = threading.BoundedSemaphore(max_size)
+            logger.info(f"Database pool established ({min_size}-{max_size} connections)")
+            return True
+        except Exception as e:
+            logger.error(f"Database pool creation failed: {e}")
+            return False
+    
+    def _is_healthy(self, connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+    
+    @contextmanager
+    def checkout(self):
+        """Yield a healthy connection: one from the pool in pooled mode,
+        otherwise the single connection. Dropped connections are replaced."""
+        if self.pool is None:
+            if self.connection is None or self.connection.closed:
+                logger.warning("Database connection lost, reconnecting")
+                self.connect()
+            connection = self.connection
+            try:
+                yield connection
+            except Exception:
+                if connection is not None and not connection.closed:
+                    connection.rollback()
+                raise
+            return
+        
+        with self._pool_slots:
+            connection = self.pool.getconn()
+            while not self._is_healthy(connection):
+                logger.warning("Discarding dropped pooled connection")
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+            
+            try:
+                yield connection
+            except Exception:
+                if not connection.closed:
+                    connection.rollback()
+                raise
+            finally:
+                self.pool.putconn(connection, close=bool(connection.closed))
+    
     def create_lawyers_table(self):
+        with self.checkout() as connection:
+            return self._create_lawyers_table(connection)
+    
+    def _create_lawyers_table(self, connection):
         try:
-            create_table_query = """
+            create_table_query = f"""
             CREATE TABLE IF NOT EXISTS lawyers (
                 id SERIAL PRIMARY KEY,
                 lawyer_name VARCHAR(255),
@@ -48,61 +226,135 @@ class Database:
                 practice_areas TEXT,
                 bar_admission VARCHAR(255),
                 years_experience INTEGER,
-                rating DECIMAL(3,2),
+                rating DECIMAL(4,2),
                 review_count INTEGER,
                 source_url TEXT,
+                identity_key TEXT,
+                content_hash CHAR(32),
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(lawyer_name, firm_name, office_address)
+                CONSTRAINT lawyers_identity_key_key UNIQUE (identity_key)
             );
             
+            -- Tables created before identity keys keep UNIQUE(lawyer_name, firm_name,
+            -- office_address) until compact_lawyers.py moves them over
+            ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS identity_key TEXT;
+            ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS content_hash CHAR(32);
+            
+            -- Coordinates and their grid cell for radius searches (see geo.py);
+            -- Postgres keeps geo_cell in step with whoever writes the coordinates
+            ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS latitude DECIMAL(10, 8);
+            ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS longitude DECIMAL(11, 8);
+            ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS geo_cell INTEGER
+                GENERATED ALWAYS AS ({GEO_CELL_SQL}) STORED;
+            
             CREATE INDEX IF NOT EXISTS idx_lawyers_state ON lawyers(state);
             CREATE INDEX IF NOT EXISTS idx_lawyers_city ON lawyers(city);
             CREATE INDEX IF NOT EXISTS idx_lawyers_firm ON lawyers(firm_name);
+            CREATE INDEX IF NOT EXISTS idx_lawyers_geo_cell ON lawyers(geo_cell);
+            CREATE INDEX IF NOT EXISTS idx_lawyers_updated_at ON lawyers(updated_at);
+            CREATE INDEX IF NOT EXISTS idx_lawyers_state_page
+                ON lawyers(state, (COALESCE(city, '')), (COALESCE(lawyer_name, '')), id);
             """
             
-            self.cursor.execute(create_table_query)
-            self.connection.commit()
+            with connection.cursor() as cursor:
+                cursor.execute(create_table_query)
+                cursor.execute(SUMMARY_SCHEMA_SQL)
+                cursor.execute(SUMMARY_FUNCTION_SOURCE_SQL)
+                installed = cursor.fetchone()
+                if installed is None or installed[0] != SUMMARY_FUNCTION_SOURCE:
+                    cursor.execute(SUMMARY_FUNCTION_SQL)
+                cursor.execute(SUMMARY_TRIGGER_COUNT_SQL, (SUMMARY_TRIGGER_NAMES,))
+                if cursor.fetchone()[0] < len(SUMMARY_TRIGGER_NAMES):
+                    # First install: add the triggers and build the summaries they keep up to date
+                    cursor.execute(SUMMARY_LOCK_SQL)
+                    cursor.execute(SUMMARY_TRIGGERS_SQL)
+                    cursor.execute(REFRESH_SUMMARIES_SQL)
+            connection.commit()
             logger.info("Lawyers table created successfully")
             return True
         except Exception as e:
             logger.error(f"Failed to create lawyers table: {e}")
-            self.connection.rollback()
+            connection.rollback()
             return False
     
-    def insert_lawyer(self, lawyer_data):
-        try:
-            insert_query = """
-            INSERT INTO lawyers (
-                lawyer_name, firm_name, office_address, city, state, 
-                zip_code, phone_number, website, email, practice_areas,
-                bar_admission, years_experience, rating, review_count, source_url
-            ) VALUES (
-                %(lawyer_name)s, %(firm_name)s, %(office_address)s, %(city)s, %(state)s,
-                %(zip_code)s, %(phone_number)s, %(website)s, %(email)s, %(practice_areas)s,
-                %(bar_admission)s, %(years_experience)s, %(rating)s, %(review_count)s, %(source_url)s
+    def _uses_identity_key(self, cursor):
+        """Whether lawyers has the identity_key unique constraint (new or
+        compacted tables) or still relies on UNIQUE(lawyer_name, firm_name, office_address)"""
+        if self._identity_keyed is None:
+            cursor.execute(
+                "SELECT 1 FROM pg_constraint WHERE conrelid = 'lawyers'::regclass AND conname = %s",
+                (IDENTITY_CONSTRAINT,),
             )
-            ON CONFLICT (lawyer_name, firm_name, office_address) 
+            self._identity_keyed = cursor.fetchone() is not None
+        return self._identity_keyed
+    
+    def uses_identity_key(self):
+        """Public form of _uses_identity_key; False when it cannot be read"""
+        with self.checkout() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    identity_keyed = self._uses_identity_key(cursor)
+                connection.rollback()
+                return identity_keyed
+            except psycopg2.Error as e:
+                logger.error(f"Failed to read the lawyers constraints: {e}")
+                connection.rollback()
+                return False
+    
+    def _conflict_clause(self, identity_keyed):
+        if identity_keyed:
+            target = 'identity_key'
+            updates = [f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS]
+            updates += [f"{column} = COALESCE(EXCLUDED.{column}, lawyers.{column})" for column in IDENTITY_UPDATE_COLUMNS]
+        else:
+            target = ', '.join(CONFLICT_COLUMNS)
+            updates = [f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS + ['identity_key']]
+        updates += [f"{column} = COALESCE(EXCLUDED.{column}, lawyers.{column})" for column in LOCATION_COLUMNS]
+        updates = ',\n                '.join(updates)
+        return f"""
+            ON CONFLICT ({target})
             DO UPDATE SET
-                phone_number = EXCLUDED.phone_number,
-                website = EXCLUDED.website,
-                email = EXCLUDED.email,
-                practice_areas = EXCLUDED.practice_areas,
-                bar_admission = EXCLUDED.bar_admission,
-                years_experience = EXCLUDED.years_experience,
-                rating = EXCLUDED.rating,
-                review_count = EXCLUDED.review_count,
+                {updates},
+                content_hash = EXCLUDED.content_hash,
                 updated_at = CURRENT_TIMESTAMP
-            RETURNING id;
-            """
+            WHERE lawyers.content_hash IS DISTINCT FROM EXCLUDED.content_hash"""
+    
+    def insert_lawyer(self, lawyer_data):
+        with self.checkout() as connection:
+            return self._insert_lawyer(connection, lawyer_data)
+    
+    def _insert_lawyer(self, connection, lawyer_data):
+        try:
+            params = _stored_values(lawyer_data)
+            columns = ', '.join(STORED_COLUMNS)
+            placeholders = ', '.join(f"%({column})s" for column in STORED_COLUMNS)
             
-            self.cursor.execute(insert_query, lawyer_data)
-            self.connection.commit()
-            result = self.cursor.fetchone()
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                identity_keyed = self._uses_identity_key(cursor)
+                cursor.execute(f"""
+                    INSERT INTO lawyers ({columns})
+                    VALUES ({placeholders})
+                    {self._conflict_clause(identity_keyed)}
+                    RETURNING id;
+                """, params)
+                result = cursor.fetchone()
+                if result is None:
+                    # Unchanged rows are left alone and return nothing
+                    if identity_keyed:
+                        cursor.execute("SELECT id FROM lawyers WHERE identity_key = %(identity_key)s", params)
+                    else:
+                        cursor.execute(
+                            "SELECT id FROM lawyers WHERE lawyer_name = %(lawyer_name)s "
+                            "AND firm_name = %(firm_name)s AND office_address = %(office_address)s",
+                            params,
+                        )
+                    result = cursor.fetchone()
+            connection.commit()
             return result['id'] if result else None
         except Exception as e:
             logger.error(f"Failed to insert lawyer: {e}")
-            self.connection.rollback()
+            connection.rollback()
             return None
     
     def bulk_insert_lawyers(self, lawyers_list):
@@ -119,35 +371,518 @@ class Database:
         logger.info(f"Bulk insert completed: {inserted_count} inserted, {failed_count} failed")
         return inserted_count, failed_count
     
-    def get_lawyers_by_state(self, state):
+    def bulk_upsert_lawyers(self, lawyers_list, batch_size=1000):
+        """Upsert lawyers in batches: COPY each batch into a temp staging table,
+        then merge it into lawyers with a single INSERT ... ON CONFLICT.
+        A failing batch is rolled back on its own and counted as failed.
+        Rows whose content hash is unchanged are not rewritten and are counted
+        as unchanged. Safe to call from several threads in pooled mode."""
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        lawyers_iter = iter(lawyers_list)
+        
+        while True:
+            batch = list(islice(lawyers_iter, batch_size))
+            if not batch:
+                break
+            
+            # A dropped connection gets one retry on a fresh connection
+            for attempt in range(2):
+                try:
+                    with self.checkout() as connection:
+                        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                            inserted, updated = self._upsert_batch(cursor, batch)
+                        connection.commit()
+                    stats['inserted'] += inserted
+                    stats['updated'] += updated
+                    stats['unchanged'] += len(batch) - inserted - updated
+                    break
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    if attempt == 0:
+                        logger.warning(f"Connection error during batch upsert, retrying: {e}")
+                        continue
+                    logger.error(f"Failed to upsert batch of {len(batch)} lawyers: {e}")
+                    stats['failed'] += len(batch)
+                except Exception as e:
+                    logger.error(f"Failed to upsert batch of {len(batch)} lawyers: {e}")
+                    stats['failed'] += len(batch)
+                    break
+        
+        logger.info(f"Bulk upsert completed: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged, {stats['failed']} failed")
+        return stats
+    
+    def _upsert_batch(self, cursor, batch):
+        # ON CONFLICT cannot touch the same row twice in one statement, so keep
+        # the last copy of each key (NULL keys never conflict, keep them all)
+        identity_keyed = self._uses_identity_key(cursor)
+        rows = {}
+        for index, lawyer in enumerate(batch):
+            values = _stored_values(lawyer)
+            if identity_keyed:
+                key = (values['identity_key'],)
+            else:
+                key = tuple(values[column] for column in CONFLICT_COLUMNS)
+            rows[key if None not in key else index] = values
+        
+        buffer = io.StringIO()
+        for values in rows.values():
+            buffer.write('\t'.join(_copy_value(values[column]) for column in STORED_COLUMNS) + '\n')
+        buffer.seek(0)
+        
+        columns = ', '.join(STORED_COLUMNS)
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS lawyers_staging ON COMMIT DELETE ROWS AS
+            SELECT {columns} FROM lawyers WITH NO DATA
+        """)
+        cursor.copy_expert(f"COPY lawyers_staging ({columns}) FROM STDIN", buffer)
+        
+        # Taking row locks in key order keeps concurrent writers from deadlocking
+        order = 'identity_key' if identity_keyed else ', '.join(CONFLICT_COLUMNS)
+        cursor.execute(f"""
+            INSERT INTO lawyers ({columns})
+            SELECT {columns} FROM lawyers_staging
+            ORDER BY {order}
+            {self._conflict_clause(identity_keyed)}
+            RETURNING (xmax = 0) AS inserted;
+        """)
+        # Unchanged rows are skipped by the WHERE clause and return nothing
+        results = cursor.fetchall()
+        inserted = sum(1 for row in results if row['inserted'])
+        return inserted, len(results) - inserted
+    
+    def get_lawyers_by_state(self, state, columns=None):
+        """All lawyers of a state as a list, or [] on error; prefer
+        iter_lawyers() or get_lawyers_page() for large states"""
         try:
-            query = "SELECT * FROM lawyers WHERE state = %s ORDER BY city, lawyer_name"
-            self.cursor.execute(query, (state,))
-            return self.cursor.fetchall()
-        except Exception as e:
-            logger.error(f"Failed to fetch lawyers by state: {e}")
+            return list(self.iter_lawyers([state], columns=columns))
+        except psycopg2.Error:
             return []
     
+    def iter_lawyers(self, states=None, columns=None, batch_size=2000):
+        """Stream lawyers (optionally only some states and columns) ordered
+        by state, city, name and id through a named server-side cursor, so
+        at most batch_size rows are held in memory at a time.
+        
+        In pooled mode the generator holds a connection until it is exhausted
+        or closed. A database error part way through is raised, so a cut-off
+        stream cannot be mistaken for a complete one.
+        """
+        query = f"SELECT {_select_list(columns)} FROM lawyers"
+        params = None
+        if states:
+            query += " WHERE state = ANY(%s)"
+            params = (list(states),)
+        query += f" ORDER BY state, {PAGE_ORDER}"
+        
+        with self.checkout() as connection:
+            try:
+                with connection.cursor(name='lawyers_stream', cursor_factory=RealDictCursor) as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(query, params)
+                    yield from cursor
+            except psycopg2.Error as e:
+                # checkout() rolls back; a cut-off stream must not look finished
+                logger.error(f"Failed to stream lawyers: {e}")
+                raise
+            connection.rollback()
+    
+    def get_change_watermark(self):
+        """A time such that every later change gets a later updated_at.
+        
+        updated_at is the writing transaction's start time, so a transaction
+        still running may commit rows stamped earlier than now; the watermark
+        is the start of the oldest open transaction, or now.
+        """
+        with self.checkout() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT LEAST(LOCALTIMESTAMP, MIN(xact_start)::TIMESTAMP)
+                    FROM pg_stat_activity
+                    WHERE xact_start IS NOT NULL AND pid <> pg_backend_pid()
+                """)
+                watermark = cursor.fetchone()[0]
+            connection.rollback()
+            return watermark
+    
+    def get_states_changed_since(self, since, known_counts=None):
+        """States with lawyers inserted or updated at or after since, plus
+        states whose lawyer count differs from known_counts (deletions)"""
+        with self.checkout() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT DISTINCT state FROM lawyers WHERE updated_at >= %s AND state IS NOT NULL", (since,))
+                    changed = {row[0] for row in cursor.fetchall()}
+            except Exception as e:
+                logger.error(f"Failed to find changed states: {e}")
+                connection.rollback()
+                return None
+        if known_counts is not None:
+            rows = self.get_state_counts()
+            if rows is None:
+                return None
+            counts = {row['state']: row['lawyers'] for row in rows}
+            changed |= {state for state in counts.keys() | known_counts.keys() if counts.get(state) != known_counts.get(state)}
+        return changed
+    
+    def get_lawyers_page(self, state, after=None, limit=500, columns=None):
+        """One page of a state's lawyers in (city, lawyer_name, id) order.
+        
+        Returns (rows, next_after); pass next_after back as after to get the
+        following page. next_after is None after the last page. Each page is
+        an index range scan that starts where the previous one ended, so deep
+        pages cost the same as the first.
+        """
+        if columns:
+            columns = list(columns) + [column for column in PAGE_KEY_COLUMNS if column not in columns]
+        
+        query = f"SELECT {_select_list(columns)} FROM lawyers WHERE state = %s"
+        params = [state]
+        if after is not None:
+            query += f" AND ({PAGE_ORDER}) > (%s, %s, %s)"
+            params.extend(after)
+        query += f" ORDER BY {PAGE_ORDER} LIMIT %s"
+        params.append(limit)
+        
+        with self.checkout() as connection:
+            try:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+            except Exception as e:
+                logger.error(f"Failed to fetch lawyers page for {state}: {e}")
+                connection.rollback()
+                return [], None
+        
+        if len(rows) < limit:
+            return rows, None
+        last = rows[-1]
+        return rows, (last['city'] or '', last['lawyer_name'] or '', last['id'])
+    
+    def find_lawyers_near(self, latitude, longitude, radius_miles=25, limit=50, columns=None, sponsored_only=False):
+        """Lawyers within radius_miles of a point, nearest first, each with a
+        distance_miles field.
+        
+        Candidates come from index ranges on geo_cell covering the circle's
+        bounding box, so only a few grid cells are read; the exact great-circle
+        distance is computed for those alone. sponsored_only limits results to
+        active sponsorships (columns from update_schema.sql).
+        """
+        boxes = bounding_boxes(latitude, longitude, radius_miles)
+        params = {'latitude': latitude, 'longitude': longitude, 'radius': radius_miles, 'limit': limit}
+        
+        cells = []
+        box_filters = []
+        for index, (first, last) in enumerate(cell_ranges(boxes)):
+            cells.append(f"geo_cell BETWEEN %(cell_first_{index})s AND %(cell_last_{index})s")
+            params[f'cell_first_{index}'] = first
+            params[f'cell_last_{index}'] = last
+        for index, (south, north, west, east) in enumerate(boxes):
+            box_filters.append(
+                f"(latitude BETWEEN %(south_{index})s AND %(north_{index})s "
+                f"AND longitude BETWEEN %(west_{index})s AND %(east_{index})s)"
+            )
+            params.update({f'south_{index}': south, f'north_{index}': north, f'west_{index}': west, f'east_{index}': east})
+        
+        filters = [f"({' OR '.join(cells)})", f"({' OR '.join(box_filters)})"]
+        if sponsored_only:
+            filters.append("is_sponsored AND sponsorship_end_date >= CURRENT_DATE")
+        
+        query = f"""
+            SELECT * FROM (
+                SELECT {_select_list(columns or NEARBY_COLUMNS)}, {DISTANCE_SQL} AS distance_miles
+                FROM lawyers
+                WHERE {' AND '.join(filters)}
+            ) nearby
+            WHERE distance_miles <= %(radius)s
+            ORDER BY distance_miles
+            LIMIT %(limit)s
+        """
+        with self.checkout() as connection:
+            try:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchall()
+            except Exception as e:
+                logger.error(f"Failed to find lawyers near {latitude}, {longitude}: {e}")
+                connection.rollback()
+                return []
+    
+    def backfill_coordinates(self, geocoder, only_missing=True, batch_size=10000):
+        """Geocode stored lawyers in bulk: rows are streamed through a
+        server-side cursor, located batch_size at a time and written back with
+        COPY and one UPDATE. Returns the number of rows updated."""
+        with self.checkout() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        CREATE TEMP TABLE lawyer_coordinates (id INTEGER PRIMARY KEY, latitude DECIMAL(10, 8), longitude DECIMAL(11, 8))
+                        ON COMMIT DROP
+                    """)
+                    
+                    query = "SELECT id, city, state, zip_code FROM lawyers"
+                    if only_missing:
+                        query += " WHERE latitude IS NULL OR longitude IS NULL"
+                    with connection.cursor(name='lawyer_locations', cursor_factory=RealDictCursor) as rows:
+                        rows.itersize = batch_size
+                        rows.execute(query)
+                        while True:
+                            batch = rows.fetchmany(batch_size)
+                            if not batch:
+                                break
+                            buffer = io.StringIO()
+                            for row, coordinates in zip(batch, geocoder.locate(batch)):
+                                if coordinates:
+                                    buffer.write(f"{row['id']}\t{coordinates[0]}\t{coordinates[1]}\n")
+                            buffer.seek(0)
+                            cursor.copy_expert("COPY lawyer_coordinates (id, latitude, longitude) FROM STDIN", buffer)
+                    
+                    cursor.execute("""
+                        UPDATE lawyers SET
+                            latitude = coordinates.latitude,
+                            longitude = coordinates.longitude,
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM lawyer_coordinates coordinates
+                        WHERE lawyers.id = coordinates.id
+                          AND (lawyers.latitude, lawyers.longitude) IS DISTINCT FROM (coordinates.latitude, coordinates.longitude)
+                    """)
+                    updated = cursor.rowcount
+                connection.commit()
+                logger.info(f"Geocoded {updated} stored lawyers")
+                return updated
+            except Exception as e:
+                logger.error(f"Failed to geocode stored lawyers: {e}")
+                connection.rollback()
+                return None
+    
+    def iter_lawyer_keys(self, states=None, batch_size=10000):
+        """Stream the identifying columns of stored lawyers (optionally only
+        some states) through a server-side cursor, batch_size rows at a time.
+        Database errors part way through are raised."""
+        with self.checkout() as connection:
+            query = "SELECT lawyer_name, firm_name, office_address, phone_number, zip_code, state, identity_key FROM lawyers"
+            params = None
+            if states:
+                query += " WHERE state = ANY(%s)"
+                params = (list(states),)
+            try:
+                with connection.cursor(name='lawyer_keys', cursor_factory=RealDictCursor) as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(query, params)
+                    yield from cursor
+            except psycopg2.Error as e:
+                logger.error(f"Failed to read lawyer keys: {e}")
+                raise
+            connection.rollback()
+    
+    def compact_lawyers(self, batch_size=10000):
+        """Merge rows that share an identity key and move the table onto the
+        identity_key unique constraint.
+        
+        Fills in missing identity keys, keeps the oldest row of each group
+        with the most recently scraped non-empty value of every column, deletes
+        the rest, and swaps UNIQUE(lawyer_name, firm_name, office_address) for
+        UNIQUE(identity_key). Rows referencing a deleted lawyer through a
+        foreign key (lawyer_interactions, sponsorship_history) are pointed at
+        the kept row first. Runs in one transaction.
+        """
+        stats = {'backfilled': 0, 'groups': 0, 'deleted': 0, 'repointed': 0}
+        with self.checkout() as connection:
+            try:
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute("""
+                        CREATE TEMP TABLE lawyer_identity_keys (id INTEGER PRIMARY KEY, identity_key TEXT)
+                        ON COMMIT DROP
+                    """)
+                    # Keys filled in below may repeat a stored row's until the
+                    # groups are merged; the constraint is added back at the end
+                    cursor.execute(f"ALTER TABLE lawyers DROP CONSTRAINT IF EXISTS {IDENTITY_CONSTRAINT}")
+                    
+                    buffer = io.StringIO()
+                    with connection.cursor(name='lawyer_backfill', cursor_factory=RealDictCursor) as rows:
+                        rows.itersize = batch_size
+                        rows.execute("SELECT id, lawyer_name, firm_name, phone_number, zip_code, state FROM lawyers WHERE identity_key IS NULL")
+                        for row in rows:
+                            buffer.write(f"{row['id']}\t{_copy_value(identity_key(row))}\n")
+                    buffer.seek(0)
+                    cursor.copy_expert("COPY lawyer_identity_keys (id, identity_key) FROM STDIN", buffer)
+                    
+                    cursor.execute("""
+                        UPDATE lawyers SET identity_key = keys.identity_key
+                        FROM lawyer_identity_keys keys
+                        WHERE lawyers.id = keys.id AND keys.identity_key IS NOT NULL
+                    """)
+                    stats['backfilled'] = cursor.rowcount
+                    
+                    merged_columns = self._merged_columns(cursor)
+                    merged_values = ',\n                            '.join(
+                        f"{self._merge_expression(column, data_type)} AS {column}"
+                        for column, data_type in merged_columns
+                    )
+                    cursor.execute(f"""
+                        CREATE TEMP TABLE lawyer_merges ON COMMIT DROP AS
+                        SELECT
+                            identity_key,
+                            MIN(id) AS keep_id,
+                            MIN(scraped_at) AS scraped_at,
+                            {merged_values}
+                        FROM lawyers
+                        WHERE identity_key IS NOT NULL
+                        GROUP BY identity_key
+                        HAVING COUNT(*) > 1
+                    """)
+                    stats['groups'] = cursor.rowcount
+                    
+                    cursor.execute("""
+                        SELECT constraints.conrelid::regclass::text AS child, quote_ident(columns.attname) AS column_name
+                        FROM pg_constraint constraints
+                        JOIN pg_attribute columns
+                            ON columns.attrelid = constraints.conrelid AND columns.attnum = constraints.conkey[1]
+                        WHERE constraints.contype = 'f' AND constraints.confrelid = 'lawyers'::regclass
+                            AND cardinality(constraints.conkey) = 1
+                    """)
+                    for reference in cursor.fetchall():
+                        child, column = reference['child'], reference['column_name']
+                        cursor.execute(f"""
+                            UPDATE {child} SET {column} = merges.keep_id
+                            FROM lawyers, lawyer_merges merges
+                            WHERE {child}.{column} = lawyers.id
+                                AND lawyers.identity_key = merges.identity_key AND lawyers.id <> merges.keep_id
+                        """)
+                        stats['repointed'] += cursor.rowcount
+                    
+                    cursor.execute("""
+                        DELETE FROM lawyers
+                        USING lawyer_merges merges
+                        WHERE lawyers.identity_key = merges.identity_key AND lawyers.id <> merges.keep_id
+                    """)
+                    stats['deleted'] = cursor.rowcount
+                    
+                    # Swap constraints before merging: merged name/firm/address
+                    # values may repeat another row's under the legacy key
+                    cursor.execute(f"ALTER TABLE lawyers DROP CONSTRAINT IF EXISTS {LEGACY_CONSTRAINT}")
+                    cursor.execute(f"ALTER TABLE lawyers ADD CONSTRAINT {IDENTITY_CONSTRAINT} UNIQUE (identity_key)")
+                    
+                    updates = ',\n                            '.join(f"{column} = merges.{column}" for column, _ in merged_columns)
+                    cursor.execute(f"""
+                        UPDATE lawyers SET
+                            {updates},
+                            scraped_at = merges.scraped_at,
+                            content_hash = NULL,
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM lawyer_merges merges
+                        WHERE lawyers.id = merges.keep_id
+                    """)
+                    
+                connection.commit()
+                self._identity_keyed = True
+                logger.info(
+                    f"Compacted lawyers: {stats['backfilled']} identity keys filled in, "
+                    f"{stats['groups']} duplicate groups merged, {stats['deleted']} rows removed, "
+                    f"{stats['repointed']} referencing rows moved to the kept lawyers"
+                )
+                return stats
+            except Exception as e:
+                logger.error(f"Failed to compact lawyers: {e}")
+                connection.rollback()
+                self._identity_keyed = None
+                return None
+    
+    def _merged_columns(self, cursor):
+        """(column, data type) of every lawyers column compaction merges,
+        including ones added outside this module; generated columns follow
+        their inputs"""
+        cursor.execute("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'lawyers' AND is_generated = 'NEVER'
+            ORDER BY ordinal_position
+        """)
+        return [
+            (row['column_name'], row['data_type']) for row in cursor.fetchall()
+            if row['column_name'] not in UNMERGED_COLUMNS and COLUMN_NAME.match(row['column_name'])
+        ]
+    
+    @staticmethod
+    def _merge_expression(column, data_type):
+        if column in COUNTER_COLUMNS:
+            return f"SUM({column})"
+        if column in EARLIEST_COLUMNS:
+            return f"MIN({column})"
+        if data_type == 'boolean':
+            return f"bool_or({column})"
+        return (f"(array_agg({column} ORDER BY updated_at DESC NULLS LAST, id DESC) "
+                f"FILTER (WHERE {column} IS NOT NULL))[1]")
+    
+    def refresh_summaries(self):
+        """Rebuild the summary tables from lawyers. The triggers keep them
+        current, so this is only needed after writes that bypassed them."""
+        with self.checkout() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(SUMMARY_LOCK_SQL)
+                    cursor.execute(REFRESH_SUMMARIES_SQL)
+                connection.commit()
+                logger.info("Lawyer summaries rebuilt")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to rebuild lawyer summaries: {e}")
+                connection.rollback()
+                return False
+    
     def get_statistics(self):
+        with self.checkout() as connection:
+            return self._get_statistics(connection)
+    
+    def _get_statistics(self, connection):
         try:
+            # One row kept current by the summary triggers, not a table scan
             query = """
-            SELECT 
-                COUNT(*) as total_lawyers,
-                COUNT(DISTINCT state) as states_covered,
-                COUNT(DISTINCT firm_name) as unique_firms,
-                COUNT(DISTINCT city || ', ' || state) as cities_covered,
-                MAX(scraped_at) as last_scrape
-            FROM lawyers;
+            SELECT total_lawyers, states_covered, unique_firms, cities_covered, last_scrape
+            FROM lawyer_summary;
             """
-            self.cursor.execute(query)
-            return self.cursor.fetchone()
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query)
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Failed to get statistics: {e}")
+            connection.rollback()
             return None
     
+    def get_state_counts(self):
+        """Lawyer and city counts per state, from the summary tables; None if
+        they could not be read"""
+        with self.checkout() as connection:
+            try:
+                query = "SELECT state, lawyers, cities FROM lawyer_state_summary WHERE lawyers > 0 ORDER BY state"
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query)
+                    return cursor.fetchall()
+            except Exception as e:
+                logger.error(f"Failed to get state counts: {e}")
+                connection.rollback()
+                return None
+    
+    def get_city_counts(self, state):
+        """Lawyer counts per city of a state, largest first, from the summary tables"""
+        with self.checkout() as connection:
+            try:
+                query = """
+                SELECT city, lawyers FROM lawyer_city_summary
+                WHERE state = %s AND lawyers > 0
+                ORDER BY lawyers DESC, city
+                """
+                with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, (state,))
+                    return cursor.fetchall()
+            except Exception as e:
+                logger.error(f"Failed to get city counts: {e}")
+                connection.rollback()
+                return []
+    
     def close(self):
         if self.cursor:
             self.cursor.close()
         if self.connection:
             self.connection.close()
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
         logger.info("Database connection closed")
\ No newline at end of file
@@ -0,0 +1,211 @@
+import logging
+import os
+import re
+import sys
+from collections import namedtuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+NAME_TITLES = {'mr', 'mrs', 'ms', 'miss', 'dr', 'hon', 'atty', 'attorney', 'judge'}
+NAME_SUFFIXES = {'esq', 'esquire', 'jr', 'sr', 'ii', 'iii', 'iv', 'jd', 'llm', 'phd', 'cfls', 'cpa', 'mba'}
+FIRM_STOPWORDS = {
+    'the', 'of', 'and', 'at', 'law', 'laws', 'firm', 'office', 'offices', 'group', 'attorney', 'attorneys',
+    'lawyer', 'lawyers', 'legal', 'associates', 'partners', 'llp', 'llc', 'pllc', 'pc', 'pa', 'plc',
+    'inc', 'co', 'ltd', 'chtd', 'apc', 'aplc',
+}
+
+NON_LETTERS = re.compile(r"[^a-z\s]")
+NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_name(name):
+    """(first, last) tokens of a person's name, ignoring case, punctuation,
+    titles, suffixes and middle names; "Doe, Jane" reads as Jane Doe"""
+    if not name:
+        return None
+    name = name.lower()
+    if ',' in name:
+        last, _, rest = name.partition(',')
+        if NON_LETTERS.sub('', rest).strip() not in NAME_SUFFIXES:
+            name = f'{rest} {last}'
+    tokens = [
+        token for token in NON_LETTERS.sub(' ', name.replace("'", '')).split()
+        if token not in NAME_TITLES and token not in NAME_SUFFIXES
+    ]
+    if not tokens:
+        return None
+    return (tokens[0] if len(tokens) > 1 else ''), tokens[-1]
+
+
+def normalize_firm(firm):
+    """Distinctive words of a firm name: "The Law Offices of Doe & Roe, LLP" -> "doe roe\""""
+    if not firm:
+        return None
+    # Drop dots first so "P.C." reads as "pc"
+    tokens = [token for token in NON_ALNUM.sub(' ', firm.lower().replace('.', '')).split() if token not in FIRM_STOPWORDS]
+    return ' '.join(tokens) or None
+
+
+def normalize_phone(phone):
+    """Ten NANP digits, or None"""
+    if not phone:
+        return None
+    digits = NON_DIGITS.sub('', phone)
+    if len(digits) == 11 and digits[0] == '1':
+        digits = digits[1:]
+    return digits if len(digits) == 10 else None
+
+
+def normalize_zip(zip_code):
+    if not zip_code:
+        return None
+    digits = NON_DIGITS.sub('', zip_code)[:5]
+    return digits if len(digits) == 5 else None
+
+
+def identity_key(lawyer):
+    """Canonical key of a lawyer: "last|first|phone|zip" from the normalized
+    name, phone digits and ZIP, with the firm and state standing in when both
+    the phone and ZIP are missing. None for records without a usable name."""
+    name = normalize_name(lawyer.get('lawyer_name'))
+    if name is None:
+        return None
+    phone = normalize_phone(lawyer.get('phone_number'))
+    zip_code = normalize_zip(lawyer.get('zip_code'))
+    parts = [name[1], name[0], phone or '', zip_code or '']
+    if not phone and not zip_code:
+        parts += [normalize_firm(lawyer.get('firm_name')) or '', (lawyer.get('state') or '').upper()]
+    return '|'.join(parts)
+
+
+# Compact per-record signature. key is the (lawyer_name, firm_name,
+# office_address, identity_key) of a stored row a match should update, None
+# for new records
+Entry = namedtuple('Entry', ['first', 'last', 'firm', 'phone', 'zip', 'key'])
+
+
+def _first_names_agree(a, b):
+    if not a or not b or a == b:
+        return True
+    # "J" matches "Jane"
+    return (len(a) == 1 or len(b) == 1) and a[0] == b[0]
+
+
+class DedupIndex:
+    """Link records that describe the same lawyer across sources.
+
+    Records are only compared with others that share a blocking key: the
+    phone number, ZIP + surname, or state + surname + first initial. Two
+    records match when their surnames agree, their first names are compatible,
+    and they share a phone number, a ZIP code or a firm. Only a small
+    signature per record is kept, and blocks stop growing at max_block entries
+    (DEDUP_MAX_BLOCK, default 200), so memory and comparisons stay bounded.
+
+    Rows already in the lawyers table can be loaded with load_rows(); a new
+    record that matches one is re-keyed to that row so the upsert updates it
+    instead of inserting a duplicate. On identity-keyed tables only its
+    identity_key is rewritten, so the scraped name, firm and address still
+    refresh the row; tables on the legacy (name, firm, address) constraint
+    need all three rewritten to hit the row.
+    """
+
+    def __init__(self, max_block=None):
+        self.max_block = max_block or int(os.getenv('DEDUP_MAX_BLOCK', 200))
+        self.blocks = {}
+        self.claimed = set()
+        self.identity_keyed = True
+        self.stats = {'unique': 0, 'duplicates': 0, 'existing': 0}
+
+    def _entry(self, lawyer, existing=False):
+        name = normalize_name(lawyer.get('lawyer_name'))
+        if name is None:
+            return None
+        # Interned name parts are shared between the many entries with common names
+        return Entry(
+            first=sys.intern(name[0]),
+            last=sys.intern(name[1]),
+            firm=normalize_firm(lawyer.get('firm_name')),
+            phone=normalize_phone(lawyer.get('phone_number')),
+            zip=normalize_zip(lawyer.get('zip_code')),
+            key=(
+                lawyer.get('lawyer_name'), lawyer.get('firm_name'), lawyer.get('office_address'),
+                lawyer.get('identity_key') or identity_key(lawyer),
+            ) if existing else None,
+        )
+
+    @staticmethod
+    def _blocking_keys(entry, state):
+        keys = []
+        if entry.phone:
+            keys.append(entry.phone)
+        if entry.zip:
+            keys.append(f'{entry.zip} {entry.last}')
+        if state:
+            keys.append(f'{state.upper()} {entry.last} {entry.first[:1]}')
+        return keys
+
+    @staticmethod
+    def _same_lawyer(a, b):
+        if a.last != b.last or not _first_names_agree(a.first, b.first):
+            return False
+        return bool(
+            (a.phone and a.phone == b.phone)
+            or (a.zip and a.zip == b.zip)
+            or (a.firm and a.firm == b.firm)
+        )
+
+    def _match(self, entry, block_keys):
+        for block_key in block_keys:
+            for candidate in self.blocks.get(block_key, ()):
+                if self._same_lawyer(entry, candidate):
+                    return candidate
+        return None
+
+    def _add(self, entry, block_keys):
+        for block_key in block_keys:
+            block = self.blocks.setdefault(block_key, [])
+            if len(block) < self.max_block:
+                block.append(entry)
+
+    def load_rows(self, rows, identity_keyed=True):
+        """Index lawyers already stored in the database; identity_keyed is
+        whether their table upserts on identity_key"""
+        self.identity_keyed = identity_keyed
+        count = 0
+        for row in rows:
+            entry = self._entry(row, existing=True)
+            if entry:
+                self._add(entry, self._blocking_keys(entry, row.get('state')))
+                count += 1
+        logger.info(f"Dedup index loaded {count} existing lawyers")
+
+    def filter(self, lawyers):
+        """Yield each lawyer once; later sightings of a lawyer are dropped and
+        sightings of a stored lawyer are re-keyed to its row"""
+        for lawyer in lawyers:
+            entry = self._entry(lawyer)
+            match = None
+            if entry:
+                block_keys = self._blocking_keys(entry, lawyer.get('state'))
+                match = self._match(entry, block_keys)
+
+            if match is None:
+                if entry:
+                    self._add(entry, block_keys)
+                self.stats['unique'] += 1
+                yield lawyer
+            elif match.key is not None and match.key not in self.claimed:
+                self.claimed.add(match.key)
+                self.stats['existing'] += 1
+                if self.identity_keyed:
+                    lawyer['identity_key'] = match.key[3]
+                else:
+                    lawyer['lawyer_name'], lawyer['firm_name'], lawyer['office_address'], lawyer['identity_key'] = match.key
+                yield lawyer
+            else:
+                self.stats['duplicates'] += 1
@@ -0,0 +1,45 @@
+import os
+import re
+from urllib.parse import parse_qs, urlparse, urlsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Set DIRECTORY_BASE_URL (e.g. http://127.0.0.1:8765) to send every directory
+# request to a stand-in server such as mock_directory.py. Only the request
+# goes there: records, checkpoints, the HTTP cache and per-host rate limits
+# keep using the real URLs. So that stand-in pages never mix with real ones,
+# checkpoints and the HTTP cache move to paths of their own (stand_in_path)
+# and only a local database can be written (is_local_database).
+DIRECTORY_BASE_URL = os.getenv('DIRECTORY_BASE_URL', '').rstrip('/')
+
+LOCAL_HOSTS = ('', 'localhost', '127.0.0.1', '::1')
+NON_SLUG = re.compile(r'[^A-Za-z0-9]+')
+
+
+def transport_url(url):
+    """URL to request for a directory page; https://host/path becomes
+    DIRECTORY_BASE_URL/host/path when a stand-in server is configured"""
+    if not DIRECTORY_BASE_URL:
+        return url
+    parts = urlsplit(url)
+    routed = f"{DIRECTORY_BASE_URL}/{parts.netloc}{parts.path or '/'}"
+    return f"{routed}?{parts.query}" if parts.query else routed
+
+
+def stand_in_path(path):
+    """path itself, or a sibling named after the stand-in server when
+    DIRECTORY_BASE_URL is set: .http_cache becomes .http_cache.127-0-0-1-8765"""
+    if not DIRECTORY_BASE_URL:
+        return path
+    namespace = NON_SLUG.sub('-', urlsplit(DIRECTORY_BASE_URL).netloc).strip('-')
+    root, extension = os.path.splitext(path)
+    return f"{root}.{namespace}{extension}"
+
+
+def is_local_database(database_url):
+    """Whether database_url is a local server (TCP on localhost or a Unix socket)"""
+    parsed = urlparse(database_url)
+    hosts = [parsed.hostname or ''] + parse_qs(parsed.query).get('host', [])
+    return all(host in LOCAL_HOSTS or host.startswith('/') for host in hosts)
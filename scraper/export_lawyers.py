@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+import sys
+import logging
+import argparse
+
+from database import Database
+from parquet_export import export_lawyers
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the lawyers table to Parquet, partitioned by state')
+    parser.add_argument('--output-dir', default='exports/lawyers', help='Directory for the state=XX/ partitions')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only rewrite states with lawyers added, updated or removed since the last export')
+    parser.add_argument('--states', nargs='+', help='Only export these state codes')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows read from the database per chunk')
+
+    args = parser.parse_args()
+
+    db = Database()
+    if not db.connect():
+        logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
+        return 1
+
+    if not db.create_lawyers_table():
+        db.close()
+        return 1
+
+    try:
+        stats = export_lawyers(db, args.output_dir, incremental=args.incremental, states=args.states, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    logger.info(f"Export complete: {stats['rows']} lawyers in {stats['states']} states written, {stats['removed']} empty states removed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
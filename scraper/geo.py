@@ -0,0 +1,82 @@
+import math
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.05
+
+# Lawyers are bucketed into a fixed grid of 0.1 x 0.1 degree cells (about
+# 7 x 5 miles across the US), numbered row by row from the south-west corner.
+# A radius search turns into one contiguous range of cell numbers per grid row,
+# which a plain B-tree index on geo_cell answers.
+CELLS_PER_DEGREE = 10
+GRID_COLUMNS = 360 * CELLS_PER_DEGREE
+GRID_ROWS = 180 * CELLS_PER_DEGREE
+
+# Same numbering in SQL, for the generated lawyers.geo_cell column (LEAST
+# ignores NULLs, hence the explicit check)
+GEO_CELL_SQL = (
+    "CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL THEN"
+    f" (LEAST(FLOOR((latitude + 90) * {CELLS_PER_DEGREE}), {GRID_ROWS - 1}) * {GRID_COLUMNS}"
+    f" + LEAST(FLOOR((longitude + 180) * {CELLS_PER_DEGREE}), {GRID_COLUMNS - 1}))::INTEGER END"
+)
+
+# Great-circle distance in miles from (%(latitude)s, %(longitude)s)
+DISTANCE_SQL = (
+    f"{2 * EARTH_RADIUS_MILES} * ASIN(SQRT("
+    "POWER(SIN(RADIANS(latitude - %(latitude)s) / 2), 2)"
+    " + COS(RADIANS(%(latitude)s)) * COS(RADIANS(latitude))"
+    " * POWER(SIN(RADIANS(longitude - %(longitude)s) / 2), 2)))"
+)
+
+
+def _row(latitude):
+    return min(int(math.floor((latitude + 90) * CELLS_PER_DEGREE)), GRID_ROWS - 1)
+
+
+def _column(longitude):
+    return min(int(math.floor((longitude + 180) * CELLS_PER_DEGREE)), GRID_COLUMNS - 1)
+
+
+def geo_cell(latitude, longitude):
+    """Grid cell of a point, matching GEO_CELL_SQL"""
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * GRID_COLUMNS + _column(longitude)
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bounding_boxes(latitude, longitude, radius_miles):
+    """(south, north, west, east) boxes covering a radius; two boxes when the
+    circle crosses the antimeridian (the Aleutians)"""
+    lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+    south = max(latitude - lat_delta, -90.0)
+    north = min(latitude + lat_delta, 90.0)
+
+    # Longitude degrees shrink towards the poles; use the widest latitude in the box
+    widest = max(abs(south), abs(north))
+    if widest >= 89.9:
+        return [(south, north, -180.0, 180.0)]
+    lon_delta = lat_delta / math.cos(math.radians(widest))
+    if lon_delta >= 180:
+        return [(south, north, -180.0, 180.0)]
+
+    west, east = longitude - lon_delta, longitude + lon_delta
+    if west < -180:
+        return [(south, north, west + 360, 180.0), (south, north, -180.0, east)]
+    if east > 180:
+        return [(south, north, west, 180.0), (south, north, -180.0, east - 360)]
+    return [(south, north, west, east)]
+
+
+def cell_ranges(boxes):
+    """Inclusive (first, last) geo_cell ranges covering the boxes, one per grid row"""
+    ranges = []
+    for south, north, west, east in boxes:
+        first_column, last_column = _column(west), _column(east)
+        for row in range(_row(south), _row(north) + 1):
+            ranges.append((row * GRID_COLUMNS + first_column, row * GRID_COLUMNS + last_column))
+    return ranges
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+import sys
+import logging
+import argparse
+
+from database import Database
+from geocoder import Geocoder
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill in latitude/longitude for lawyers already in the database')
+    parser.add_argument('--zip-file', help='ZIP centroid file (Census ZCTA gazetteer); defaults to ZIP_CENTROIDS_FILE')
+    parser.add_argument('--all', action='store_true',
+                       help='Re-geocode every lawyer, e.g. after adding a ZIP file, instead of only those without coordinates')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Lawyers geocoded per batch')
+
+    args = parser.parse_args()
+
+    geocoder = Geocoder(args.zip_file)
+
+    db = Database()
+    if not db.connect():
+        logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
+        return 1
+
+    if not db.create_lawyers_table():
+        db.close()
+        return 1
+
+    updated = db.backfill_coordinates(geocoder, only_missing=not args.all, batch_size=args.batch_size)
+    db.close()
+    logger.info(f"Located by ZIP: {geocoder.stats['zip']}, by ZIP prefix: {geocoder.stats['zip_prefix']}, by city: {geocoder.stats['city']}, not located: {geocoder.stats['missed']}")
+    return 0 if updated is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
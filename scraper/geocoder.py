@@ -0,0 +1,231 @@
+import logging
+import os
+import re
+from itertools import islice
+
+import numpy as np
+from dotenv import load_dotenv
+
+from dedup import normalize_zip
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Downtown coordinates of the cities the directories list most lawyers under
+CITY_CENTROIDS = {
+    'AL': {'birmingham': (33.5186, -86.8104), 'montgomery': (32.3668, -86.3000), 'huntsville': (34.7304, -86.5861), 'mobile': (30.6954, -88.0399)},
+    'AK': {'anchorage': (61.2181, -149.9003), 'juneau': (58.3019, -134.4197), 'fairbanks': (64.8378, -147.7164)},
+    'AZ': {'phoenix': (33.4484, -112.0740), 'tucson': (32.2226, -110.9747), 'mesa': (33.4152, -111.8315), 'scottsdale': (33.4942, -111.9261), 'chandler': (33.3062, -111.8413)},
+    'AR': {'little rock': (34.7465, -92.2896), 'fayetteville': (36.0626, -94.1574)},
+    'CA': {
+        'los angeles': (34.0522, -118.2437), 'san diego': (32.7157, -117.1611), 'san jose': (37.3382, -121.8863),
+        'san francisco': (37.7749, -122.4194), 'fresno': (36.7378, -119.7871), 'sacramento': (38.5816, -121.4944),
+        'long beach': (33.7701, -118.1937), 'oakland': (37.8044, -122.2712), 'bakersfield': (35.3733, -119.0187),
+        'anaheim': (33.8366, -117.9143), 'santa ana': (33.7455, -117.8677), 'riverside': (33.9806, -117.3755),
+        'irvine': (33.6846, -117.8265), 'pasadena': (34.1478, -118.1445),
+    },
+    'CO': {'denver': (39.7392, -104.9903), 'colorado springs': (38.8339, -104.8214), 'aurora': (39.7294, -104.8319), 'boulder': (40.0150, -105.2705)},
+    'CT': {'hartford': (41.7658, -72.6734), 'new haven': (41.3083, -72.9279), 'bridgeport': (41.1865, -73.1952), 'stamford': (41.0534, -73.5387)},
+    'DE': {'wilmington': (39.7391, -75.5398), 'dover': (39.1582, -75.5244)},
+    'DC': {'washington': (38.9072, -77.0369)},
+    'FL': {
+        'jacksonville': (30.3322, -81.6557), 'miami': (25.7617, -80.1918), 'tampa': (27.9506, -82.4572),
+        'orlando': (28.5383, -81.3792), 'st petersburg': (27.7676, -82.6403), 'fort lauderdale': (26.1224, -80.1373),
+        'tallahassee': (30.4383, -84.2807), 'west palm beach': (26.7153, -80.0534), 'boca raton': (26.3683, -80.1289),
+    },
+    'GA': {
+        'atlanta': (33.7490, -84.3880), 'augusta': (33.4735, -82.0105), 'columbus': (32.4610, -84.9877),
+        'savannah': (32.0809, -81.0912), 'macon': (32.8407, -83.6324), 'marietta': (33.9526, -84.5499),
+    },
+    'HI': {'honolulu': (21.3069, -157.8583)},
+    'ID': {'boise': (43.6150, -116.2023)},
+    'IL': {
+        'chicago': (41.8781, -87.6298), 'springfield': (39.7817, -89.6501), 'rockford': (42.2711, -89.0940),
+        'peoria': (40.6936, -89.5890), 'naperville': (41.7508, -88.1535), 'aurora': (41.7606, -88.3201),
+    },
+    'IN': {'indianapolis': (39.7684, -86.1581), 'fort wayne': (41.0793, -85.1394), 'evansville': (37.9716, -87.5711), 'south bend': (41.6764, -86.2520)},
+    'IA': {'des moines': (41.5868, -93.6250), 'cedar rapids': (41.9779, -91.6656)},
+    'KS': {'wichita': (37.6872, -97.3301), 'overland park': (38.9822, -94.6708), 'kansas city': (39.1141, -94.6275), 'topeka': (39.0473, -95.6752)},
+    'KY': {'louisville': (38.2527, -85.7585), 'lexington': (38.0406, -84.5037), 'frankfort': (38.2009, -84.8733)},
+    'LA': {'new orleans': (29.9511, -90.0715), 'baton rouge': (30.4515, -91.1871), 'shreveport': (32.5252, -93.7502), 'lafayette': (30.2241, -92.0198)},
+    'ME': {'portland': (43.6591, -70.2568), 'augusta': (44.3106, -69.7795)},
+    'MD': {'baltimore': (39.2904, -76.6122), 'annapolis': (38.9784, -76.4922), 'rockville': (39.0840, -77.1528), 'bethesda': (38.9847, -77.0947)},
+    'MA': {'boston': (42.3601, -71.0589), 'worcester': (42.2626, -71.8023), 'springfield': (42.1015, -72.5898), 'cambridge': (42.3736, -71.1097)},
+    'MI': {
+        'detroit': (42.3314, -83.0458), 'grand rapids': (42.9634, -85.6681), 'lansing': (42.7325, -84.5555),
+        'ann arbor': (42.2808, -83.7430), 'troy': (42.6064, -83.1498),
+    },
+    'MN': {'minneapolis': (44.9778, -93.2650), 'st paul': (44.9537, -93.0900), 'rochester': (44.0121, -92.4802), 'duluth': (46.7867, -92.1005)},
+    'MS': {'jackson': (32.2988, -90.1848), 'gulfport': (30.3674, -89.0928)},
+    'MO': {'kansas city': (39.0997, -94.5786), 'st louis': (38.6270, -90.1994), 'springfield': (37.2090, -93.2923), 'jefferson city': (38.5767, -92.1735)},
+    'MT': {'billings': (45.7833, -108.5007), 'missoula': (46.8721, -113.9940), 'helena': (46.5891, -112.0391)},
+    'NE': {'omaha': (41.2565, -95.9345), 'lincoln': (40.8136, -96.7026)},
+    'NV': {'las vegas': (36.1699, -115.1398), 'reno': (39.5296, -119.8138), 'henderson': (36.0395, -114.9817)},
+    'NH': {'manchester': (42.9956, -71.4548), 'concord': (43.2081, -71.5376), 'nashua': (42.7654, -71.4676)},
+    'NJ': {
+        'newark': (40.7357, -74.1724), 'jersey city': (40.7178, -74.0431), 'trenton': (40.2206, -74.7597),
+        'hackensack': (40.8859, -74.0435), 'morristown': (40.7968, -74.4815),
+    },
+    'NM': {'albuquerque': (35.0844, -106.6504), 'santa fe': (35.6870, -105.9378), 'las cruces': (32.3199, -106.7637)},
+    'NY': {
+        'new york': (40.7128, -74.0060), 'buffalo': (42.8864, -78.8784), 'rochester': (43.1566, -77.6088),
+        'albany': (42.6526, -73.7562), 'syracuse': (43.0481, -76.1474), 'brooklyn': (40.6782, -73.9442),
+        'white plains': (41.0340, -73.7629),
+    },
+    'NC': {
+        'charlotte': (35.2271, -80.8431), 'raleigh': (35.7796, -78.6382), 'greensboro': (36.0726, -79.7920),
+        'durham': (35.9940, -78.8986), 'winston salem': (36.0999, -80.2442), 'wilmington': (34.2257, -77.9447),
+    },
+    'ND': {'fargo': (46.8772, -96.7898), 'bismarck': (46.8083, -100.7837)},
+    'OH': {
+        'columbus': (39.9612, -82.9988), 'cleveland': (41.4993, -81.6944), 'cincinnati': (39.1031, -84.5120),
+        'dayton': (39.7589, -84.1916), 'toledo': (41.6528, -83.5379), 'akron': (41.0814, -81.5190),
+    },
+    'OK': {'oklahoma city': (35.4676, -97.5164), 'tulsa': (36.1540, -95.9928)},
+    'OR': {'portland': (45.5152, -122.6784), 'salem': (44.9429, -123.0351), 'eugene': (44.0521, -123.0868)},
+    'PA': {
+        'philadelphia': (39.9526, -75.1652), 'pittsburgh': (40.4406, -79.9959), 'harrisburg': (40.2732, -76.8867),
+        'allentown': (40.6084, -75.4902), 'erie': (42.1292, -80.0851), 'lancaster': (40.0379, -76.3055),
+    },
+    'RI': {'providence': (41.8240, -71.4128)},
+    'SC': {'columbia': (34.0007, -81.0348), 'charleston': (32.7765, -79.9311), 'greenville': (34.8526, -82.3940)},
+    'SD': {'sioux falls': (43.5446, -96.7311), 'rapid city': (44.0805, -103.2310), 'pierre': (44.3683, -100.3510)},
+    'TN': {'nashville': (36.1627, -86.7816), 'memphis': (35.1495, -90.0490), 'knoxville': (35.9606, -83.9207), 'chattanooga': (35.0456, -85.3097)},
+    'TX': {
+        'houston': (29.7604, -95.3698), 'san antonio': (29.4241, -98.4936), 'dallas': (32.7767, -96.7970),
+        'austin': (30.2672, -97.7431), 'fort worth': (32.7555, -97.3308), 'el paso': (31.7619, -106.4850),
+        'arlington': (32.7357, -97.1081), 'plano': (33.0198, -96.6989), 'corpus christi': (27.8006, -97.3964),
+        'lubbock': (33.5779, -101.8552),
+    },
+    'UT': {'salt lake city': (40.7608, -111.8910), 'provo': (40.2338, -111.6585), 'ogden': (41.2230, -111.9738)},
+    'VT': {'burlington': (44.4759, -73.2121), 'montpelier': (44.2601, -72.5754)},
+    'VA': {
+        'virginia beach': (36.8529, -75.9780), 'richmond': (37.5407, -77.4360), 'norfolk': (36.8508, -76.2859),
+        'arlington': (38.8816, -77.0910), 'alexandria': (38.8048, -77.0469), 'fairfax': (38.8462, -77.3064),
+    },
+    'WA': {
+        'seattle': (47.6062, -122.3321), 'spokane': (47.6588, -117.4260), 'tacoma': (47.2529, -122.4443),
+        'bellevue': (47.6101, -122.2015), 'olympia': (47.0379, -122.9007), 'vancouver': (45.6387, -122.6615),
+    },
+    'WV': {'charleston': (38.3498, -81.6326), 'huntington': (38.4192, -82.4452), 'morgantown': (39.6295, -79.9559)},
+    'WI': {'milwaukee': (43.0389, -87.9065), 'madison': (43.0731, -89.4012), 'green bay': (44.5133, -88.0133)},
+    'WY': {'cheyenne': (41.1400, -104.8202), 'casper': (42.8501, -106.3252)},
+}
+
+CITY_PUNCTUATION = re.compile(r"[.'\-]")
+SAINT = re.compile(r'^(?:saint|ste?)\s+')
+
+
+def normalize_city(city):
+    """"St. Louis", "Saint Louis" and "ST LOUIS" all read as "st louis\""""
+    if not city:
+        return None
+    city = ' '.join(CITY_PUNCTUATION.sub(' ', city.lower()).split())
+    return SAINT.sub('st ', city)
+
+
+def _zip_codes(lawyers):
+    """5-digit ZIPs as integers, -1 where a lawyer has none"""
+    codes = np.full(len(lawyers), -1, dtype=np.int64)
+    for index, lawyer in enumerate(lawyers):
+        zip_code = normalize_zip(lawyer.get('zip_code'))
+        if zip_code:
+            codes[index] = int(zip_code)
+    return codes
+
+
+class Geocoder:
+    """Offline coordinates for scraped lawyers from ZIP or city centroids.
+
+    ZIP centroids come from a Census ZCTA gazetteer (or any CSV with zip,
+    latitude and longitude columns) named by ZIP_CENTROIDS_FILE. They are held
+    as sorted numpy arrays and a whole batch of ZIPs is matched with one
+    searchsorted call. ZIPs missing from the file (PO boxes, new codes) fall
+    back to the average of their 3-digit prefix, and lawyers without a usable
+    ZIP to the bundled centroids of major cities. Coordinates a lawyer already
+    has are kept.
+    """
+
+    def __init__(self, zip_file=None):
+        self.zips = np.empty(0, dtype=np.int64)
+        self.zip_coordinates = np.empty((0, 2))
+        self.prefix_coordinates = np.full((1000, 2), np.nan)
+        self.stats = {'zip': 0, 'zip_prefix': 0, 'city': 0, 'missed': 0}
+
+        zip_file = zip_file or os.getenv('ZIP_CENTROIDS_FILE')
+        if zip_file:
+            self._load_zip_centroids(zip_file)
+
+    def _load_zip_centroids(self, path):
+        import pandas as pd
+
+        # Gazetteer files are tab separated with GEOID/INTPTLAT/INTPTLONG columns
+        table = pd.read_csv(path, sep=None, engine='python', dtype=str)
+        table.columns = [column.strip().lower() for column in table.columns]
+        zip_column = next(column for column in ('geoid', 'zcta5', 'zip', 'zip_code') if column in table.columns)
+        lat_column = next(column for column in ('intptlat', 'latitude', 'lat') if column in table.columns)
+        lon_column = next(column for column in ('intptlong', 'longitude', 'lon', 'lng') if column in table.columns)
+
+        zips = pd.to_numeric(table[zip_column].str.strip(), errors='coerce').to_numpy()
+        coordinates = np.column_stack([
+            pd.to_numeric(table[lat_column].str.strip(), errors='coerce').to_numpy(),
+            pd.to_numeric(table[lon_column].str.strip(), errors='coerce').to_numpy(),
+        ])
+        valid = ~np.isnan(zips) & ~np.isnan(coordinates).any(axis=1)
+        zips, coordinates = zips[valid].astype(np.int64), coordinates[valid]
+
+        order = np.argsort(zips, kind='stable')
+        self.zips, self.zip_coordinates = zips[order], coordinates[order]
+
+        prefixes = self.zips // 100
+        counts = np.bincount(prefixes, minlength=1000)
+        with np.errstate(invalid='ignore'):
+            self.prefix_coordinates = np.column_stack([
+                np.bincount(prefixes, weights=self.zip_coordinates[:, 0], minlength=1000) / counts,
+                np.bincount(prefixes, weights=self.zip_coordinates[:, 1], minlength=1000) / counts,
+            ])
+        logger.info(f"Loaded {len(self.zips)} ZIP centroids from {path}")
+
+    def locate(self, lawyers):
+        """(latitude, longitude) or None for each lawyer, in order"""
+        codes = _zip_codes(lawyers)
+        coordinates = np.full((len(lawyers), 2), np.nan)
+        source = np.zeros(len(lawyers), dtype=np.int8)
+
+        if len(self.zips):
+            positions = np.minimum(np.searchsorted(self.zips, codes), len(self.zips) - 1)
+            exact = (codes >= 0) & (self.zips[positions] == codes)
+            coordinates[exact] = self.zip_coordinates[positions[exact]]
+            source[exact] = 1
+
+            by_prefix = (codes >= 0) & ~exact
+            coordinates[by_prefix] = self.prefix_coordinates[codes[by_prefix] // 100]
+            source[by_prefix & ~np.isnan(coordinates[:, 0])] = 2
+
+        self.stats['zip'] += int((source == 1).sum())
+        self.stats['zip_prefix'] += int((source == 2).sum())
+
+        located = []
+        for lawyer, found, (latitude, longitude) in zip(lawyers, source, coordinates.tolist()):
+            if found:
+                located.append((round(latitude, 6), round(longitude, 6)))
+                continue
+            city = CITY_CENTROIDS.get((lawyer.get('state') or '').upper(), {}).get(normalize_city(lawyer.get('city')))
+            self.stats['city' if city else 'missed'] += 1
+            located.append(city)
+        return located
+
+    def annotate(self, lawyers, batch_size=500):
+        """Generator that fills in latitude/longitude on lawyers as they pass
+        through, geocoding batch_size lawyers at a time"""
+        lawyers = iter(lawyers)
+        while True:
+            batch = list(islice(lawyers, batch_size))
+            if not batch:
+                return
+            missing = [lawyer for lawyer in batch if lawyer.get('latitude') is None or lawyer.get('longitude') is None]
+            for lawyer, coordinates in zip(missing, self.locate(missing) if missing else ()):
+                if coordinates:
+                    lawyer['latitude'], lawyer['longitude'] = coordinates
+            yield from batch
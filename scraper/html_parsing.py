@@ -0,0 +1,85 @@
+import logging
+import os
+
+from bs4 import BeautifulSoup, Tag
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Fast mode has lxml pick out the elements a page parser asks for, then only
+# builds BeautifulSoup trees for those; set FAST_PARSE=0 to always build full
+# html.parser trees
+FAST_PARSE = os.getenv('FAST_PARSE', '1').lower() not in ('0', 'false', 'no')
+
+if FAST_PARSE and not LXML_AVAILABLE:
+    logger.warning("lxml is not installed, falling back to html.parser")
+
+
+def _class_test(classes):
+    return ' or '.join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes)
+
+
+class CardStrainer:
+    """Elements named `names` carrying one of `classes` as a whole class
+    token, with their children; elements inside another match come along
+    with it rather than on their own.
+
+    lxml finds them with one XPath query, so bs4's per-tag Python callbacks
+    only run for the cards instead of for every tag of the page, as they do
+    with a SoupStrainer.
+    """
+
+    def __init__(self, names, classes):
+        names = [names] if isinstance(names, str) else list(names)
+        classes = [classes] if isinstance(classes, str) else list(classes)
+        match = f"[{' or '.join(f'self::{name}' for name in names)}][{_class_test(classes)}]"
+        self.query = f"//*{match}[not(ancestor::*{match})]"
+        self._xpath = etree.XPath(self.query) if LXML_AVAILABLE else None
+
+    def extract(self, content):
+        """The matching elements of an HTML document, serialized one after another"""
+        try:
+            document = lxml_html.document_fromstring(content)
+        except (etree.ParserError, ValueError):
+            # Empty page
+            return b''
+        return b''.join(etree.tostring(element, with_tail=False) for element in self._xpath(document))
+
+
+def strainer(names, classes):
+    """Only keep elements named `names` carrying one of `classes` (plus their children)"""
+    return CardStrainer(names, classes)
+
+
+def make_soup(content, parse_only=None):
+    """Soup of a page; with lxml, parse_only (a strainer() or a SoupStrainer)
+    limits the tree to the elements it selects"""
+    if FAST_PARSE and LXML_AVAILABLE:
+        if isinstance(parse_only, CardStrainer):
+            return BeautifulSoup(parse_only.extract(content), 'lxml')
+        return BeautifulSoup(content, 'lxml', parse_only=parse_only)
+    return BeautifulSoup(content, 'html.parser')
+
+
+def find_class(element, pattern, names=None):
+    """First tag inside element (named one of `names`, if given) with a class
+    that the compiled regex pattern finds a match in. Same result as
+    element.find(names, class_=pattern), without building a bs4 filter for
+    every lookup."""
+    if isinstance(names, str):
+        names = (names,)
+    for tag in element.descendants:
+        if not isinstance(tag, Tag) or (names and tag.name not in names):
+            continue
+        classes = tag.get('class')
+        if classes and any(pattern.search(value) for value in classes):
+            return tag
+    return None
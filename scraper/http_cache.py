@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from dotenv import load_dotenv
+
+from directory_routing import stand_in_path
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CachedResponse = namedtuple('CachedResponse', ['url', 'status_code', 'content', 'headers'])
+
+# Status returned for pages that are not cached while running offline
+OFFLINE_MISS = 504
+
+
+class HttpCache:
+    """On-disk cache of listing pages keyed by URL.
+
+    Stores each 200 response body next to its ETag / Last-Modified validators.
+    Entries younger than ttl seconds are served straight from disk; older ones
+    are revalidated with a conditional request, and a 304 reply is answered
+    from disk. In offline mode every cached entry is served regardless of age
+    and nothing goes over the network.
+
+    Fetchers call prepare() before a request and resolve() after it, so the
+    requests sessions and AsyncFetcher share one cache.
+    """
+
+    def __init__(self, directory=None, ttl=None, offline=None, enabled=None):
+        self.directory = stand_in_path(directory or os.getenv('HTTP_CACHE_DIR', '.http_cache'))
+        self.ttl = float(ttl if ttl is not None else os.getenv('HTTP_CACHE_TTL', 0))
+        if offline is None:
+            offline = os.getenv('HTTP_CACHE_OFFLINE', '0') == '1'
+        if enabled is None:
+            enabled = os.getenv('HTTP_CACHE', '1') != '0'
+        self.offline = offline
+        self.enabled = enabled or offline
+        self.stats = {'fresh': 0, 'revalidated': 0, 'stored': 0, 'misses': 0}
+        self.stats_lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def _write(self, path, data):
+        # Write to a private temp file and rename, so readers never see half a file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def lookup(self, url):
+        """Return (meta, body) for a cached URL, or None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def _save_meta(self, url, meta):
+        meta_path, _ = self._paths(url)
+        self._write(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def store(self, url, headers, body):
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': time.time(),
+        }
+        _, body_path = self._paths(url)
+        self._write(body_path, body)
+        self._save_meta(url, meta)
+        self._count('stored')
+
+    def prepare(self, url):
+        """Return (response, headers) before fetching url.
+
+        response is a CachedResponse to use instead of fetching, or None; headers
+        are the conditional request headers to send when fetching.
+        """
+        if not self.enabled:
+            return None, {}
+
+        entry = self.lookup(url)
+        if entry is None:
+            self._count('misses')
+            if self.offline:
+                logger.warning(f"Offline: {url} is not cached")
+                return CachedResponse(url, OFFLINE_MISS, b'', {}), {}
+            return None, {}
+
+        meta, body = entry
+        if self.offline or time.time() - meta['stored_at'] < self.ttl:
+            self._count('fresh')
+            return CachedResponse(url, 200, body, {}), {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return None, headers
+
+    def resolve(self, url, status, headers, body):
+        """Record a network response; returns a CachedResponse to use in place of a 304"""
+        if not self.enabled:
+            return None
+
+        if status == 304:
+            entry = self.lookup(url)
+            if entry is None:
+                return None
+            meta, cached_body = entry
+            # A 304 may carry fresher validators
+            meta['etag'] = headers.get('ETag') or meta.get('etag')
+            meta['last_modified'] = headers.get('Last-Modified') or meta.get('last_modified')
+            meta['stored_at'] = time.time()
+            self._save_meta(url, meta)
+            self._count('revalidated')
+            return CachedResponse(url, 200, cached_body, dict(headers))
+
+        if status == 200:
+            self.store(url, headers, body)
+        return None
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """Process-wide cache configured from the environment"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HttpCache()
+        return _shared_cache
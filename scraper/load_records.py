@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+import sys
+import logging
+import argparse
+
+from database import Database
+from record_io import load_into_database
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load saved scraper results into the database')
+    parser.add_argument('files', nargs='+',
+                       help='NDJSON dumps (.ndjson or .ndjson.gz) or JSON array files from older runs')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Lawyers per database batch')
+
+    args = parser.parse_args()
+
+    db = Database()
+    if not db.connect():
+        logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
+        return 1
+
+    if not db.create_lawyers_table():
+        db.close()
+        return 1
+
+    failed = 0
+    for filename in args.files:
+        logger.info(f"Loading {filename}...")
+        result = load_into_database(filename, db, batch_size=args.batch_size)
+        logger.info(f"Loaded {filename}: {result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed")
+        failed += result['failed']
+
+    db.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
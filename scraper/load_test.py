@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+import sys
+import os
+import logging
+import argparse
+import subprocess
+import tempfile
+import time
+
+from database import Database
+from directory_routing import is_local_database
+from mock_directory import add_directory_arguments, directory_from_args
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRAPER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def count_lawyers(reset=False):
+    db = Database()
+    if not db.connect() or not db.create_lawyers_table():
+        raise RuntimeError("Could not prepare the load test database")
+    try:
+        if reset:
+            with db.checkout() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("DELETE FROM lawyers")
+                connection.commit()
+        stats = db.get_statistics()
+        return stats['total_lawyers'] if stats else 0
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run main.py or run_scraper.py against the local mock directory server and report throughput',
+        epilog='Arguments after the script name go to the scraper, e.g.: '
+               'load_test.py --database-url postgresql://localhost/lawyers_load main.py --states CA TX --mode async --stream',
+    )
+    parser.add_argument('--database-url', help='Local PostgreSQL database for the run (never the DATABASE_URL in .env)')
+    parser.add_argument('--no-database', action='store_true', help='Run the scraper with --no-database')
+    parser.add_argument('--reset-database', action='store_true', help='Delete all lawyers from the load test database first')
+    parser.add_argument('--rate', type=float, default=1000.0,
+                       help='Requests per second per directory host (SCRAPER_RATE for the run, default: 1000)')
+    add_directory_arguments(parser)
+    parser.add_argument('script', choices=['main.py', 'run_scraper.py'], help='Pipeline to run')
+    parser.add_argument('scraper_args', nargs=argparse.REMAINDER, help='Arguments for the scraper')
+
+    args = parser.parse_args()
+
+    if args.no_database == bool(args.database_url):
+        parser.error('pass either --database-url with a local database or --no-database')
+    if args.database_url and not is_local_database(args.database_url):
+        parser.error('--database-url must point at a local PostgreSQL server; load tests never run against shared databases')
+
+    # Everything the scraper process reads from the environment; load_dotenv
+    # does not override variables that are already set
+    env = dict(os.environ, SCRAPER_RATE=str(args.rate), SCRAPER_BURST='1', HTTP_CACHE='0')
+    scraper_args = list(args.scraper_args)
+    if args.database_url:
+        env['DATABASE_URL'] = os.environ['DATABASE_URL'] = args.database_url
+        before = count_lawyers(reset=args.reset_database)
+    else:
+        env.pop('DATABASE_URL', None)
+        scraper_args.append('--no-database')
+        before = None
+
+    directory = directory_from_args(args)
+    base_url, stop = directory.start_background()
+    env['DIRECTORY_BASE_URL'] = base_url
+    logger.info(f"Mock directory serving on {base_url}")
+
+    # Checkpoints and logs of the run stay out of the working tree
+    with tempfile.TemporaryDirectory(prefix='lawyer_load_test_') as workdir:
+        output = os.path.join(workdir, 'lawyers.ndjson')
+        command = [sys.executable, os.path.join(SCRAPER_DIR, args.script), *scraper_args, '--output', output]
+        logger.info(f"Running {' '.join(command[1:])}")
+
+        start = time.perf_counter()
+        returncode = subprocess.run(command, cwd=workdir, env=env).returncode
+        elapsed = time.perf_counter() - start
+        stop()
+
+        records = 0
+        if os.path.exists(output):
+            with open(output, 'rb') as f:
+                records = sum(1 for line in f if line.strip())
+
+    after = count_lawyers() if args.database_url else None
+    server = directory.snapshot()
+
+    logger.info("=" * 50)
+    logger.info(f"Load test of {args.script} finished with exit code {returncode}")
+    logger.info(f"  Wall time: {elapsed:.2f}s")
+    logger.info(f"  Records: {records} ({records / elapsed:.1f} records/s)")
+    logger.info(f"  Requests: {server['requests']} ({server['requests'] / elapsed:.1f} requests/s, {server['bytes'] / 1024:.0f} KiB)")
+    logger.info(f"  Responses by status: {', '.join(f'{status}: {count}' for status, count in server['statuses'].items())}")
+    if after is not None:
+        logger.info(f"  Lawyers in database: {before} before, {after} after")
+    logger.info("=" * 50)
+    return returncode
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,17 @@ import logging
 from datetime import datetime
 from dotenv import load_dotenv
 import argparse
-import json
 
 from scraper import LawyerScraper
+from checkpoint import CheckpointStore
 from database import Database
+from dedup import DedupIndex
+from geocoder import Geocoder
+from http_cache import HttpCache
+from rate_limiter import DomainScheduler
+from parse_pool import ParsePool
+from pipeline import BackgroundWriter
+from record_io import RecordSink
 
 load_dotenv()
 
@@ -21,18 +28,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def log_database_statistics(db):
+    stats = db.get_statistics()
+    if stats:
+        logger.info("Database Statistics:")
+        logger.info(f"  Total lawyers: {stats['total_lawyers']}")
+        logger.info(f"  States covered: {stats['states_covered']}")
+        logger.info(f"  Unique firms: {stats['unique_firms']}")
+        logger.info(f"  Cities covered: {stats['cities_covered']}")
+        logger.info(f"  Last scrape: {stats['last_scrape']}")
+
+def iter_test_lawyers(scraper, sources, page_limit=2):
+    for source in sources:
+        if source == 'avvo':
+            yield from scraper.iter_avvo_lawyers('CA', page_limit=page_limit)
+        elif source == 'justia':
+            yield from scraper.iter_justia_lawyers('CA', city_limit=2)
+        elif source == 'findlaw':
+            yield from scraper.iter_findlaw_lawyers('CA', page_limit=page_limit)
+
+def load_dedup_index(states):
+    """Index the lawyers already stored for these states, so re-scraped ones update their rows"""
+    dedup = DedupIndex()
+    db = Database()
+    if db.connect():
+        try:
+            # Adds the identity_key column to tables from older versions
+            if db.create_lawyers_table():
+                dedup.load_rows(db.iter_lawyer_keys(states), identity_keyed=db.uses_identity_key())
+        finally:
+            db.close()
+    return dedup
+
+def stream_to_database(lawyers):
+    """Write lawyers to the database while they are being scraped"""
+    logger.info("Connecting to database...")
+    db = Database()
+    
+    if not db.connect_pool():
+        logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
+        return 0
+    
+    scraped = 0
+    if db.create_lawyers_table():
+        writer = BackgroundWriter(db)
+        try:
+            scraped = writer.write_all(lawyers)
+        finally:
+            result = writer.close()
+        logger.info(f"Total lawyers scraped: {scraped}")
+        logger.info(f"Database insertion complete: {result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed")
+        log_database_statistics(db)
+    
+    db.close()
+    return scraped
+
 def main():
     parser = argparse.ArgumentParser(description='Scrape divorce lawyer information across the US')
     parser.add_argument('--states', nargs='+', help='List of state codes to scrape (e.g., CA NY TX)')
     parser.add_argument('--sources', nargs='+', default=['avvo'], 
                        choices=['avvo', 'justia', 'findlaw'], 
                        help='Data sources to scrape from')
-    parser.add_argument('--save-json', action='store_true', help='Save results to JSON file')
+    parser.add_argument('--save-json', action='store_true',
+                       help='Append results to lawyers_<timestamp>.ndjson as they are scraped')
+    parser.add_argument('--output', help='Append results to this NDJSON file instead (gzip-compressed if it ends in .gz)')
     parser.add_argument('--no-database', action='store_true', help='Skip database insertion')
     parser.add_argument('--test', action='store_true', help='Test mode - scrape only one state with limited pages')
+    parser.add_argument('--mode', default='serial', choices=['serial', 'async', 'threads'],
+                       help='Fetch pages one at a time (serial), concurrently with per-host limits (async), '
+                            'or fan (state, source) units out over MAX_WORKERS threads (threads)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                       help='Parse pages in a pool of this many processes while other pages are being fetched; '
+                            'only with --mode async or threads, since serial mode waits for each parse before the next fetch')
+    parser.add_argument('--stream', action='store_true',
+                       help='Write lawyers to the database in batches while scraping instead of after the run')
+    parser.add_argument('--no-cache', action='store_true', help='Download every page in full instead of using the HTTP cache')
+    parser.add_argument('--cache-ttl', type=float,
+                       help='Serve cached pages younger than this many seconds without revalidating them')
+    parser.add_argument('--offline', action='store_true', help='Serve pages from the HTTP cache only, without any network requests')
+    parser.add_argument('--zip-file', help='ZIP centroid file (Census ZCTA gazetteer) for geocoding; defaults to ZIP_CENTROIDS_FILE')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip pages and cities finished by an interrupted run, reusing the lawyers they produced')
+    parser.add_argument('--checkpoint', default='scrape_checkpoint.ndjson', help='Journal that records finished pages and cities')
     
     args = parser.parse_args()
     
+    if args.stream and args.no_database:
+        parser.error('--stream writes to the database while scraping; it cannot be combined with --no-database')
+    if args.parse_workers and (args.mode == 'serial' or args.test):
+        parser.error('--parse-workers needs --mode async or threads; a serial crawl cannot fetch while a page is parsed')
+    
     if args.test:
         states_to_scrape = ['CA']
         logger.info("Running in TEST mode - will scrape limited data from California only")
@@ -50,37 +135,53 @@ def main():
     logger.info(f"Starting scraper for states: {', '.join(states_to_scrape)}")
     logger.info(f"Using sources: {', '.join(args.sources)}")
     
-    scraper = LawyerScraper()
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers else None
+    http_cache = HttpCache(ttl=args.cache_ttl, offline=args.offline or None, enabled=False if args.no_cache else None)
+    checkpoint = CheckpointStore(args.checkpoint, resume=args.resume)
+    scraper = LawyerScraper(parse_pool=parse_pool, http_cache=http_cache, checkpoint=checkpoint)
     
     if args.test:
-        scraper.delay = 1
-        page_limit = 2
-        logger.info("Test mode: Using 1 second delay and limiting to 2 pages per source")
-        
-        test_lawyers = []
-        for source in args.sources:
-            if source == 'avvo':
-                lawyers = scraper.scrape_avvo_lawyers('CA', page_limit=page_limit)
-                test_lawyers.extend(lawyers)
-            elif source == 'justia':
-                lawyers = scraper.scrape_justia_lawyers('CA', city_limit=2)
-                test_lawyers.extend(lawyers)
-            elif source == 'findlaw':
-                lawyers = scraper.scrape_findlaw_lawyers('CA', page_limit=page_limit)
-                test_lawyers.extend(lawyers)
-        
-        all_lawyers = test_lawyers
+        scraper.scheduler = DomainScheduler(rate=1)
+        logger.info("Test mode: Using 1 request/second per domain and limiting to 2 pages per source")
+        lawyers = iter_test_lawyers(scraper, args.sources)
     else:
-        all_lawyers = scraper.scrape_multiple_states(states_to_scrape, sources=args.sources)
+        lawyers = scraper.iter_multiple_states(states_to_scrape, sources=args.sources, mode=args.mode)
     
-    logger.info(f"Total lawyers scraped: {len(all_lawyers)}")
+    # The same attorney is often listed on several sources
+    dedup = DedupIndex() if args.no_database else load_dedup_index(states_to_scrape)
+    lawyers = dedup.filter(lawyers)
+    
+    # Coordinates for the map, from ZIP or city centroids
+    geocoder = Geocoder(args.zip_file)
+    lawyers = geocoder.annotate(lawyers)
+    
+    # Records reach the output file as they are scraped, not at the end of the run
+    sink = None
+    if args.save_json or args.output:
+        sink = RecordSink(args.output or f'lawyers_{datetime.now().strftime("%Y%m%d_%H%M%S")}.ndjson')
+        lawyers = sink.tee(lawyers)
+    
+    try:
+        if args.stream:
+            stream_to_database(lawyers)
+            all_lawyers = None
+        else:
+            all_lawyers = list(lawyers)
+    finally:
+        checkpoint.close()
+        if sink:
+            sink.close()
+        if parse_pool:
+            parse_pool.close()
     
-    if args.save_json:
-        filename = f'lawyers_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        scraper.save_to_json(all_lawyers, filename)
-        logger.info(f"Data saved to {filename}")
+    logger.info(f"Deduplication: {dedup.stats['unique']} unique, {dedup.stats['duplicates']} duplicates dropped, {dedup.stats['existing']} matched stored lawyers")
+    logger.info(f"Geocoding: {geocoder.stats['zip']} by ZIP, {geocoder.stats['zip_prefix']} by ZIP prefix, {geocoder.stats['city']} by city, {geocoder.stats['missed']} not located")
+    if http_cache.enabled:
+        logger.info(f"HTTP cache: {http_cache.stats['fresh']} fresh, {http_cache.stats['revalidated']} revalidated, {http_cache.stats['stored']} downloaded")
+    if all_lawyers is not None:
+        logger.info(f"Total lawyers scraped: {len(all_lawyers)}")
     
-    if not args.no_database:
+    if all_lawyers is not None and not args.no_database:
         logger.info("Connecting to database...")
         db = Database()
         
@@ -88,25 +189,18 @@ def main():
             logger.info("Creating lawyers table if not exists...")
             if db.create_lawyers_table():
                 logger.info("Inserting lawyers into database...")
-                inserted, failed = db.bulk_insert_lawyers(all_lawyers)
-                logger.info(f"Database insertion complete: {inserted} inserted, {failed} failed")
+                result = db.bulk_upsert_lawyers(all_lawyers)
+                logger.info(f"Database insertion complete: {result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed")
                 
-                stats = db.get_statistics()
-                if stats:
-                    logger.info("Database Statistics:")
-                    logger.info(f"  Total lawyers: {stats['total_lawyers']}")
-                    logger.info(f"  States covered: {stats['states_covered']}")
-                    logger.info(f"  Unique firms: {stats['unique_firms']}")
-                    logger.info(f"  Cities covered: {stats['cities_covered']}")
-                    logger.info(f"  Last scrape: {stats['last_scrape']}")
+                log_database_statistics(db)
             
             db.close()
         else:
             logger.error("Failed to connect to database. Please check your DATABASE_URL in .env file")
-            if all_lawyers and not args.save_json:
-                logger.info("Saving data to JSON as fallback...")
-                filename = f'lawyers_fallback_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-                scraper.save_to_json(all_lawyers, filename)
+            if all_lawyers and not sink:
+                logger.info("Saving data to NDJSON as fallback...")
+                with RecordSink(f'lawyers_fallback_{datetime.now().strftime("%Y%m%d_%H%M%S")}.ndjson') as fallback:
+                    fallback.write_all(all_lawyers)
     
     logger.info("Scraping process completed!")
 
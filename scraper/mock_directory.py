@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# Local stand-in for the lawyer directories, for load tests and end-to-end
+# runs that must not touch the real sites.
+#
+# Serves synthetic Avvo, Justia, FindLaw, Nolo, Lawyers.com and Martindale
+# pages under /<real host>/<real path>, which is where DIRECTORY_BASE_URL
+# sends the scrapers' requests (see directory_routing.py). Pages are generated
+# deterministically from the seed, so a page looks the same every time it is
+# fetched, and the same lawyers show up on several directories as they do in
+# real life. Latency, 429 and 5xx responses can be injected, and Avvo and
+# FindLaw states each use one of several pagination styles.
+import sys
+import asyncio
+import logging
+import argparse
+import math
+import random
+import re
+import threading
+import zlib
+from collections import Counter
+from html import escape
+from urllib.parse import quote
+
+from aiohttp import web
+
+from address_parser import STATE_CODES_BY_NAME, STATE_NAMES, ZIP3_RANGES
+from geocoder import CITY_CENTROIDS
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = ['Sarah', 'Michael', 'Jennifer', 'David', 'Maria', 'Robert', 'Linda', 'James', 'Patricia', 'John',
+               'José', 'Anne-Marie', 'Chen', 'Olumide', 'Siobhán', 'William', 'Karen', 'Thomas', 'Aisha', 'Daniel']
+LAST_NAMES = ['Goldberg', 'Martinez', "O'Connor", 'Nguyen', 'Smith-Jones', 'Whitfield', 'Patel', 'Kowalski', 'Johnson',
+              'García', 'McAllister', 'Van der Berg', 'Okafor', 'Hernández', 'Li', 'Brennan', 'Russo', 'Schwartz']
+FIRM_PATTERNS = ['{last} Family Law Group', 'Law Offices of {first} {last}', '{last} & Associates, LLP',
+                 '{last} Divorce Attorneys, P.C.', 'The {last} Law Firm', None]
+STREETS = ['Main St', 'Market Street', 'Broadway', 'Oak Ave', 'Elm St', 'Park Blvd', 'Washington Ave', 'Lake Dr']
+
+# How Avvo and FindLaw listings tell the scraper about further pages:
+# next: a rel="next" link on every page but the last
+# count: an "of N lawyers" total and no links
+# repeat: no hints, and pages past the end serve the last page again
+# empty: no hints, and pages past the end have no listings
+PAGINATION_STYLES = ['next', 'count', 'repeat', 'empty']
+
+NON_SLUG = re.compile(r'[^a-z0-9]+')
+
+
+def slugify(text):
+    return NON_SLUG.sub('-', text.lower()).strip('-')
+
+
+class MockDirectory:
+    def __init__(self, cities_per_state=6, lawyers_per_city=25, per_page=20, pagination='mixed',
+                 latency=0.0, jitter=0.0, throttle_rate=0.0, error_rate=0.0, seed=0):
+        self.cities_per_state = cities_per_state
+        self.lawyers_per_city = lawyers_per_city
+        self.per_page = per_page
+        self.pagination = pagination
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'bytes': 0, 'statuses': Counter(), 'hosts': Counter()}
+        self._pools = {}
+
+    # Synthetic lawyers
+
+    def cities(self, state):
+        names = [' '.join(word.capitalize() for word in city.split()) for city in CITY_CENTROIDS.get(state, {})]
+        names = names[:self.cities_per_state]
+        return names or [f'{STATE_NAMES.get(state, state)} City']
+
+    def city_lawyers(self, state, city):
+        key = (state, slugify(city))
+        if key not in self._pools:
+            rng = random.Random(f'{self.seed}:{state}:{key[1]}')
+            prefixes = [prefix for low, high, code in ZIP3_RANGES if code == state for prefix in range(low, high + 1)] or [0]
+            zip_prefix = prefixes[zlib.crc32(key[1].encode()) % len(prefixes)]
+            lawyers = []
+            for index in range(self.lawyers_per_city):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                firm = rng.choice(FIRM_PATTERNS)
+                lawyers.append({
+                    'name': f'{first} {rng.choice("ABCDEFGHJKLMNPRSTW")}. {last}',
+                    'firm': firm.format(first=first, last=last) if firm else None,
+                    'street': f'{rng.randint(1, 9999)} {rng.choice(STREETS)}' + (f', Suite {rng.randint(100, 999)}' if rng.random() < 0.3 else ''),
+                    'city': city,
+                    'state': state,
+                    'zip': f'{zip_prefix:03d}{rng.randint(1, 99):02d}',
+                    'phone': f'({rng.randint(201, 989)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}',
+                    'email': f'{slugify(first)}.{slugify(last)}{index}@example.com' if rng.random() < 0.5 else None,
+                    'website': f'https://{slugify(last)}-law-{index}.example.com/' if rng.random() < 0.6 else None,
+                    'rating': round(rng.uniform(6, 10), 1) if rng.random() < 0.8 else None,
+                    'reviews': rng.randint(1, 200) if rng.random() < 0.7 else None,
+                })
+            self._pools[key] = lawyers
+        return self._pools[key]
+
+    def state_lawyers(self, state):
+        return [lawyer for city in self.cities(state) for lawyer in self.city_lawyers(state, city)]
+
+    def find_city(self, state, city_slug):
+        for city in self.cities(state):
+            if slugify(city) == city_slug:
+                return city
+        return ' '.join(word.capitalize() for word in city_slug.split('-'))
+
+    # Markup, matching what the page parsers look for
+
+    @staticmethod
+    def address(lawyer):
+        return escape(f"{lawyer['street']}, {lawyer['city']}, {lawyer['state']} {lawyer['zip']}")
+
+    def avvo_card(self, lawyer):
+        parts = ['<div class="v-lawyer-card">',
+                 f'<span class="u-vertical-padding-half">{escape(lawyer["name"])}</span>']
+        if lawyer['firm']:
+            parts.append(f'<span class="text-muted">{escape(lawyer["firm"])}</span>')
+        parts.append(f'<span class="u-margin-right-half">{self.address(lawyer)}</span>')
+        parts.append(f'<span class="overridable-lawyer-phone-copy">{lawyer["phone"]}</span>')
+        if lawyer['rating'] is not None:
+            parts.append(f'<span class="nv-rating">{lawyer["rating"]}</span>')
+        if lawyer['reviews'] is not None:
+            parts.append(f'<span class="u-nowrap">{lawyer["reviews"]} reviews</span>')
+        parts.append('<div class="u-margin-bottom-half">Divorce, Child Custody, Family Law</div></div>')
+        return ''.join(parts)
+
+    def justia_block(self, lawyer):
+        parts = ['<div class="lawyer">', f'<strong class="lawyer-name">{escape(lawyer["name"])}</strong>']
+        if lawyer['firm']:
+            parts.append(f'<span class="lawyer-firm">{escape(lawyer["firm"])}</span>')
+        parts.append(f'<span class="lawyer-address">{self.address(lawyer)}</span>')
+        parts.append(f'<span class="lawyer-phone">Call {lawyer["phone"]}</span>')
+        if lawyer['website']:
+            parts.append(f'<a class="lawyer-website" href="{lawyer["website"]}">Website</a>')
+        parts.append('</div>')
+        return ''.join(parts)
+
+    def findlaw_listing(self, lawyer):
+        parts = ['<div class="listing">', f'<h3 class="lawyer-name">{escape(lawyer["name"])}</h3>']
+        if lawyer['firm']:
+            parts.append(f'<p class="law-firm">{escape(lawyer["firm"])}</p>')
+        parts.append(f'<p class="address">{self.address(lawyer)}</p>')
+        parts.append(f'<a class="phone-link" href="tel:">{lawyer["phone"]}</a>')
+        if lawyer['website']:
+            parts.append(f'<a class="website-link" href="{lawyer["website"]}">Visit Website</a>')
+        parts.append('</div>')
+        return ''.join(parts)
+
+    def nolo_card(self, lawyer):
+        parts = ['<div class="lawyer-listing">', f'<h3 class="lawyer-name">{escape(lawyer["name"])}</h3>']
+        if lawyer['firm']:
+            parts.append(f'<div class="firm">{escape(lawyer["firm"])}</div>')
+        parts.append(f'<div class="address">{self.address(lawyer)}</div>')
+        parts.append(f'<span class="phone">{lawyer["phone"]}</span></div>')
+        return ''.join(parts)
+
+    def lawyers_com_card(self, lawyer):
+        parts = ['<div class="lawyer-info">', f'<h2 class="lawyer-name">{escape(lawyer["name"])}</h2>']
+        if lawyer['firm']:
+            parts.append(f'<div class="firm">{escape(lawyer["firm"])}</div>')
+        parts.append(f'<p class="address">{self.address(lawyer)}</p>')
+        parts.append(f'<div class="contact">{lawyer["phone"]} {lawyer["email"] or ""}</div></div>')
+        return ''.join(parts)
+
+    def martindale_card(self, lawyer):
+        parts = ['<article class="lawyer">', f'<h3 class="attorney-name">{escape(lawyer["name"])}</h3>']
+        if lawyer['firm']:
+            parts.append(f'<div class="firm-name">{escape(lawyer["firm"])}</div>')
+        parts.append(f'<div class="contact">{lawyer["phone"]} {lawyer["email"] or ""}</div></article>')
+        return ''.join(parts)
+
+    @staticmethod
+    def page(title, body):
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{escape(title)}</title></head>'
+                f'<body><header><nav><a href="/">Home</a></nav></header><main><h1>{escape(title)}</h1>{body}</main>'
+                '<footer>Synthetic directory for load testing</footer></body></html>')
+
+    def listing_page(self, source, state, lawyers, page, page_url, render):
+        """One page of a paginated state listing, in the state's pagination style"""
+        if self.pagination == 'mixed':
+            style = PAGINATION_STYLES[zlib.crc32(f'{source}:{state}'.encode()) % len(PAGINATION_STYLES)]
+        else:
+            style = self.pagination
+        last_page = max(1, math.ceil(len(lawyers) / self.per_page))
+        if page > last_page and style == 'repeat':
+            page = last_page
+        shown = lawyers[(page - 1) * self.per_page:page * self.per_page]
+
+        body = [f'<section class="results">{"".join(render(lawyer) for lawyer in shown)}</section>']
+        if not shown:
+            body.append('<p class="no-results">No lawyers match your search.</p>')
+        if style == 'count' and shown:
+            first = (page - 1) * self.per_page + 1
+            body.append(f'<p class="result-count">Showing {first}-{first + len(shown) - 1} of {len(lawyers)} lawyers</p>')
+        if style == 'next' and page < last_page:
+            body.append(f'<nav class="pagination"><a class="pagination-next" rel="next" href="{page_url(page + 1)}">Next</a></nav>')
+        return self.page(f'{STATE_NAMES.get(state, state)} Divorce Lawyers', ''.join(body))
+
+    # Request handling
+
+    def route(self, host, path, query):
+        """HTML for a directory page, or None for an unknown one"""
+        segments = [segment for segment in path.split('/') if segment]
+        page = int(query.get('page', 1)) if query.get('page', '1').isdigit() else 1
+
+        if host == 'www.avvo.com' and len(segments) == 2 and segments[0] == 'divorce-separation-lawyers' and segments[1].endswith('.html'):
+            state_segment = segments[1][:-len('.html')]
+            state = state_segment.upper()
+            page_url = lambda number: f'/divorce-separation-lawyers/{state_segment}.html?page={number}'
+            return self.listing_page('avvo', state, self.state_lawyers(state), page, page_url, self.avvo_card)
+
+        if host == 'lawyers.justia.com' and segments[:2] == ['family-law', 'divorce'] and len(segments) in (3, 4):
+            state = segments[2].upper()
+            if len(segments) == 3:
+                links = ''.join(f'<li><a href="/family-law/divorce/{segments[2]}/{slugify(city)}">{escape(city)}</a></li>'
+                                for city in self.cities(state))
+                return self.page(f'{STATE_NAMES.get(state, state)} Divorce Lawyers', f'<ul class="cities">{links}</ul>')
+            city = self.find_city(state, segments[3])
+            blocks = ''.join(self.justia_block(lawyer) for lawyer in self.city_lawyers(state, city))
+            return self.page(f'{city} Divorce Lawyers', blocks)
+
+        if host == 'lawyers.findlaw.com' and len(segments) == 2 and segments[1] == 'divorce-lawyers.html':
+            state = STATE_CODES_BY_NAME.get(segments[0].replace('-', ' '))
+            if state:
+                page_url = lambda number: f'/{segments[0]}/divorce-lawyers.html?page={number}'
+                return self.listing_page('findlaw', state, self.state_lawyers(state), page, page_url, self.findlaw_listing)
+
+        if host == 'www.nolo.com' and segments[:2] == ['lawyers', 'divorce-child-custody-support'] and len(segments) in (3, 4):
+            return self.city_page(segments[2].upper(), segments[3] if len(segments) == 4 else None, self.nolo_card)
+
+        if host == 'www.lawyers.com' and segments[:3] == ['find-a-lawyer', 'practice', 'divorce-separation.html'] and len(segments) in (4, 5):
+            return self.city_page(segments[3].upper(), slugify(segments[4]) if len(segments) == 5 else None, self.lawyers_com_card)
+
+        if host == 'www.martindale.com' and segments[:2] == ['by-location', 'divorce-lawyers'] and len(segments) == 3 \
+                and segments[2].endswith('-attorneys'):
+            location = segments[2][:-len('-attorneys')]
+            city_slug, _, state_segment = location.rpartition('-')
+            return self.city_page(state_segment.upper(), city_slug or None, self.martindale_card)
+
+        return None
+
+    def city_page(self, state, city_slug, render):
+        if city_slug:
+            city = self.find_city(state, city_slug)
+            lawyers = self.city_lawyers(state, city)
+        else:
+            city = STATE_NAMES.get(state, state)
+            lawyers = self.state_lawyers(state)[:self.per_page]
+        return self.page(f'{city} Divorce Lawyers', ''.join(render(lawyer) for lawyer in lawyers))
+
+    async def handle(self, request):
+        if request.path == '/_stats':
+            return web.json_response(self.snapshot())
+
+        host, _, path = request.path.lstrip('/').partition('/')
+        self.stats['requests'] += 1
+        self.stats['hosts'][host] += 1
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = self.random.random()
+        if roll < self.throttle_rate:
+            response = web.Response(status=429, text='Too Many Requests', headers={'Retry-After': '1'})
+        elif roll < self.throttle_rate + self.error_rate:
+            response = web.Response(status=self.random.choice([500, 502, 503]), text='Server Error')
+        else:
+            html = self.route(host, '/' + path, request.query)
+            if html is None:
+                response = web.Response(status=404, text='Not Found')
+            else:
+                response = web.Response(text=html, content_type='text/html')
+
+        self.stats['statuses'][response.status] += 1
+        self.stats['bytes'] += len(response.body or b'')
+        return response
+
+    def snapshot(self):
+        return {
+            'requests': self.stats['requests'],
+            'bytes': self.stats['bytes'],
+            'statuses': {str(status): count for status, count in sorted(self.stats['statuses'].items())},
+            'hosts': dict(self.stats['hosts']),
+        }
+
+    def app(self):
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', self.handle)
+        return app
+
+    def start_background(self, host='127.0.0.1', port=0):
+        """Serve on a daemon thread; returns (base_url, stop)"""
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(self.app(), access_log=None)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, host, port)
+        loop.run_until_complete(site.start())
+        bound_host, bound_port = runner.addresses[0][:2]
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+
+        return f'http://{quote(bound_host)}:{bound_port}', stop
+
+
+def add_directory_arguments(parser):
+    parser.add_argument('--cities', type=int, default=6, help='Cities per state (default: 6)')
+    parser.add_argument('--lawyers-per-city', type=int, default=25, help='Lawyers listed per city (default: 25)')
+    parser.add_argument('--per-page', type=int, default=20, help='Listings per Avvo/FindLaw page (default: 20)')
+    parser.add_argument('--pagination', default='mixed', choices=['mixed'] + PAGINATION_STYLES,
+                       help='Pagination style of Avvo/FindLaw listings; mixed picks one per state (default)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra random seconds per response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500, 502 or 503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated lawyers and injected faults')
+
+
+def directory_from_args(args):
+    return MockDirectory(
+        cities_per_state=args.cities, lawyers_per_city=args.lawyers_per_city, per_page=args.per_page,
+        pagination=args.pagination, latency=args.latency, jitter=args.jitter,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, seed=args.seed,
+    )
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Serve synthetic directory pages for local end-to-end runs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_directory_arguments(parser)
+
+    args = parser.parse_args()
+
+    logger.info(f"Set DIRECTORY_BASE_URL=http://{args.host}:{args.port} to scrape this server; GET /_stats for request counts")
+    web.run_app(directory_from_args(args).app(), host=args.host, port=args.port, print=None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
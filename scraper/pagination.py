@@ -0,0 +1,150 @@
+import logging
+import os
+import re
+from urllib.parse import urljoin
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Pagination hints are read straight from the raw page bytes, so they cost a
+# regex scan rather than a second parse (and work when parsing happens in the
+# process pool)
+LINK_TAG = re.compile(rb'<(?:a|link)\b[^>]*>', re.I)
+
+
+def _token_attribute(name):
+    """Matches attribute `name` whose value has "next" as a whole token, so
+    class="next-day" or rel="nextpage" are not mistaken for next links"""
+    return re.compile(
+        rb'(?<![\w-])' + name + rb'\s*=\s*(?:'
+        rb'"(?:[^"]*\s)?next(?:\s[^"]*)?"'
+        rb"|'(?:[^']*\s)?next(?:\s[^']*)?'"
+        rb'|next(?=[\s/>]))',
+        re.I,
+    )
+
+
+REL_NEXT = _token_attribute(rb'rel')
+CLASS_NEXT = _token_attribute(rb'class')
+HREF = re.compile(rb'\bhref\s*=\s*["\']([^"\']+)["\']', re.I)
+RESULT_COUNT = re.compile(rb'\bof\s+(\d[\d,]*)\s+(?:results|lawyers|attorneys|listings)\b', re.I)
+
+
+def find_next_url(content, url):
+    """Absolute URL of the page's rel="next" link, or else of its first
+    class="next" link, or None"""
+    fallback = None
+    for match in LINK_TAG.finditer(content):
+        tag = match.group()
+        if b'next' not in tag.lower():
+            continue
+        rel = REL_NEXT.search(tag)
+        if not rel and (fallback is not None or not CLASS_NEXT.search(tag)):
+            continue
+        href = HREF.search(tag)
+        if not href or href.group(1).startswith(b'#'):
+            continue
+        next_url = urljoin(url, href.group(1).decode('utf-8', 'replace').replace('&amp;', '&'))
+        if rel:
+            return next_url
+        fallback = next_url
+    return fallback
+
+
+def find_result_count(content):
+    """Total listing count from text such as "1-10 of 1,234 results", or None"""
+    match = RESULT_COUNT.search(content)
+    return int(match.group(1).replace(b',', b'')) if match else None
+
+
+def page_hints(content, url):
+    """What a listing page says about the pages after it: its next link and
+    the total result count. Checkpoints keep them, so a resumed walk takes
+    the same path as the original one."""
+    return {'next_url': find_next_url(content, url), 'total': find_result_count(content)}
+
+
+class Paginator:
+    """Walk a directory's listing pages until the listings run out.
+
+    Follows the page's own next link when it has one, falls back to the
+    result count and then to numbered pages, and stops on a failed, empty or
+    repeated page (directories often serve their last page again for
+    out-of-range page numbers). max_pages (MAX_PAGES, default 50) caps deep
+    crawls of big states.
+
+    Loop over pages() and call advance() after every page that was fetched
+    and parsed; a page without advance() ends the walk.
+    """
+
+    def __init__(self, page_url, max_pages=None, label='listing'):
+        self.page_url = page_url
+        self.max_pages = max_pages or int(os.getenv('MAX_PAGES', 50))
+        self.label = label
+        self.page = 1
+        self.url = page_url(1)
+        self.visited = {self.url}
+        self.previous = None
+        self.per_page = None
+        self.total = None
+        self.saw_next_link = False
+
+    def pages(self):
+        while self.url is not None:
+            url, self.url = self.url, None
+            yield self.page, url
+
+    def _stop(self, reason):
+        logger.info(f"{self.label}: stopping after page {self.page} ({reason})")
+
+    def advance(self, lawyers, content=None, url=None, hints=None):
+        """Record a parsed page and queue the next one, if there is one.
+
+        The page's page_hints() are read from its content, or passed as hints
+        for a page restored from a checkpoint. Returns False for a page that
+        repeats the previous one, whose lawyers should not be used again.
+        """
+        if not lawyers:
+            self._stop('no listings')
+            return True
+
+        fingerprint = frozenset((lawyer.get('lawyer_name'), lawyer.get('firm_name')) for lawyer in lawyers)
+        if fingerprint == self.previous:
+            self._stop('page repeats the previous one')
+            return False
+        self.previous = fingerprint
+
+        if self.per_page is None:
+            self.per_page = len(lawyers)
+
+        if hints is None and content:
+            hints = page_hints(content, url or self.page_url(self.page))
+        next_url = None
+        if hints:
+            next_url = hints.get('next_url')
+            if self.total is None:
+                self.total = hints.get('total')
+
+        if self.page >= self.max_pages:
+            self._stop(f'reached the {self.max_pages} page limit')
+        elif next_url:
+            self.saw_next_link = True
+            self._queue(next_url)
+        elif self.saw_next_link:
+            self._stop('no next link')
+        elif self.total is not None and self.page * self.per_page >= self.total:
+            self._stop(f'all {self.total} results seen')
+        else:
+            self._queue(self.page_url(self.page + 1))
+        return True
+
+    def _queue(self, next_url):
+        if next_url in self.visited:
+            self._stop('next link was already visited')
+            return
+        self.visited.add(next_url)
+        self.page += 1
+        self.url = next_url
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Typed schema of the exported files; state is the partition key and lives in
+# the directory name (state=CA/), as pyarrow and pandas expect
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('lawyer_name', pa.string()),
+    ('firm_name', pa.string()),
+    ('office_address', pa.string()),
+    ('city', pa.string()),
+    ('zip_code', pa.string()),
+    ('phone_number', pa.string()),
+    ('website', pa.string()),
+    ('email', pa.string()),
+    ('practice_areas', pa.string()),
+    ('bar_admission', pa.string()),
+    ('years_experience', pa.int32()),
+    ('rating', pa.float64()),
+    ('review_count', pa.int32()),
+    ('source_url', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('scraped_at', pa.timestamp('us')),
+    ('updated_at', pa.timestamp('us')),
+])
+
+DECIMAL_COLUMNS = [field.name for field in SCHEMA if pa.types.is_floating(field.type)]
+
+MANIFEST = '_manifest.json'
+
+
+def partition_path(directory, state):
+    return os.path.join(directory, f'state={state}', 'lawyers.parquet')
+
+
+def _record_batch(rows):
+    for row in rows:
+        for column in DECIMAL_COLUMNS:
+            if isinstance(row[column], Decimal):
+                row[column] = float(row[column])
+    return pa.RecordBatch.from_pylist(rows, schema=SCHEMA)
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def export_state(db, directory, state, chunk_size=10000):
+    """Write one state's partition, streaming chunk_size rows at a time.
+    The file is written beside the old one and swapped in only once the
+    stream has ended normally; if reading fails part way, the error is
+    raised, the partial file is removed and the old partition stays."""
+    path = partition_path(directory, state)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    rows = 0
+    chunk = []
+    try:
+        with pq.ParquetWriter(path + '.tmp', SCHEMA) as writer:
+            for lawyer in db.iter_lawyers([state], columns=SCHEMA.names, batch_size=chunk_size):
+                chunk.append(dict(lawyer))
+                if len(chunk) >= chunk_size:
+                    writer.write_batch(_record_batch(chunk))
+                    rows += len(chunk)
+                    chunk = []
+            if chunk:
+                writer.write_batch(_record_batch(chunk))
+                rows += len(chunk)
+    except BaseException:
+        if os.path.exists(path + '.tmp'):
+            os.remove(path + '.tmp')
+        raise
+    os.replace(path + '.tmp', path)
+    return rows
+
+
+def export_lawyers(db, directory, incremental=False, states=None, chunk_size=10000):
+    """Export lawyers to Parquet under directory, one partition per state.
+
+    A database error aborts the export before the manifest is written, so
+    the next run still starts from the previous watermark.
+
+    With incremental, only states whose lawyers were inserted or updated
+    since the previous export, or whose lawyer count changed (deletions),
+    are rewritten; partitions of states that no longer have lawyers are
+    removed. Lawyers without a state are not exported.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = _load_manifest(directory)
+    if incremental and manifest is None:
+        logger.info(f"No previous export in {directory}; exporting everything")
+
+    # Taken before reading, so changes made during the export are picked up next time
+    watermark = db.get_change_watermark()
+    state_counts = db.get_state_counts()
+    if state_counts is None:
+        raise RuntimeError("Could not read lawyer counts per state")
+    counts = {row['state']: row['lawyers'] for row in state_counts}
+    exported = (manifest or {}).get('states', {})
+
+    if incremental and manifest is not None:
+        known_counts = {state: entry['rows'] for state, entry in exported.items()}
+        changed = db.get_states_changed_since(datetime.fromisoformat(manifest['watermark']), known_counts)
+        if changed is None:
+            raise RuntimeError("Could not determine which states changed")
+        targets = sorted(state for state in changed if state in counts)
+    else:
+        targets = sorted(counts)
+    if states:
+        targets = [state for state in targets if state in states]
+
+    stats = {'states': 0, 'rows': 0, 'removed': 0}
+    for state in targets:
+        rows = export_state(db, directory, state, chunk_size=chunk_size)
+        exported[state] = {'rows': rows, 'exported_at': datetime.now().isoformat(timespec='seconds')}
+        stats['states'] += 1
+        stats['rows'] += rows
+        logger.info(f"Exported {rows} lawyers for {state}")
+
+    if not states:
+        for state in [state for state in exported if state not in counts]:
+            shutil.rmtree(os.path.dirname(partition_path(directory, state)), ignore_errors=True)
+            del exported[state]
+            stats['removed'] += 1
+            logger.info(f"Removed partition for {state}: no lawyers left")
+
+    # A partial (states=...) export cannot vouch for the other states, so it
+    # keeps the previous watermark
+    if manifest is None or not states:
+        watermark_value = watermark.isoformat()
+    else:
+        watermark_value = manifest['watermark']
+    _save_manifest(directory, {'watermark': watermark_value, 'states': exported})
+    return stats
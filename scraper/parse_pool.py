@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Which scraper module owns the page parser for each source
+PARSER_MODULES = {
+    'avvo': 'scraper',
+    'justia_state': 'scraper',
+    'justia': 'scraper',
+    'findlaw': 'scraper',
+    'nolo': 'alternative_scraper',
+    'lawyers_com': 'alternative_scraper',
+    'martindale': 'alternative_scraper',
+}
+
+# Parse-only scraper instances, created once per worker process
+_parsers = {}
+
+
+def _parser_for(source):
+    module_name = PARSER_MODULES[source]
+    if module_name not in _parsers:
+        if module_name == 'scraper':
+            from scraper import LawyerScraper
+            _parsers[module_name] = LawyerScraper()
+        else:
+            from alternative_scraper import AlternativeLawyerScraper
+            _parsers[module_name] = AlternativeLawyerScraper()
+    return _parsers[module_name]
+
+
+def parse_page(source, content, url, *args):
+    """Parse raw page bytes into lawyer records inside a worker process"""
+    return _parser_for(source).parse_page(source, content, url, *args)
+
+
+class ParsePool:
+    """Process pool that turns raw page bytes into lawyer records, so HTML
+    parsing runs on every core instead of competing with fetch threads for
+    the GIL.
+
+    parse() blocks its caller until the page is parsed, so the pool only pays
+    off when other threads or coroutines keep fetching meanwhile (main.py
+    --mode threads or async); a serial crawl would just add pickling and IPC.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv('PARSE_WORKERS', os.cpu_count() or 1))
+        # spawn, not fork: the pool is started from fetch threads and event loops
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        logger.info(f"Started parse pool with {self.workers} worker processes")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, source, content, url, *args):
+        return self.executor.submit(parse_page, source, content, url, *args)
+
+    def parse(self, source, content, url, *args):
+        return self.submit(source, content, url, *args).result()
+
+    async def parse_async(self, source, content, url, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, parse_page, source, content, url, *args)
+
+    def close(self):
+        self.executor.shutdown()
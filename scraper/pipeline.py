@@ -0,0 +1,111 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Drain scraped records from a bounded queue into the database in batches.
+
+    put() blocks while the queue is full, so memory stays flat and a slow
+    database pauses the crawl instead of buffering it. Writes overlap with
+    fetching because they happen on separate threads.
+
+    If a write raises, the writers keep draining the queue (counting what
+    they drop as failed) so producers never block on them, and the error is
+    raised again from the next put(), write_all() or close().
+    """
+
+    def __init__(self, db, batch_size=None, queue_size=None, writers=1, flush_interval=5.0):
+        self.db = db
+        self.batch_size = batch_size or int(os.getenv('WRITER_BATCH_SIZE', 500))
+        self.queue = queue.Queue(maxsize=queue_size or self.batch_size * 4)
+        self.flush_interval = flush_interval
+        self.stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        self.stats_lock = threading.Lock()
+        self.error = None
+        self.threads = [
+            threading.Thread(target=self._run, name=f'db-writer-{index}', daemon=True)
+            for index in range(writers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def put(self, record):
+        self._raise_error()
+        self.queue.put(record)
+
+    def write_all(self, records):
+        count = 0
+        for record in records:
+            self.put(record)
+            count += 1
+        return count
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                record = self.queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._flush(batch)
+                return
+
+            if record is not None:
+                batch.append(record)
+
+            # Flush full batches, and partial ones once they have waited long enough
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        result = {'failed': len(batch)}
+        if self.error is None:
+            try:
+                result = self.db.bulk_upsert_lawyers(batch, batch_size=len(batch))
+            except Exception as e:
+                logger.error(f"Database writer failed, dropping the remaining records: {e}")
+                with self.stats_lock:
+                    self.error = self.error or e
+        with self.stats_lock:
+            for key, value in result.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+
+    def close(self):
+        """Flush what is queued, stop the writer threads and return the
+        totals; raises the error that stopped the writers, if any"""
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self._raise_error()
+        return self.stats
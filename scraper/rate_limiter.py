@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations instead of blocking"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class DomainScheduler:
+    """Per-domain politeness: each host gets its own token bucket, so requests
+    to different directories interleave freely while every host sees at most
+    `rate` requests per second (plus `burst`)."""
+
+    def __init__(self, rate=None, burst=None, domain_rates=None):
+        if rate is None:
+            rate = os.getenv('SCRAPER_RATE')
+            rate = float(rate) if rate else 1.0 / float(os.getenv('SCRAPER_DELAY', 2))
+        self.rate = float(rate)
+        self.burst = int(burst or os.getenv('SCRAPER_BURST', 1))
+        # Overrides for individual hosts, e.g. {'www.avvo.com': (0.25, 1)}
+        self.domain_rates = dict(domain_rates or {})
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        domain = urlparse(url).netloc.lower()
+        with self.lock:
+            if domain not in self.buckets:
+                rate, burst = self.domain_rates.get(domain, (self.rate, self.burst))
+                self.buckets[domain] = TokenBucket(rate, burst)
+            return self.buckets[domain]
+
+    def wait(self, url):
+        delay = self.bucket(url).reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        delay = self.bucket(url).reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler():
+    """Process-wide scheduler so every scraper instance shares the same per-host budget"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = DomainScheduler()
+            logger.info(f"Politeness scheduler: {_shared_scheduler.rate:.2f} req/s per domain, burst {_shared_scheduler.burst}")
+        return _shared_scheduler
@@ -0,0 +1,153 @@
+import gzip
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+CHUNK_SIZE = 64 * 1024
+
+
+def _is_gzip(path):
+    with open(path, 'rb') as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def _open_text(path, mode):
+    if 'r' in mode:
+        compressed = _is_gzip(path)
+    else:
+        compressed = str(path).endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class RecordSink:
+    """Append lawyers to a newline-delimited JSON file as they are scraped.
+
+    Paths ending in .gz are gzip-compressed. The file is opened in append mode,
+    so a re-opened sink keeps what an earlier run wrote (gzip simply adds a
+    member, which readers decompress transparently).
+    """
+
+    def __init__(self, path, flush_every=100):
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        self.file = _open_text(path, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self.file.write('\n')
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def tee(self, records):
+        """Write records to the file while passing them on to the caller"""
+        for record in records:
+            self.write(record)
+            yield record
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            logger.info(f"Saved {self.count} lawyers to {self.path}")
+
+
+def _iter_json_array(f):
+    """Decode the objects of a top-level JSON array one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('expected a JSON array')
+    pos = 1
+    eof = False
+
+    while True:
+        # Skip the separators between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            record = None
+
+        if record is None:
+            # The element runs past the buffer: read more and try again
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            if eof and not buffer.strip():
+                raise ValueError('unterminated JSON array')
+            continue
+
+        yield record
+        pos = end
+
+
+class _Prefixed:
+    """File-like wrapper that replays characters already read from f"""
+
+    def __init__(self, prefix, f):
+        self.prefix = prefix
+        self.f = f
+
+    def read(self, size):
+        if self.prefix:
+            data, self.prefix = self.prefix, ''
+            return data + self.f.read(size - len(data))
+        return self.f.read(size)
+
+    def lines(self):
+        first = self.prefix + self.f.readline()
+        self.prefix = ''
+        if first:
+            yield first
+        yield from self.f
+
+
+def iter_records(path):
+    """Yield the lawyers in a dump without loading the whole file.
+
+    Reads NDJSON (optionally gzipped) as well as the older files written with
+    json.dump(lawyers, indent=2), which hold a single JSON array.
+    """
+    with _open_text(path, 'r') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if not first:
+            return
+        if first == '[':
+            # Hand the bracket back to the array reader
+            yield from _iter_json_array(_Prefixed(first, f))
+            return
+
+        for line in _Prefixed(first, f).lines():
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_into_database(path, db, batch_size=1000):
+    """Stream a dump into the lawyers table in batches"""
+    return db.bulk_upsert_lawyers(iter_records(path), batch_size=batch_size)
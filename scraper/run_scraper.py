@@ -5,10 +5,15 @@ import logging
 from datetime import datetime
 from dotenv import load_dotenv
 import argparse
-import json
 
 from alternative_scraper import AlternativeLawyerScraper
+from checkpoint import CheckpointStore
 from database import Database
+from dedup import DedupIndex
+from geocoder import Geocoder
+from http_cache import HttpCache
+from pipeline import BackgroundWriter
+from record_io import RecordSink
 
 load_dotenv()
 
@@ -18,15 +23,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def load_dedup_index(states):
+    """Index the lawyers already stored for these states, so re-scraped ones update their rows"""
+    dedup = DedupIndex()
+    db = Database()
+    if db.connect():
+        try:
+            # Adds the identity_key column to tables from older versions
+            if db.create_lawyers_table():
+                dedup.load_rows(db.iter_lawyer_keys(states), identity_keyed=db.uses_identity_key())
+        finally:
+            db.close()
+    return dedup
+
 def main():
     parser = argparse.ArgumentParser(description='Alternative divorce lawyer scraper')
     parser.add_argument('--states', nargs='+', help='List of state codes to scrape (e.g., CA NY TX)')
     parser.add_argument('--test', action='store_true', help='Test mode - scrape only one state')
-    parser.add_argument('--save-json', action='store_true', help='Save results to JSON file')
+    parser.add_argument('--save-json', action='store_true', help='Keep the NDJSON results file even when nothing was found')
+    parser.add_argument('--output', help='Append results to this NDJSON file (gzip-compressed if it ends in .gz)')
     parser.add_argument('--no-database', action='store_true', help='Skip database insertion')
+    parser.add_argument('--stream', action='store_true',
+                       help='Write lawyers to the database in batches while scraping instead of after the run')
+    parser.add_argument('--no-cache', action='store_true', help='Download every page in full instead of using the HTTP cache')
+    parser.add_argument('--cache-ttl', type=float,
+                       help='Serve cached pages younger than this many seconds without revalidating them')
+    parser.add_argument('--offline', action='store_true', help='Serve pages from the HTTP cache only, without any network requests')
+    parser.add_argument('--zip-file', help='ZIP centroid file (Census ZCTA gazetteer) for geocoding; defaults to ZIP_CENTROIDS_FILE')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip pages and cities finished by an interrupted run, reusing the lawyers they produced')
+    parser.add_argument('--checkpoint', default='alternative_checkpoint.ndjson', help='Journal that records finished pages and cities')
     
     args = parser.parse_args()
     
+    if args.stream and args.no_database:
+        parser.error('--stream writes to the database while scraping; it cannot be combined with --no-database')
+    
     # Determine which states to scrape
     if args.test:
         states_to_scrape = ['CA']
@@ -40,35 +72,76 @@ def main():
     logger.info(f"Starting alternative scraper for states: {', '.join(states_to_scrape)}")
     
     # Initialize scraper
-    scraper = AlternativeLawyerScraper()
+    http_cache = HttpCache(ttl=args.cache_ttl, offline=args.offline or None, enabled=False if args.no_cache else None)
+    checkpoint = CheckpointStore(args.checkpoint, resume=args.resume)
+    scraper = AlternativeLawyerScraper(http_cache=http_cache, checkpoint=checkpoint)
+    
+    # One index for the whole run, so lawyers seen in another state or already stored are not added twice
+    dedup = DedupIndex() if args.no_database else load_dedup_index(states_to_scrape)
+    geocoder = Geocoder(args.zip_file)
+    
+    # Scrape all states, handing each lawyer to the database writer as it arrives when streaming
+    db = None
+    writer = None
+    if args.stream:
+        logger.info("Connecting to Railway database...")
+        db = Database()
+        if not db.connect_pool() or not db.create_lawyers_table():
+            logger.error("Failed to connect to database")
+            return 1
+        writer = BackgroundWriter(db)
+    
+    # Results reach disk as they are scraped, not at the end of the run
+    filename = args.output or f'lawyers_{datetime.now().strftime("%Y%m%d_%H%M%S")}.ndjson'
+    sink = RecordSink(filename)
     
-    # Scrape all states
-    all_lawyers = []
-    for state in states_to_scrape:
-        logger.info(f"Processing state: {state}")
-        state_lawyers = scraper.scrape_state_with_multiple_sources(state)
-        all_lawyers.extend(state_lawyers)
-        logger.info(f"Completed {state}: {len(state_lawyers)} lawyers found")
+    # Only the bulk upsert at the end needs the lawyers kept; streamed ones are already with the writer
+    all_lawyers = None if writer or args.no_database else []
+    total = 0
+    try:
+        for state in states_to_scrape:
+            logger.info(f"Processing state: {state}")
+            found = 0
+            for lawyer in geocoder.annotate(scraper.iter_state_with_multiple_sources(state, dedup=dedup)):
+                sink.write(lawyer)
+                if writer:
+                    writer.put(lawyer)
+                elif all_lawyers is not None:
+                    all_lawyers.append(lawyer)
+                found += 1
+            total += found
+            logger.info(f"Completed {state}: {found} lawyers found")
+    finally:
+        checkpoint.close()
+        sink.close()
+        # Raises if the database writer failed
+        if writer:
+            result = writer.close()
+            logger.info(f"Database insertion complete: {result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed")
     
-    logger.info(f"Total lawyers scraped: {len(all_lawyers)}")
+    logger.info(f"Deduplication: {dedup.stats['unique']} unique, {dedup.stats['duplicates']} duplicates dropped, {dedup.stats['existing']} matched stored lawyers")
+    logger.info(f"Geocoding: {geocoder.stats['zip']} by ZIP, {geocoder.stats['zip_prefix']} by ZIP prefix, {geocoder.stats['city']} by city, {geocoder.stats['missed']} not located")
+    if http_cache.enabled:
+        logger.info(f"HTTP cache: {http_cache.stats['fresh']} fresh, {http_cache.stats['revalidated']} revalidated, {http_cache.stats['stored']} downloaded")
+    logger.info(f"Total lawyers scraped: {total}")
     
-    # Save to JSON if requested
-    if args.save_json or len(all_lawyers) > 0:
-        filename = f'lawyers_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(all_lawyers, f, indent=2, ensure_ascii=False)
-        logger.info(f"Data saved to {filename}")
+    # Drop the empty results file unless it was asked for
+    if not total and not args.save_json and not args.output:
+        os.remove(filename)
     
     # Insert into database
-    if not args.no_database and len(all_lawyers) > 0:
-        logger.info("Connecting to Railway database...")
-        db = Database()
+    if not args.no_database and total > 0:
+        if not db:
+            logger.info("Connecting to Railway database...")
+            db = Database()
+            if db.connect():
+                logger.info("Inserting lawyers into database...")
+                result = db.bulk_upsert_lawyers(all_lawyers)
+                logger.info(f"Database insertion complete: {result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed")
+            else:
+                db = None
         
-        if db.connect():
-            logger.info("Inserting lawyers into database...")
-            inserted, failed = db.bulk_insert_lawyers(all_lawyers)
-            logger.info(f"Database insertion complete: {inserted} inserted, {failed} failed")
-            
+        if db:
             # Get statistics
             stats = db.get_statistics()
             if stats:
@@ -84,9 +157,11 @@ def main():
             db.close()
         else:
             logger.error("Failed to connect to database")
+    elif db:
+        db.close()
     
     logger.info("Scraping process completed!")
-    return 0 if len(all_lawyers) > 0 else 1
+    return 0 if total > 0 else 1
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -1,108 +1,151 @@
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-import time
+from bs4 import SoupStrainer
 import re
 import logging
 from fake_useragent import UserAgent
 from urllib.parse import urljoin, urlparse
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+from itertools import islice
 import os
+import queue
+import threading
 from dotenv import load_dotenv
 
+from address_parser import get_state_name, parse_address
+from async_fetcher import AsyncFetcher
+from contact_extraction import clean_text, extract_phone
+from directory_routing import transport_url
+from html_parsing import make_soup, strainer
+from http_cache import shared_cache
+from pagination import Paginator, page_hints
+from rate_limiter import shared_scheduler
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+PAGE_PARSERS = {
+    'avvo': 'parse_avvo_page',
+    'justia_state': 'parse_justia_state_page',
+    'justia': 'parse_justia_city_page',
+    'findlaw': 'parse_findlaw_page',
+}
+
+# Listing pages only need the card containers the page parsers search
+AVVO_CARDS = strainer('div', 'v-lawyer-card')
+JUSTIA_BLOCKS = strainer('div', 'lawyer')
+FINDLAW_LISTINGS = strainer('div', 'listing')
+
 class LawyerScraper:
-    def __init__(self):
+    def __init__(self, scheduler=None, parse_pool=None, http_cache=None, checkpoint=None):
         self.ua = UserAgent()
-        self.delay = float(os.getenv('SCRAPER_DELAY', 2))
+        self.scheduler = scheduler or shared_scheduler()
+        self.http_cache = http_cache or shared_cache()
+        self.checkpoint = checkpoint
+        self.parse_pool = parse_pool
         self.max_workers = int(os.getenv('MAX_WORKERS', 5))
-        self.session = requests.Session()
-        self.session.headers.update({
+        self._local = threading.local()
+    
+    @property
+    def session(self):
+        # Each worker thread gets its own session; requests.Session is not thread-safe
+        if not hasattr(self._local, 'session'):
+            self._local.session = self.new_session()
+        return self._local.session
+    
+    def new_session(self):
+        session = requests.Session()
+        session.headers.update({
             'User-Agent': self.ua.random,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         })
-        
-    def extract_email(self, text):
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return emails[0] if emails else None
-    
-    def extract_phone(self, text):
-        phone_patterns = [
-            r'(\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\(\d{3}\)\s*\d{3}-\d{4}',
-        ]
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, text)
-            if phones:
-                return phones[0]
-        return None
-    
-    def clean_text(self, text):
-        if not text:
-            return None
-        text = ' '.join(text.split())
-        text = text.strip()
-        return text if text else None
+        return session
     
-    def parse_address(self, address_text):
-        if not address_text:
-            return None, None, None, None
-        
-        zip_pattern = r'\b\d{5}(?:-\d{4})?\b'
-        state_pattern = r'\b([A-Z]{2})\b'
-        
-        zip_match = re.search(zip_pattern, address_text)
-        zip_code = zip_match.group() if zip_match else None
-        
-        state_match = re.search(state_pattern, address_text)
-        state = state_match.group() if state_match else None
-        
-        city = None
-        if state:
-            city_pattern = rf'([^,]+),\s*{state}'
-            city_match = re.search(city_pattern, address_text)
-            if city_match:
-                city = city_match.group(1).strip()
+    def fetch(self, url):
+        cached, headers = self.http_cache.prepare(url)
+        if cached:
+            return cached
+        self.scheduler.wait(url)
+        response = self.session.get(transport_url(url), headers=headers, timeout=10)
+        return self.http_cache.resolve(url, response.status_code, response.headers, response.content) or response
+    
+    def parse_page(self, source, content, url, *args):
+        # Hand raw bytes to the process pool when one is attached
+        if self.parse_pool:
+            return self.parse_pool.parse(source, content, url, *args)
+        return getattr(self, PAGE_PARSERS[source])(content, url, *args)
+    
+    async def parse_page_async(self, source, content, url, *args):
+        if self.parse_pool:
+            return await self.parse_pool.parse_async(source, content, url, *args)
+        return getattr(self, PAGE_PARSERS[source])(content, url, *args)
         
-        return address_text, city, state, zip_code
+    def finished_unit(self, *unit):
+        """Lawyers a unit produced before a restart, or None if it still has to run"""
+        return self.checkpoint.get(unit) if self.checkpoint else None
     
-    def scrape_avvo_lawyers(self, state_code, page_limit=5):
-        lawyers = []
-        base_url = f"https://www.avvo.com/divorce-separation-lawyers/{state_code}.html"
+    def finished_hints(self, *unit):
+        """Pagination hints recorded with a listing page before a restart, or None"""
+        return self.checkpoint.get_hints(unit) if self.checkpoint else None
+    
+    def finish_unit(self, lawyers, *unit, hints=None):
+        if self.checkpoint:
+            self.checkpoint.record(unit, lawyers, hints)
+    
+    def iter_listing_pages(self, source, state_code, page_url, page_limit=None, label=None):
+        """Yield lawyers from a directory's listing pages until the listings run out"""
+        paginator = Paginator(page_url, page_limit, label=f"{label} {state_code}")
         
-        for page in range(1, page_limit + 1):
+        for page, url in paginator.pages():
+            finished = self.finished_unit(source, state_code, page)
+            if finished is not None:
+                if paginator.advance(finished, hints=self.finished_hints(source, state_code, page)):
+                    yield from finished
+                continue
+            
             try:
-                url = base_url if page == 1 else f"{base_url}?page={page}"
-                response = self.session.get(url, timeout=10)
+                response = self.fetch(url)
                 
                 if response.status_code != 200:
-                    logger.warning(f"Failed to fetch {url}: Status {response.status_code}")
+                    logger.warning(f"Failed to fetch {label} {url}: Status {response.status_code}")
                     continue
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                lawyer_cards = soup.find_all('div', class_='v-lawyer-card')
-                
-                for card in lawyer_cards:
-                    lawyer_data = self.parse_avvo_lawyer_card(card, url)
-                    if lawyer_data:
-                        lawyers.append(lawyer_data)
-                
-                logger.info(f"Scraped page {page} for {state_code}: Found {len(lawyer_cards)} lawyers")
-                time.sleep(self.delay)
+                page_lawyers = self.parse_page(source, response.content, url)
+                logger.info(f"Scraped {label} page {page} for {state_code}: Found {len(page_lawyers)} lawyers")
                 
             except Exception as e:
-                logger.error(f"Error scraping page {page} for {state_code}: {e}")
+                logger.error(f"Error scraping {label} page {page} for {state_code}: {e}")
                 continue
+            
+            hints = page_hints(response.content, url)
+            self.finish_unit(page_lawyers, source, state_code, page, hints=hints)
+            if paginator.advance(page_lawyers, hints=hints):
+                yield from page_lawyers
+    
+    def avvo_page_url(self, state_code, page):
+        base_url = f"https://www.avvo.com/divorce-separation-lawyers/{state_code}.html"
+        return base_url if page == 1 else f"{base_url}?page={page}"
+    
+    def scrape_avvo_lawyers(self, state_code, page_limit=None):
+        return list(self.iter_avvo_lawyers(state_code, page_limit))
+    
+    def iter_avvo_lawyers(self, state_code, page_limit=None):
+        return self.iter_listing_pages('avvo', state_code, partial(self.avvo_page_url, state_code), page_limit, 'Avvo')
+    
+    def parse_avvo_page(self, content, url):
+        soup = make_soup(content, AVVO_CARDS)
+        lawyers = []
+        
+        for card in soup.find_all('div', class_='v-lawyer-card'):
+            lawyer_data = self.parse_avvo_lawyer_card(card, url)
+            if lawyer_data:
+                lawyers.append(lawyer_data)
         
         return lawyers
     
@@ -128,20 +171,20 @@ class LawyerScraper:
             
             name_elem = card.find('span', class_='u-vertical-padding-half')
             if name_elem:
-                lawyer_data['lawyer_name'] = self.clean_text(name_elem.get_text())
+                lawyer_data['lawyer_name'] = clean_text(name_elem.get_text())
             
             firm_elem = card.find('span', class_='text-muted')
             if firm_elem:
-                lawyer_data['firm_name'] = self.clean_text(firm_elem.get_text())
+                lawyer_data['firm_name'] = clean_text(firm_elem.get_text())
             
             address_elem = card.find('span', class_='u-margin-right-half')
             if address_elem:
-                address_text = self.clean_text(address_elem.get_text())
-                lawyer_data['office_address'], lawyer_data['city'], lawyer_data['state'], lawyer_data['zip_code'] = self.parse_address(address_text)
+                address_text = clean_text(address_elem.get_text())
+                lawyer_data['office_address'], lawyer_data['city'], lawyer_data['state'], lawyer_data['zip_code'] = parse_address(address_text)
             
             phone_elem = card.find('span', class_='overridable-lawyer-phone-copy')
             if phone_elem:
-                lawyer_data['phone_number'] = self.clean_text(phone_elem.get_text())
+                lawyer_data['phone_number'] = extract_phone(phone_elem.get_text())
             
             rating_elem = card.find('span', class_='nv-rating')
             if rating_elem:
@@ -159,7 +202,7 @@ class LawyerScraper:
             
             practice_elem = card.find('div', class_='u-margin-bottom-half')
             if practice_elem:
-                lawyer_data['practice_areas'] = self.clean_text(practice_elem.get_text())
+                lawyer_data['practice_areas'] = clean_text(practice_elem.get_text())
             
             return lawyer_data
             
@@ -167,53 +210,69 @@ class LawyerScraper:
             logger.error(f"Error parsing lawyer card: {e}")
             return None
     
+    def justia_state_url(self, state_code):
+        return f"https://lawyers.justia.com/family-law/divorce/{state_code}"
+    
     def scrape_justia_lawyers(self, state_code, city_limit=10):
-        lawyers = []
-        base_url = f"https://lawyers.justia.com/family-law/divorce/{state_code}"
+        return list(self.iter_justia_lawyers(state_code, city_limit))
+    
+    def iter_justia_lawyers(self, state_code, city_limit=10):
+        base_url = self.justia_state_url(state_code)
         
         try:
-            response = self.session.get(base_url, timeout=10)
+            response = self.fetch(base_url)
             if response.status_code != 200:
                 logger.warning(f"Failed to fetch Justia {state_code}: Status {response.status_code}")
-                return lawyers
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            city_links = soup.find_all('a', href=re.compile(rf'/family-law/divorce/{state_code}/'))[:city_limit]
+                return
             
-            for city_link in city_links:
-                city_url = urljoin(base_url, city_link['href'])
-                city_lawyers = self.scrape_justia_city(city_url)
-                lawyers.extend(city_lawyers)
-                time.sleep(self.delay)
+            city_urls = self.parse_page('justia_state', response.content, base_url, state_code, city_limit)
             
         except Exception as e:
             logger.error(f"Error scraping Justia for {state_code}: {e}")
+            return
         
-        return lawyers
+        for city_url in city_urls:
+            finished = self.finished_unit('justia', state_code, city_url)
+            if finished is not None:
+                yield from finished
+                continue
+            yield from self.scrape_justia_city(city_url, state_code)
+    
+    def parse_justia_state_page(self, content, base_url, state_code, city_limit=10):
+        city_href = re.compile(rf'/family-law/divorce/{state_code}/')
+        soup = make_soup(content, SoupStrainer('a', href=city_href))
+        city_links = soup.find_all('a', href=city_href)[:city_limit]
+        return [urljoin(base_url, city_link['href']) for city_link in city_links]
     
-    def scrape_justia_city(self, city_url):
+    def scrape_justia_city(self, city_url, state_code=None):
         lawyers = []
         
         try:
-            response = self.session.get(city_url, timeout=10)
+            response = self.fetch(city_url)
             if response.status_code != 200:
                 return lawyers
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            lawyer_blocks = soup.find_all('div', class_='lawyer')
-            
-            for block in lawyer_blocks:
-                lawyer_data = self.parse_justia_lawyer_block(block, city_url)
-                if lawyer_data:
-                    lawyers.append(lawyer_data)
-            
+            lawyers = self.parse_page('justia', response.content, city_url)
             logger.info(f"Scraped {len(lawyers)} lawyers from {city_url}")
+            if state_code:
+                self.finish_unit(lawyers, 'justia', state_code, city_url)
             
         except Exception as e:
             logger.error(f"Error scraping Justia city {city_url}: {e}")
         
         return lawyers
     
+    def parse_justia_city_page(self, content, city_url):
+        soup = make_soup(content, JUSTIA_BLOCKS)
+        lawyers = []
+        
+        for block in soup.find_all('div', class_='lawyer'):
+            lawyer_data = self.parse_justia_lawyer_block(block, city_url)
+            if lawyer_data:
+                lawyers.append(lawyer_data)
+        
+        return lawyers
+    
     def parse_justia_lawyer_block(self, block, source_url):
         try:
             lawyer_data = {
@@ -236,21 +295,21 @@ class LawyerScraper:
             
             name_elem = block.find('strong', class_='lawyer-name')
             if name_elem:
-                lawyer_data['lawyer_name'] = self.clean_text(name_elem.get_text())
+                lawyer_data['lawyer_name'] = clean_text(name_elem.get_text())
             
             firm_elem = block.find('span', class_='lawyer-firm')
             if firm_elem:
-                lawyer_data['firm_name'] = self.clean_text(firm_elem.get_text())
+                lawyer_data['firm_name'] = clean_text(firm_elem.get_text())
             
             address_elem = block.find('span', class_='lawyer-address')
             if address_elem:
-                address_text = self.clean_text(address_elem.get_text())
-                lawyer_data['office_address'], lawyer_data['city'], lawyer_data['state'], lawyer_data['zip_code'] = self.parse_address(address_text)
+                address_text = clean_text(address_elem.get_text())
+                lawyer_data['office_address'], lawyer_data['city'], lawyer_data['state'], lawyer_data['zip_code'] = parse_address(address_text)
             
             contact_elem = block.find('span', class_='lawyer-phone')
             if contact_elem:
                 contact_text = contact_elem.get_text()
-                phone = self.extract_phone(contact_text)
+                phone = extract_phone(contact_text)
                 if phone:
                     lawyer_data['phone_number'] = phone
             
@@ -264,34 +323,25 @@ class LawyerScraper:
             logger.error(f"Error parsing Justia lawyer block: {e}")
             return None
     
-    def scrape_findlaw_lawyers(self, state_code, page_limit=5):
-        lawyers = []
-        state_name = self.get_state_name(state_code).lower().replace(' ', '-')
+    def findlaw_page_url(self, state_code, page):
+        state_name = get_state_name(state_code).lower().replace(' ', '-')
         base_url = f"https://lawyers.findlaw.com/{state_name}/divorce-lawyers.html"
+        return base_url if page == 1 else f"{base_url}?page={page}"
+    
+    def scrape_findlaw_lawyers(self, state_code, page_limit=None):
+        return list(self.iter_findlaw_lawyers(state_code, page_limit))
+    
+    def iter_findlaw_lawyers(self, state_code, page_limit=None):
+        return self.iter_listing_pages('findlaw', state_code, partial(self.findlaw_page_url, state_code), page_limit, 'FindLaw')
+    
+    def parse_findlaw_page(self, content, url):
+        soup = make_soup(content, FINDLAW_LISTINGS)
+        lawyers = []
         
-        for page in range(1, page_limit + 1):
-            try:
-                url = base_url if page == 1 else f"{base_url}?page={page}"
-                response = self.session.get(url, timeout=10)
-                
-                if response.status_code != 200:
-                    logger.warning(f"Failed to fetch FindLaw {url}: Status {response.status_code}")
-                    continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                lawyer_listings = soup.find_all('div', class_='listing')
-                
-                for listing in lawyer_listings:
-                    lawyer_data = self.parse_findlaw_listing(listing, url)
-                    if lawyer_data:
-                        lawyers.append(lawyer_data)
-                
-                logger.info(f"Scraped FindLaw page {page} for {state_code}: Found {len(lawyer_listings)} lawyers")
-                time.sleep(self.delay)
-                
-            except Exception as e:
-                logger.error(f"Error scraping FindLaw page {page} for {state_code}: {e}")
-                continue
+        for listing in soup.find_all('div', class_='listing'):
+            lawyer_data = self.parse_findlaw_listing(listing, url)
+            if lawyer_data:
+                lawyers.append(lawyer_data)
         
         return lawyers
     
@@ -317,20 +367,20 @@ class LawyerScraper:
             
             name_elem = listing.find('h3', class_='lawyer-name')
             if name_elem:
-                lawyer_data['lawyer_name'] = self.clean_text(name_elem.get_text())
+                lawyer_data['lawyer_name'] = clean_text(name_elem.get_text())
             
             firm_elem = listing.find('p', class_='law-firm')
             if firm_elem:
-                lawyer_data['firm_name'] = self.clean_text(firm_elem.get_text())
+                lawyer_data['firm_name'] = clean_text(firm_elem.get_text())
             
             address_elem = listing.find('p', class_='address')
             if address_elem:
-                address_text = self.clean_text(address_elem.get_text())
-                lawyer_data['office_address'], lawyer_data['city'], lawyer_data['state'], lawyer_data['zip_code'] = self.parse_address(address_text)
+                address_text = clean_text(address_elem.get_text())
+                lawyer_data['office_address'], lawyer_data['city'], lawyer_data['state'], lawyer_data['zip_code'] = parse_address(address_text)
             
             phone_elem = listing.find('a', class_='phone-link')
             if phone_elem:
-                lawyer_data['phone_number'] = self.clean_text(phone_elem.get_text())
+                lawyer_data['phone_number'] = extract_phone(phone_elem.get_text())
             
             website_elem = listing.find('a', class_='website-link')
             if website_elem:
@@ -342,49 +392,245 @@ class LawyerScraper:
             logger.error(f"Error parsing FindLaw listing: {e}")
             return None
     
-    def get_state_name(self, state_code):
-        states = {
-            'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
-            'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
-            'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
-            'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
-            'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
-            'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
-            'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
-            'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
-            'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
-            'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
-            'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
-            'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
-            'WI': 'Wisconsin', 'WY': 'Wyoming'
-        }
-        return states.get(state_code.upper(), state_code)
-    
-    def scrape_multiple_states(self, state_codes, sources=['avvo']):
-        all_lawyers = []
+    def iter_source(self, state_code, source):
+        if source == 'avvo':
+            return self.iter_avvo_lawyers(state_code)
+        if source == 'justia':
+            return self.iter_justia_lawyers(state_code)
+        if source == 'findlaw':
+            return self.iter_findlaw_lawyers(state_code)
+        raise ValueError(f"Unknown source: {source}")
+    
+    def scrape_source(self, state_code, source):
+        return list(self.iter_source(state_code, source))
+    
+    def scrape_multiple_states(self, state_codes, sources=['avvo'], mode='serial'):
+        if mode == 'async':
+            return asyncio.run(self.scrape_multiple_states_async(state_codes, sources))
+        if mode == 'threads':
+            return self.scrape_multiple_states_parallel(state_codes, sources)
+        return list(self.iter_multiple_states(state_codes, sources))
+    
+    def iter_multiple_states(self, state_codes, sources=['avvo'], mode='serial'):
+        """Yield lawyers as they are scraped instead of collecting the whole run.
+        Threads and async modes yield in completion order."""
+        if mode == 'async':
+            yield from self._iter_multiple_states_async(state_codes, sources)
+            return
+        if mode == 'threads':
+            yield from self._iter_multiple_states_parallel(state_codes, sources)
+            return
         
         for state_code in state_codes:
             logger.info(f"Starting scrape for {state_code}")
-            state_lawyers = []
-            
-            if 'avvo' in sources:
-                avvo_lawyers = self.scrape_avvo_lawyers(state_code)
-                state_lawyers.extend(avvo_lawyers)
+            state_count = 0
             
-            if 'justia' in sources:
-                justia_lawyers = self.scrape_justia_lawyers(state_code)
-                state_lawyers.extend(justia_lawyers)
+            for source in ('avvo', 'justia', 'findlaw'):
+                if source in sources:
+                    for lawyer in self.iter_source(state_code, source):
+                        state_count += 1
+                        yield lawyer
             
-            if 'findlaw' in sources:
-                findlaw_lawyers = self.scrape_findlaw_lawyers(state_code)
-                state_lawyers.extend(findlaw_lawyers)
+            logger.info(f"Completed scraping {state_code}: Found {state_count} total lawyers")
+    
+    def _source_units(self, state_codes, sources):
+        return [
+            (state_code, source)
+            for state_code in state_codes
+            for source in ('avvo', 'justia', 'findlaw')
+            if source in sources
+        ]
+    
+    def _iter_multiple_states_parallel(self, state_codes, sources):
+        units = self._source_units(state_codes, sources)
+        pending_units = iter(units)
+        completed = 0
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Keep a bounded window of units in flight so finished results
+            # never pile up faster than the consumer drains them
+            futures = {}
+            for state_code, source in islice(pending_units, self.max_workers * 2):
+                futures[executor.submit(self.scrape_source, state_code, source)] = (state_code, source)
+            
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state_code, source = futures.pop(future)
+                    completed += 1
+                    try:
+                        unit_lawyers = future.result()
+                        logger.info(f"[{completed}/{len(units)}] Completed {source} for {state_code}: Found {len(unit_lawyers)} lawyers")
+                    except Exception as e:
+                        logger.error(f"[{completed}/{len(units)}] Error scraping {source} for {state_code}: {e}")
+                        unit_lawyers = []
+                    
+                    for next_state, next_source in islice(pending_units, 1):
+                        futures[executor.submit(self.scrape_source, next_state, next_source)] = (next_state, next_source)
+                    
+                    yield from unit_lawyers
+    
+    def _iter_multiple_states_async(self, state_codes, sources):
+        # Run the event loop on a helper thread; finished states come back
+        # through a bounded queue so a slow consumer pauses the crawl
+        states = queue.Queue(maxsize=self.max_workers)
+        finished = object()
+        
+        def run():
+            try:
+                asyncio.run(self._produce_states_async(state_codes, sources, states))
+            except Exception as e:
+                logger.error(f"Async scrape failed: {e}")
+            finally:
+                states.put(finished)
+        
+        producer = threading.Thread(target=run, daemon=True)
+        producer.start()
+        
+        while True:
+            state_lawyers = states.get()
+            if state_lawyers is finished:
+                break
+            yield from state_lawyers
+        
+        producer.join()
+    
+    async def _produce_states_async(self, state_codes, sources, states):
+        async with AsyncFetcher(headers=self.session.headers, scheduler=self.scheduler, cache=self.http_cache) as fetcher:
+            tasks = [self.scrape_state_async(fetcher, state_code, sources) for state_code in state_codes]
+            for next_state in asyncio.as_completed(tasks):
+                state_lawyers = await next_state
+                await asyncio.to_thread(states.put, state_lawyers)
+    
+    def scrape_multiple_states_parallel(self, state_codes, sources=['avvo']):
+        """Fan (state, source) units out over a pool of MAX_WORKERS threads"""
+        units = self._source_units(state_codes, sources)
+        results = [[] for _ in units]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.scrape_source, state_code, source): index
+                for index, (state_code, source) in enumerate(units)
+            }
             
-            logger.info(f"Completed scraping {state_code}: Found {len(state_lawyers)} total lawyers")
-            all_lawyers.extend(state_lawyers)
+            for completed, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                state_code, source = units[index]
+                try:
+                    results[index] = future.result()
+                    logger.info(f"[{completed}/{len(units)}] Completed {source} for {state_code}: Found {len(results[index])} lawyers")
+                except Exception as e:
+                    logger.error(f"[{completed}/{len(units)}] Error scraping {source} for {state_code}: {e}")
         
+        # Merge in unit order so the output matches a serial run
+        all_lawyers = []
+        for unit_lawyers in results:
+            all_lawyers.extend(unit_lawyers)
         return all_lawyers
     
-    def save_to_json(self, lawyers, filename='lawyers_data.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(lawyers, f, indent=2, ensure_ascii=False)
-        logger.info(f"Saved {len(lawyers)} lawyers to {filename}")
\ No newline at end of file
+    async def scrape_multiple_states_async(self, state_codes, sources=['avvo']):
+        """Scrape all states concurrently, capping in-flight requests per host"""
+        async with AsyncFetcher(headers=self.session.headers, scheduler=self.scheduler, cache=self.http_cache) as fetcher:
+            results = await asyncio.gather(*(
+                self.scrape_state_async(fetcher, state_code, sources) for state_code in state_codes
+            ))
+        
+        all_lawyers = []
+        for state_lawyers in results:
+            all_lawyers.extend(state_lawyers)
+        return all_lawyers
+    
+    async def scrape_state_async(self, fetcher, state_code, sources=['avvo']):
+        logger.info(f"Starting scrape for {state_code}")
+        tasks = []
+        
+        if 'avvo' in sources:
+            tasks.append(self.scrape_avvo_lawyers_async(fetcher, state_code))
+        
+        if 'justia' in sources:
+            tasks.append(self.scrape_justia_lawyers_async(fetcher, state_code))
+        
+        if 'findlaw' in sources:
+            tasks.append(self.scrape_findlaw_lawyers_async(fetcher, state_code))
+        
+        state_lawyers = []
+        for source_lawyers in await asyncio.gather(*tasks):
+            state_lawyers.extend(source_lawyers)
+        
+        logger.info(f"Completed scraping {state_code}: Found {len(state_lawyers)} total lawyers")
+        return state_lawyers
+    
+    async def scrape_listing_pages_async(self, fetcher, source, state_code, page_url, page_limit=None, label=None):
+        # Pages of one directory are walked in order, since each page decides
+        # the next; states and sources still run concurrently
+        lawyers = []
+        paginator = Paginator(page_url, page_limit, label=f"{label} {state_code}")
+        
+        for page, url in paginator.pages():
+            finished = self.finished_unit(source, state_code, page)
+            if finished is not None:
+                if paginator.advance(finished, hints=self.finished_hints(source, state_code, page)):
+                    lawyers.extend(finished)
+                continue
+            
+            result = await fetcher.fetch(url)
+            if result.status != 200:
+                logger.warning(f"Failed to fetch {label} {url}: Status {result.status}")
+                continue
+            
+            try:
+                page_lawyers = await self.parse_page_async(source, result.content, url)
+                logger.info(f"Scraped {label} page {page} for {state_code}: Found {len(page_lawyers)} lawyers")
+            except Exception as e:
+                logger.error(f"Error scraping {label} page {page} for {state_code}: {e}")
+                continue
+            
+            hints = page_hints(result.content, url)
+            self.finish_unit(page_lawyers, source, state_code, page, hints=hints)
+            if paginator.advance(page_lawyers, hints=hints):
+                lawyers.extend(page_lawyers)
+        
+        return lawyers
+    
+    async def scrape_avvo_lawyers_async(self, fetcher, state_code, page_limit=None):
+        return await self.scrape_listing_pages_async(
+            fetcher, 'avvo', state_code, partial(self.avvo_page_url, state_code), page_limit, 'Avvo'
+        )
+    
+    async def scrape_justia_lawyers_async(self, fetcher, state_code, city_limit=10):
+        lawyers = []
+        base_url = self.justia_state_url(state_code)
+        
+        try:
+            result = await fetcher.fetch(base_url)
+            if result.status != 200:
+                logger.warning(f"Failed to fetch Justia {state_code}: Status {result.status}")
+                return lawyers
+            
+            city_urls = await self.parse_page_async('justia_state', result.content, base_url, state_code, city_limit)
+            
+            pending_urls = []
+            for city_url in city_urls:
+                finished = self.finished_unit('justia', state_code, city_url)
+                if finished is None:
+                    pending_urls.append(city_url)
+                else:
+                    lawyers.extend(finished)
+            
+            for city_result in await fetcher.fetch_all(pending_urls):
+                if city_result.status != 200:
+                    continue
+                city_lawyers = await self.parse_page_async('justia', city_result.content, city_result.url)
+                logger.info(f"Scraped {len(city_lawyers)} lawyers from {city_result.url}")
+                self.finish_unit(city_lawyers, 'justia', state_code, city_result.url)
+                lawyers.extend(city_lawyers)
+            
+        except Exception as e:
+            logger.error(f"Error scraping Justia for {state_code}: {e}")
+        
+        return lawyers
+    
+    async def scrape_findlaw_lawyers_async(self, fetcher, state_code, page_limit=None):
+        return await self.scrape_listing_pages_async(
+            fetcher, 'findlaw', state_code, partial(self.findlaw_page_url, state_code), page_limit, 'FindLaw'
+        )
\ No newline at end of file
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime
+from decimal import Decimal
+
+from address_parser import STATE_NAMES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'data', 'lawyers')
+MANIFEST = 'manifest.json'
+
+# Database column -> field of the Lawyer interface in src/lib/lawyer-directory-schema.ts
+SHARD_FIELDS = [
+    ('id', 'id'),
+    ('lawyer_name', 'name'),
+    ('firm_name', 'firmName'),
+    ('office_address', 'streetAddress'),
+    ('zip_code', 'zipCode'),
+    ('phone_number', 'phone'),
+    ('website', 'website'),
+    ('email', 'email'),
+    ('practice_areas', 'practiceAreas'),
+    ('years_experience', 'yearsExperience'),
+    ('rating', 'rating'),
+    ('review_count', 'reviewCount'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+]
+SHARD_COLUMNS = [column for column, _ in SHARD_FIELDS] + ['city']
+
+NON_SLUG = re.compile(r'[^a-z0-9]+')
+
+
+def slugify(text):
+    return NON_SLUG.sub('-', text.lower()).strip('-')
+
+
+def _listing(row):
+    """Compact listing of a lawyer; empty fields are left out"""
+    listing = {}
+    for column, field in SHARD_FIELDS:
+        value = row[column]
+        if value is None or value == '':
+            continue
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif column == 'practice_areas':
+            value = [area.strip() for area in value.split(',') if area.strip()]
+        listing[field] = value
+    listing['slug'] = f"{slugify(row['lawyer_name'] or 'lawyer')}-{row['id']}"
+    return listing
+
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _write_shard(directory, relative_dir, name, data, stats):
+    """Write data as <name>.<hash>.json unless that exact file exists; returns
+    the path relative to directory"""
+    content = _encode(data)
+    digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+    relative = f'{relative_dir}/{name}.{digest}.json'
+    path = os.path.join(directory, relative)
+    if os.path.exists(path):
+        stats['unchanged'] += 1
+        return relative
+    with open(path + '.tmp', 'wb') as f:
+        f.write(content)
+    os.replace(path + '.tmp', path)
+    stats['written'] += 1
+    return relative
+
+
+def build_state(db, directory, state, stats, stale):
+    """Write the city shards and the index shard of one state, and add that
+    state's shards that are no longer referenced to stale. Lawyers without a
+    city count towards the state but are not listed."""
+    name = STATE_NAMES.get(state, state)
+    state_slug = slugify(name)
+    os.makedirs(os.path.join(directory, state_slug), exist_ok=True)
+
+    # Rows arrive ordered by city; differently spelled cities ("Saint Louis",
+    # "SAINT LOUIS") share a slug and a shard
+    cities = {}
+    total = 0
+    for row in db.iter_lawyers([state], columns=SHARD_COLUMNS):
+        total += 1
+        if not row['city']:
+            continue
+        city_slug = slugify(row['city'])
+        if city_slug not in cities:
+            cities[city_slug] = {'city': row['city'], 'lawyers': []}
+        cities[city_slug]['lawyers'].append(_listing(row))
+
+    files = set()
+    city_entries = []
+    for city_slug, city in cities.items():
+        lawyers = city['lawyers']
+        ratings = [lawyer['rating'] for lawyer in lawyers if 'rating' in lawyer]
+        summary = {'city': city['city'], 'slug': city_slug, 'lawyerCount': len(lawyers)}
+        if ratings:
+            summary['averageRating'] = round(sum(ratings) / len(ratings), 2)
+        relative = _write_shard(directory, state_slug, city_slug, {'state': state, **summary, 'lawyers': lawyers}, stats)
+        files.add(os.path.basename(relative))
+        city_entries.append({**summary, 'file': relative})
+    city_entries.sort(key=lambda entry: (-entry['lawyerCount'], entry['city']))
+
+    index = {'state': state, 'name': name, 'slug': state_slug, 'lawyerCount': total, 'cities': city_entries}
+    relative = _write_shard(directory, state_slug, 'index', index, stats)
+    files.add(os.path.basename(relative))
+
+    for filename in os.listdir(os.path.join(directory, state_slug)):
+        if filename not in files:
+            stale.append(os.path.join(directory, state_slug, filename))
+
+    return {'name': name, 'slug': state_slug, 'lawyerCount': total, 'cityCount': len(city_entries), 'file': relative}
+
+
+def build_shards(db, directory=DEFAULT_DIRECTORY, incremental=False):
+    """Write content-hashed JSON shards of lawyers per state and city.
+
+    <state-slug>/index.<hash>.json lists a state's cities and their shard
+    files, <state-slug>/<city-slug>.<hash>.json lists a city's lawyers, and
+    manifest.json maps state codes to their index shard. Since a shard's
+    name changes with its content, files can be cached forever and unchanged
+    shards are never rewritten. With incremental, only states changed since
+    the previous build are read from the database.
+
+    Shards the new manifest no longer references are only deleted once it
+    has replaced the old one, so the live manifest never points at missing
+    files. A database error aborts the build before that, leaving the
+    previous build in place.
+    """
+    os.makedirs(directory, exist_ok=True)
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = None
+
+    watermark = db.get_change_watermark()
+    state_counts = db.get_state_counts()
+    if state_counts is None:
+        raise RuntimeError("Could not read lawyer counts per state")
+    counts = {row['state']: row['lawyers'] for row in state_counts}
+    built = dict((manifest or {}).get('states', {}))
+
+    if incremental and manifest is not None:
+        known_counts = {state: entry['lawyerCount'] for state, entry in built.items()}
+        changed = db.get_states_changed_since(datetime.fromisoformat(manifest['watermark']), known_counts)
+        if changed is None:
+            raise RuntimeError("Could not determine which states changed")
+        targets = sorted(state for state in changed if state in counts)
+    else:
+        targets = sorted(counts)
+
+    stats = {'states': 0, 'written': 0, 'unchanged': 0, 'removed': 0}
+    stale = []
+    for state in targets:
+        built[state] = build_state(db, directory, state, stats, stale)
+        stats['states'] += 1
+        logger.info(f"Built shards for {state}: {built[state]['lawyerCount']} lawyers in {built[state]['cityCount']} cities")
+
+    emptied = [built.pop(state) for state in [state for state in built if state not in counts]]
+
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(_encode({'watermark': watermark.isoformat(), 'states': dict(sorted(built.items()))}))
+    os.replace(path + '.tmp', path)
+
+    for stale_path in stale:
+        try:
+            os.remove(stale_path)
+            stats['removed'] += 1
+        except FileNotFoundError:
+            pass
+    for entry in emptied:
+        shutil.rmtree(os.path.join(directory, entry['slug']), ignore_errors=True)
+        stats['removed'] += 1
+        logger.info(f"Removed shards for {entry['name']}: no lawyers left")
+    return stats
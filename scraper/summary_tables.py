@@ -0,0 +1,213 @@
+# Summary tables behind Database.get_statistics() and the state/city facet
+# counts. Statement-level triggers fold each INSERT, UPDATE or DELETE on
+# lawyers into them using the statement's transition tables, so they stay
+# current for every writer (batch upserts, compaction, backfills) at the cost
+# of one small aggregate per statement. Counts of zero are kept as rows; a
+# state, city or firm is "covered" while its count is above zero.
+
+# Serializes summary maintenance so concurrent writers cannot deadlock on the
+# summary rows; held until the writing transaction commits
+SUMMARY_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('lawyer_summary'))"
+
+SUMMARY_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS lawyer_summary (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_lawyers BIGINT NOT NULL DEFAULT 0,
+    states_covered INTEGER NOT NULL DEFAULT 0,
+    unique_firms INTEGER NOT NULL DEFAULT 0,
+    cities_covered INTEGER NOT NULL DEFAULT 0,
+    last_scrape TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS lawyer_state_summary (
+    state VARCHAR(50) PRIMARY KEY,
+    lawyers INTEGER NOT NULL DEFAULT 0,
+    cities INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS lawyer_city_summary (
+    state VARCHAR(50),
+    city VARCHAR(100),
+    lawyers INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (state, city)
+);
+
+CREATE TABLE IF NOT EXISTS lawyer_firm_summary (
+    firm_name VARCHAR(255) PRIMARY KEY,
+    lawyers INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+SUMMARY_TRIGGER_NAMES = ['lawyers_summary_insert', 'lawyers_summary_update', 'lawyers_summary_delete']
+
+# Number of the summary triggers present on lawyers
+SUMMARY_TRIGGER_COUNT_SQL = """
+SELECT COUNT(*) FROM pg_trigger
+WHERE tgrelid = 'lawyers'::regclass AND tgname = ANY(%s)
+"""
+
+# Body of the trigger function; its stored source is compared with this on
+# startup, so a changed body is picked up by existing databases
+SUMMARY_FUNCTION_SOURCE = """
+DECLARE
+    changes TEXT;
+BEGIN
+    -- Most updates (usage counters, re-scraped contact details) leave every
+    -- state, city and firm count as it was; skip the lock and the summary
+    -- writes for them. Nested, as the query is planned as a whole and the
+    -- transition tables only exist for UPDATE.
+    IF TG_OP = 'UPDATE' THEN
+        IF NOT EXISTS (
+            SELECT state, city, firm_name FROM old_rows
+            EXCEPT ALL
+            SELECT state, city, firm_name FROM new_rows
+        ) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        changes := 'SELECT state, city, firm_name, scraped_at, 1 AS delta FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        changes := 'SELECT state, city, firm_name, NULL::TIMESTAMP AS scraped_at, -1 AS delta FROM old_rows';
+    ELSE
+        changes := 'SELECT state, city, firm_name, NULL::TIMESTAMP AS scraped_at, 1 AS delta FROM new_rows
+                    UNION ALL
+                    SELECT state, city, firm_name, NULL::TIMESTAMP, -1 FROM old_rows';
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('lawyer_summary'));
+
+    EXECUTE format($sql$
+        WITH changes AS (%s),
+        city_delta AS (
+            SELECT state, city, SUM(delta) AS delta FROM changes
+            WHERE state IS NOT NULL AND city IS NOT NULL
+            GROUP BY state, city HAVING SUM(delta) <> 0
+        ),
+        state_delta AS (
+            SELECT state, SUM(delta) AS delta FROM changes
+            WHERE state IS NOT NULL
+            GROUP BY state HAVING SUM(delta) <> 0
+        ),
+        firm_delta AS (
+            SELECT firm_name, SUM(delta) AS delta FROM changes
+            WHERE firm_name IS NOT NULL
+            GROUP BY firm_name HAVING SUM(delta) <> 0
+        ),
+        cities AS (
+            INSERT INTO lawyer_city_summary AS summary (state, city, lawyers)
+            SELECT state, city, delta FROM city_delta ORDER BY state, city
+            ON CONFLICT (state, city) DO UPDATE SET lawyers = summary.lawyers + EXCLUDED.lawyers
+            RETURNING state, city, lawyers
+        ),
+        city_coverage AS (
+            SELECT cities.state,
+                   COUNT(*) FILTER (WHERE cities.lawyers > 0 AND cities.lawyers - city_delta.delta <= 0)
+                   - COUNT(*) FILTER (WHERE cities.lawyers <= 0 AND cities.lawyers - city_delta.delta > 0) AS change
+            FROM cities JOIN city_delta USING (state, city)
+            GROUP BY cities.state
+        ),
+        state_changes AS (
+            SELECT state, COALESCE(state_delta.delta, 0) AS delta, COALESCE(city_coverage.change, 0) AS cities
+            FROM state_delta FULL JOIN city_coverage USING (state)
+        ),
+        states AS (
+            INSERT INTO lawyer_state_summary AS summary (state, lawyers, cities)
+            SELECT state, delta, cities FROM state_changes ORDER BY state
+            ON CONFLICT (state) DO UPDATE SET
+                lawyers = summary.lawyers + EXCLUDED.lawyers,
+                cities = summary.cities + EXCLUDED.cities
+            RETURNING state, lawyers
+        ),
+        firms AS (
+            INSERT INTO lawyer_firm_summary AS summary (firm_name, lawyers)
+            SELECT firm_name, delta FROM firm_delta ORDER BY firm_name
+            ON CONFLICT (firm_name) DO UPDATE SET lawyers = summary.lawyers + EXCLUDED.lawyers
+            RETURNING firm_name, lawyers
+        )
+        UPDATE lawyer_summary SET
+            total_lawyers = total_lawyers + (SELECT COALESCE(SUM(delta), 0) FROM changes),
+            states_covered = states_covered + (
+                SELECT COUNT(*) FILTER (WHERE states.lawyers > 0 AND states.lawyers - state_changes.delta <= 0)
+                       - COUNT(*) FILTER (WHERE states.lawyers <= 0 AND states.lawyers - state_changes.delta > 0)
+                FROM states JOIN state_changes USING (state)
+            ),
+            unique_firms = unique_firms + (
+                SELECT COUNT(*) FILTER (WHERE firms.lawyers > 0 AND firms.lawyers - firm_delta.delta <= 0)
+                       - COUNT(*) FILTER (WHERE firms.lawyers <= 0 AND firms.lawyers - firm_delta.delta > 0)
+                FROM firms JOIN firm_delta USING (firm_name)
+            ),
+            cities_covered = cities_covered + (SELECT COALESCE(SUM(change), 0) FROM city_coverage),
+            last_scrape = GREATEST(last_scrape, (SELECT MAX(scraped_at) FROM changes))
+        WHERE id = 1
+    $sql$, changes);
+
+    RETURN NULL;
+END
+"""
+
+SUMMARY_FUNCTION_SOURCE_SQL = """
+SELECT prosrc FROM pg_proc WHERE oid = to_regprocedure('lawyers_summary_trigger()')
+"""
+
+# Replacing the function does not lock lawyers, but it is still only run when
+# the stored source differs
+SUMMARY_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION lawyers_summary_trigger() RETURNS trigger LANGUAGE plpgsql AS $function$""" + SUMMARY_FUNCTION_SOURCE + """$function$;
+"""
+
+# Only run while some trigger is missing: DROP and CREATE TRIGGER take an
+# ACCESS EXCLUSIVE lock on lawyers, which would stall every reader and writer
+# if it ran on each startup
+SUMMARY_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS lawyers_summary_insert ON lawyers;
+DROP TRIGGER IF EXISTS lawyers_summary_update ON lawyers;
+DROP TRIGGER IF EXISTS lawyers_summary_delete ON lawyers;
+CREATE TRIGGER lawyers_summary_insert AFTER INSERT ON lawyers
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lawyers_summary_trigger();
+CREATE TRIGGER lawyers_summary_update AFTER UPDATE ON lawyers
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lawyers_summary_trigger();
+CREATE TRIGGER lawyers_summary_delete AFTER DELETE ON lawyers
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lawyers_summary_trigger();
+"""
+
+# Full rebuild from lawyers, for the first install and after bulk changes made
+# with the triggers disabled (or a TRUNCATE)
+REFRESH_SUMMARIES_SQL = """
+DELETE FROM lawyer_city_summary;
+INSERT INTO lawyer_city_summary (state, city, lawyers)
+SELECT state, city, COUNT(*) FROM lawyers
+WHERE state IS NOT NULL AND city IS NOT NULL
+GROUP BY state, city;
+
+DELETE FROM lawyer_state_summary;
+INSERT INTO lawyer_state_summary (state, lawyers, cities)
+SELECT state, COUNT(*), COUNT(DISTINCT city) FROM lawyers
+WHERE state IS NOT NULL
+GROUP BY state;
+
+DELETE FROM lawyer_firm_summary;
+INSERT INTO lawyer_firm_summary (firm_name, lawyers)
+SELECT firm_name, COUNT(*) FROM lawyers
+WHERE firm_name IS NOT NULL
+GROUP BY firm_name;
+
+INSERT INTO lawyer_summary (id, total_lawyers, states_covered, unique_firms, cities_covered, last_scrape)
+SELECT
+    1,
+    (SELECT COUNT(*) FROM lawyers),
+    (SELECT COUNT(*) FROM lawyer_state_summary),
+    (SELECT COUNT(*) FROM lawyer_firm_summary),
+    (SELECT COUNT(*) FROM lawyer_city_summary),
+    (SELECT MAX(scraped_at) FROM lawyers)
+ON CONFLICT (id) DO UPDATE SET
+    total_lawyers = EXCLUDED.total_lawyers,
+    states_covered = EXCLUDED.states_covered,
+    unique_firms = EXCLUDED.unique_firms,
+    cities_covered = EXCLUDED.cities_covered,
+    last_scrape = EXCLUDED.last_scrape;
+"""
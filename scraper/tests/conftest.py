@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+SCRAPER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scraper modules import each other as top-level modules
+sys.path.insert(0, SCRAPER_DIR)
+
+# Tests that drop and recreate the lawyers tables only run against a scratch
+# database named explicitly, never the DATABASE_URL from .env
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A connected Database on freshly created tables, and a raw connection to inspect them"""
+    if not TEST_DATABASE_URL:
+        pytest.skip('set TEST_DATABASE_URL to a scratch PostgreSQL database')
+    import psycopg2
+    from database import Database
+
+    monkeypatch.setenv('DATABASE_URL', TEST_DATABASE_URL)
+    connection = psycopg2.connect(TEST_DATABASE_URL)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            DROP TABLE IF EXISTS lawyer_interactions, sponsorship_history, lawyers,
+                lawyer_summary, lawyer_state_summary, lawyer_city_summary, lawyer_firm_summary CASCADE
+        """)
+    connection.commit()
+
+    database = Database()
+    assert database.connect() and database.create_lawyers_table()
+    with open(os.path.join(SCRAPER_DIR, 'update_schema.sql'), encoding='utf-8') as f:
+        with connection.cursor() as cursor:
+            cursor.execute(f.read())
+    connection.commit()
+    yield database, connection
+    database.close()
+    connection.close()
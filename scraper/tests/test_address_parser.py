@@ -0,0 +1,20 @@
+import pytest
+
+from address_parser import parse_address
+
+
+@pytest.mark.parametrize('text, city, state, zip_code', [
+    ('100 Congress Ave, Austin, TX 78701', 'Austin', 'TX', '78701'),
+    ('100 Congress Ave, Austin, TX 78701, USA', 'Austin', 'TX', '78701'),
+    ('100 Congress Ave, Austin, TX 78701, United States', 'Austin', 'TX', '78701'),
+    ('100 Congress Ave, Austin, Texas, 78701, U.S.A.', 'Austin', 'TX', '78701'),
+    ('100 Congress Ave, Austin TX 78701 USA', 'Austin', 'TX', '78701'),
+    ('350 5th Ave, New York, New York 10118', 'New York', 'NY', '10118'),
+    ('1 Main St, Springfield 62701', 'Springfield', 'IL', '62701'),
+])
+def test_parse_address(text, city, state, zip_code):
+    assert parse_address(text) == (text, city, state, zip_code)
+
+
+def test_parse_address_without_text():
+    assert parse_address('') == (None, None, None, None)
@@ -0,0 +1,25 @@
+from checkpoint import CheckpointStore
+
+LAWYERS = [{'lawyer_name': 'Jane Doe', 'firm_name': 'Doe Law'}]
+
+
+def test_units_finished_in_this_run_keep_no_lawyers(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    with CheckpointStore(path) as checkpoint:
+        checkpoint.record(('avvo', 'CA', 1), LAWYERS)
+        assert checkpoint.get(('avvo', 'CA', 1)) == ()
+        assert checkpoint.get(('avvo', 'CA', 2)) is None
+
+
+def test_resumed_units_replay_their_lawyers_once(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    with CheckpointStore(path) as checkpoint:
+        checkpoint.record(('avvo', 'CA', 1), LAWYERS)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"unit": ["avvo", "CA", 2], "law')
+
+    with CheckpointStore(path, resume=True) as checkpoint:
+        assert checkpoint.get(('avvo', 'CA', 1)) == LAWYERS
+        assert checkpoint.get(('avvo', 'CA', 1)) == ()
+        # The torn line was dropped
+        assert checkpoint.get(('avvo', 'CA', 2)) is None
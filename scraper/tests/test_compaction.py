@@ -0,0 +1,35 @@
+def test_compaction_moves_history_and_website_fields_to_the_kept_row(db):
+    database, connection = db
+    with connection.cursor() as cursor:
+        # Same lawyer under two firm spellings, stored before identity keys
+        cursor.execute("""
+            INSERT INTO lawyers (lawyer_name, firm_name, office_address, phone_number, zip_code, state, profile_views, first_seen_at)
+            VALUES ('Jane Doe', 'Doe Law', '1 Main St', '+15555550100', '90012', 'CA', 3, '2024-01-01')
+            RETURNING id
+        """)
+        keep_id = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO lawyers (lawyer_name, firm_name, office_address, phone_number, zip_code, state, profile_views,
+                                 is_sponsored, sponsorship_tier, google_place_id, first_seen_at)
+            VALUES ('Jane Doe', 'Doe Law Group', '1 Main Street', '+15555550100', '90012', 'CA', 5,
+                    TRUE, 'premium', 'place-1', '2024-06-01')
+            RETURNING id
+        """)
+        duplicate_id = cursor.fetchone()[0]
+        cursor.execute("INSERT INTO lawyer_interactions (lawyer_id, interaction_type) VALUES (%s, 'phone_click')", (duplicate_id,))
+        cursor.execute("INSERT INTO sponsorship_history (lawyer_id, tier) VALUES (%s, 'premium')", (duplicate_id,))
+    connection.commit()
+
+    stats = database.compact_lawyers()
+    assert stats is not None
+    assert stats['deleted'] == 1
+    assert stats['repointed'] == 2
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT id, is_sponsored, sponsorship_tier, google_place_id, profile_views, first_seen_at::date::text
+            FROM lawyers
+        """)
+        assert cursor.fetchall() == [(keep_id, True, 'premium', 'place-1', 8, '2024-01-01')]
+        cursor.execute("SELECT lawyer_id FROM lawyer_interactions UNION ALL SELECT lawyer_id FROM sponsorship_history")
+        assert cursor.fetchall() == [(keep_id,), (keep_id,)]
@@ -0,0 +1,31 @@
+from dedup import DedupIndex
+
+STORED = {
+    'lawyer_name': 'Jane Doe', 'firm_name': 'Doe Law', 'office_address': '1 Main St',
+    'phone_number': '(555) 555-0100', 'zip_code': '90012', 'state': 'CA', 'identity_key': 'doe|jane|5555550100|90012',
+}
+
+
+def moved_lawyer():
+    # Same phone, new office
+    return {
+        'lawyer_name': 'Jane Doe', 'firm_name': 'Doe Law Group', 'office_address': '9 Oak Ave',
+        'phone_number': '555-555-0100', 'zip_code': '94105', 'city': 'San Francisco', 'state': 'CA',
+    }
+
+
+def test_identity_keyed_match_only_takes_the_identity_key():
+    dedup = DedupIndex()
+    dedup.load_rows([STORED])
+    [lawyer] = dedup.filter([moved_lawyer()])
+    assert lawyer['identity_key'] == STORED['identity_key']
+    assert (lawyer['firm_name'], lawyer['office_address'], lawyer['zip_code']) == ('Doe Law Group', '9 Oak Ave', '94105')
+    assert dedup.stats['existing'] == 1
+
+
+def test_legacy_match_takes_the_stored_name_firm_and_address():
+    dedup = DedupIndex()
+    dedup.load_rows([STORED], identity_keyed=False)
+    [lawyer] = dedup.filter([moved_lawyer()])
+    assert (lawyer['lawyer_name'], lawyer['firm_name'], lawyer['office_address']) == ('Jane Doe', 'Doe Law', '1 Main St')
+    assert lawyer['identity_key'] == STORED['identity_key']
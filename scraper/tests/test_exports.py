@@ -0,0 +1,95 @@
+import json
+import os
+from datetime import datetime
+
+import psycopg2
+import pytest
+
+from parquet_export import MANIFEST, export_lawyers, partition_path
+from shard_export import build_shards
+
+
+class FakeDatabase:
+    """Serves lawyers from memory; the stream of a state in `failing` dies after one row"""
+
+    def __init__(self, lawyers, failing=()):
+        self.lawyers = lawyers
+        self.failing = set(failing)
+
+    def get_change_watermark(self):
+        return datetime(2026, 1, 2)
+
+    def get_state_counts(self):
+        counts = {}
+        for lawyer in self.lawyers:
+            counts[lawyer['state']] = counts.get(lawyer['state'], 0) + 1
+        return [{'state': state, 'lawyers': count} for state, count in sorted(counts.items())]
+
+    def iter_lawyers(self, states=None, columns=None, batch_size=None):
+        rows = [lawyer for lawyer in self.lawyers if not states or lawyer['state'] in states]
+        for index, lawyer in enumerate(rows):
+            if index == 1 and lawyer['state'] in self.failing:
+                raise psycopg2.OperationalError('server closed the connection unexpectedly')
+            yield {column: lawyer.get(column) for column in columns} if columns else dict(lawyer)
+
+
+def lawyers(state, count, name='Lawyer'):
+    return [{'id': i, 'lawyer_name': f'{name} {i}', 'city': 'Austin', 'state': state} for i in range(count)]
+
+
+def test_parquet_export_keeps_the_old_partition_when_the_stream_dies(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    directory = str(tmp_path)
+    export_lawyers(FakeDatabase(lawyers('TX', 3)), directory)
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = f.read()
+
+    with pytest.raises(psycopg2.OperationalError):
+        export_lawyers(FakeDatabase(lawyers('TX', 5, name='New'), failing=['TX']), directory)
+
+    path = partition_path(directory, 'TX')
+    assert pq.read_table(path).column('lawyer_name').to_pylist() == ['Lawyer 0', 'Lawyer 1', 'Lawyer 2']
+    assert not os.path.exists(path + '.tmp')
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        assert f.read() == manifest
+    assert json.loads(manifest)['states']['TX']['rows'] == 3
+
+
+def manifest_files(directory):
+    """Every file the shard manifest references, directly or through a state index"""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    files = []
+    for entry in manifest['states'].values():
+        files.append(entry['file'])
+        with open(os.path.join(directory, entry['file']), encoding='utf-8') as f:
+            files += [city['file'] for city in json.load(f)['cities']]
+    return manifest, files
+
+
+def test_shards_stay_readable_when_a_rebuild_fails(tmp_path):
+    directory = str(tmp_path)
+    build_shards(FakeDatabase(lawyers('TX', 3) + lawyers('CA', 2)), directory)
+    before, files = manifest_files(directory)
+
+    with pytest.raises(psycopg2.OperationalError):
+        build_shards(FakeDatabase(lawyers('CA', 4, name='New') + lawyers('TX', 5, name='New'), failing=['TX']), directory)
+
+    # The old manifest is still live, and every file it references still exists
+    after, files_after = manifest_files(directory)
+    assert after == before and files_after == files
+    assert all(os.path.exists(os.path.join(directory, file)) for file in files)
+
+
+def test_stale_shards_are_removed_after_the_manifest_moves_on(tmp_path):
+    directory = str(tmp_path)
+    build_shards(FakeDatabase(lawyers('TX', 3) + lawyers('CA', 2)), directory)
+    _, old_files = manifest_files(directory)
+
+    stats = build_shards(FakeDatabase(lawyers('TX', 4, name='New')), directory)
+    manifest, files = manifest_files(directory)
+    assert list(manifest['states']) == ['TX']
+    assert stats['removed'] == 3
+    assert not os.path.exists(os.path.join(directory, 'california'))
+    assert sorted(os.listdir(os.path.join(directory, 'texas'))) == sorted(os.path.basename(file) for file in files)
+    assert not set(files) & set(old_files)
@@ -0,0 +1,37 @@
+import re
+
+import pytest
+from bs4 import BeautifulSoup
+
+import html_parsing
+from html_parsing import find_class, make_soup, strainer
+
+PAGE = b"""<html><body>
+<div class="header lawyer-count">2 lawyers</div>
+<div class="card lawyer">
+  <h2 class="lawyer-name">Jane Doe</h2>
+  <div class="lawyer nested"><span class="firm-name">Doe Law</span></div>
+</div>
+<article class="lawyer featured"><h3 class="name">John Roe</h3></article>
+<div class="lawyers">not a card</div>
+</body></html>"""
+
+
+@pytest.mark.skipif(not (html_parsing.FAST_PARSE and html_parsing.LXML_AVAILABLE), reason='needs lxml')
+def test_strainer_keeps_whole_class_token_matches_with_their_children():
+    soup = make_soup(PAGE, strainer(['div', 'article'], 'lawyer'))
+    cards = soup.find_all(['div', 'article'], class_='lawyer', recursive=True)
+    assert [card.get('class') for card in cards] == [['card', 'lawyer'], ['lawyer', 'nested'], ['lawyer', 'featured']]
+    assert 'not a card' not in soup.get_text()
+    assert '2 lawyers' not in soup.get_text()
+
+
+def test_strainer_on_an_empty_page():
+    assert make_soup(b'', strainer('div', 'lawyer')).find_all('div') == []
+
+
+def test_find_class_matches_find_with_a_regex():
+    soup = BeautifulSoup(PAGE, 'html.parser')
+    for pattern, names in [(re.compile('name|title'), ['h2', 'h3']), (re.compile('firm'), None), (re.compile('phone'), None)]:
+        for card in soup.find_all(['div', 'article']):
+            assert find_class(card, pattern, names) is card.find(names, class_=pattern)
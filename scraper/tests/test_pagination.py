@@ -0,0 +1,58 @@
+import pytest
+
+from checkpoint import CheckpointStore
+from pagination import Paginator, find_next_url, page_hints
+
+URL = 'https://www.example.com/lawyers/ca?page=1'
+
+
+@pytest.mark.parametrize('html, expected', [
+    (b'<a class="btn next" href="?page=2">Next</a>', 'https://www.example.com/lawyers/ca?page=2'),
+    (b"<a class='next' href='/lawyers/ca?page=2&amp;sort=name'>", 'https://www.example.com/lawyers/ca?page=2&sort=name'),
+    (b'<link rel=next href="/lawyers/ca?page=2">', 'https://www.example.com/lawyers/ca?page=2'),
+    (b'<a rel="nofollow next" href="?page=2">', 'https://www.example.com/lawyers/ca?page=2'),
+    # "next" only as part of a longer class or rel value
+    (b'<a class="next-day-appointments" href="/book">Book</a>', None),
+    (b'<a class="nextgen-law" href="/firm">', None),
+    (b'<a rel="nextpage" href="?page=2">', None),
+    (b'<a data-rel="next" href="?page=2">', None),
+    (b'<a class="next" href="#">', None),
+])
+def test_next_link(html, expected):
+    assert find_next_url(html, URL) == expected
+
+
+def test_rel_next_wins_over_an_earlier_class_next():
+    html = b'''<a class="next" href="/featured-next">Featured</a>
+    <nav><a rel="next" href="?page=2">2</a></nav>'''
+    assert find_next_url(html, URL) == 'https://www.example.com/lawyers/ca?page=2'
+
+
+def listing(names):
+    return [{'lawyer_name': name, 'firm_name': 'Firm'} for name in names]
+
+
+def numbered(page):
+    return URL if page == 1 else f'{URL}&page={page}'
+
+
+def test_resumed_walk_follows_the_recorded_next_link(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    content = b'<a rel="next" href="/lawyers/ca/after/abc123">More</a>'
+    with CheckpointStore(path) as checkpoint:
+        checkpoint.record(('avvo', 'CA', 1), listing(['A', 'B']), page_hints(content, URL))
+
+    with CheckpointStore(path, resume=True) as checkpoint:
+        paginator = Paginator(numbered)
+        [(page, url)] = list(paginator.pages())
+        assert paginator.advance(checkpoint.get(('avvo', 'CA', page)), hints=checkpoint.get_hints(('avvo', 'CA', page)))
+        assert next(paginator.pages()) == (2, 'https://www.example.com/lawyers/ca/after/abc123')
+
+
+def test_resumed_walk_stops_at_the_recorded_result_count():
+    hints = page_hints(b'<p>Showing 1-2 of 4 results</p>', URL)
+    paginator = Paginator(numbered)
+    for names in (['A', 'B'], ['C', 'D']):
+        next(paginator.pages())
+        paginator.advance(listing(names), hints=hints)
+    assert list(paginator.pages()) == []
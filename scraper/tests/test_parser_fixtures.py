@@ -0,0 +1,14 @@
+import json
+
+import pytest
+
+from bench_parsers import expected_path, load_corpus, parse
+
+PAGES = load_corpus()
+
+
+@pytest.mark.parametrize('page', PAGES, ids=[page['page'] for page in PAGES])
+def test_parser_output_matches_fixture(page):
+    with open(expected_path(page), encoding='utf-8') as f:
+        expected = json.load(f)
+    assert json.loads(json.dumps(parse(page))) == expected
@@ -0,0 +1,31 @@
+import pytest
+
+from pipeline import BackgroundWriter
+
+
+class FailingDatabase:
+    def __init__(self, fail_after=0):
+        self.fail_after = fail_after
+        self.written = 0
+
+    def bulk_upsert_lawyers(self, lawyers, batch_size=None):
+        if self.written >= self.fail_after:
+            raise ValueError('could not hash record')
+        self.written += len(lawyers)
+        return {'inserted': len(lawyers), 'updated': 0, 'unchanged': 0, 'failed': 0}
+
+
+def test_writer_failure_reaches_the_producer_instead_of_blocking_it():
+    writer = BackgroundWriter(FailingDatabase(), batch_size=2, queue_size=2)
+    # Far more records than the queue holds: put() must raise, not hang
+    with pytest.raises(ValueError):
+        writer.write_all({'lawyer_name': f'Lawyer {i}'} for i in range(10000))
+    with pytest.raises(ValueError):
+        writer.close()
+    assert writer.stats['failed'] > 0
+
+
+def test_writer_totals():
+    writer = BackgroundWriter(FailingDatabase(fail_after=100), batch_size=2)
+    assert writer.write_all({'lawyer_name': f'Lawyer {i}'} for i in range(5)) == 5
+    assert writer.close()['inserted'] == 5
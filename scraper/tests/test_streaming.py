@@ -0,0 +1,22 @@
+import psycopg2
+import pytest
+
+
+def test_a_stream_cut_off_by_the_database_raises(db):
+    database, connection = db
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO lawyers (lawyer_name, firm_name, office_address, state)
+            SELECT 'Lawyer ' || n, 'Firm ' || n, n || ' Main St', 'TX' FROM generate_series(1, 50) n
+        """)
+        cursor.execute("SELECT pg_backend_pid()")
+    connection.commit()
+
+    rows = database.iter_lawyers(['TX'], columns=['id'], batch_size=10)
+    next(rows)
+    # Kill the streaming backend between batches
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE pid <> pg_backend_pid() AND datname = current_database()")
+    connection.commit()
+    with pytest.raises(psycopg2.Error):
+        list(rows)
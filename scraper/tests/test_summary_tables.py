@@ -0,0 +1,76 @@
+import os
+
+import psycopg2
+
+from summary_tables import SUMMARY_FUNCTION_SOURCE, SUMMARY_LOCK_SQL, SUMMARY_TRIGGER_NAMES
+
+
+def trigger_oids(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT tgname, oid FROM pg_trigger WHERE tgname = ANY(%s) ORDER BY tgname", (SUMMARY_TRIGGER_NAMES,))
+        return cursor.fetchall()
+
+
+def test_triggers_are_installed_once_and_keep_counts(db):
+    database, connection = db
+    installed = trigger_oids(connection)
+    assert len(installed) == len(SUMMARY_TRIGGER_NAMES)
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO lawyers (lawyer_name, firm_name, office_address, city, state)
+            VALUES ('Jane Doe', 'Doe Law', '1 Main St', 'Austin', 'TX'), ('John Roe', 'Roe Law', '2 Main St', 'Dallas', 'TX')
+        """)
+    connection.commit()
+
+    # A restart leaves the installed triggers alone
+    assert database.create_lawyers_table()
+    assert trigger_oids(connection) == installed
+
+    stats = database.get_statistics()
+    assert (stats['total_lawyers'], stats['states_covered'], stats['cities_covered']) == (2, 1, 2)
+
+
+def test_updates_that_keep_state_city_and_firm_skip_the_summaries(db):
+    database, connection = db
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO lawyers (lawyer_name, firm_name, office_address, city, state)
+            VALUES ('Jane Doe', 'Doe Law', '1 Main St', 'Austin', 'TX')
+        """)
+    connection.commit()
+
+    # Another writer holds the summary lock; a counter bump must not wait for it
+    holder = psycopg2.connect(os.environ['TEST_DATABASE_URL'])
+    try:
+        with holder.cursor() as cursor:
+            cursor.execute(SUMMARY_LOCK_SQL)
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL lock_timeout = '1s'")
+            cursor.execute("UPDATE lawyers SET profile_views = profile_views + 1, phone_number = '5125550100'")
+        connection.commit()
+    finally:
+        holder.rollback()
+        holder.close()
+
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE lawyers SET city = 'Dallas'")
+    connection.commit()
+    assert database.get_city_counts('TX') == [{'city': 'Dallas', 'lawyers': 1}]
+
+
+def test_an_outdated_trigger_function_is_replaced_without_reinstalling_triggers(db):
+    database, connection = db
+    installed = trigger_oids(connection)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE OR REPLACE FUNCTION lawyers_summary_trigger() RETURNS trigger LANGUAGE plpgsql
+            AS $function$ BEGIN RETURN NULL; END $function$
+        """)
+    connection.commit()
+
+    assert database.create_lawyers_table()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT prosrc FROM pg_proc WHERE proname = 'lawyers_summary_trigger'")
+        assert cursor.fetchone()[0] == SUMMARY_FUNCTION_SOURCE
+    assert trigger_oids(connection) == installed
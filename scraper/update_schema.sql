@@ -9,9 +9,19 @@ ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS google_review_count INTEGER DEFAULT
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS google_verified BOOLEAN DEFAULT FALSE;
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS last_google_update TIMESTAMP;
 
+-- Avvo ratings run up to 10.0, which DECIMAL(3,2) cannot hold; the views
+-- below select rating through *, so they are dropped here and recreated at the end
+DROP VIEW IF EXISTS active_sponsored_lawyers;
+DROP VIEW IF EXISTS targetable_lawyers;
+ALTER TABLE lawyers ALTER COLUMN rating TYPE DECIMAL(4,2);
+
 -- Add location coordinates for map display
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS latitude DECIMAL(10, 8);
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS longitude DECIMAL(11, 8);
+-- 0.1 degree grid cell of the coordinates, see scraper/geo.py
+ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS geo_cell INTEGER GENERATED ALWAYS AS (
+  CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL THEN (LEAST(FLOOR((latitude + 90) * 10), 1799) * 3600 + LEAST(FLOOR((longitude + 180) * 10), 3599))::INTEGER END
+) STORED;
 
 -- Add search tracking
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS search_count INTEGER DEFAULT 0;
@@ -51,10 +61,13 @@ ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS data_quality_score INTEGER DEFAULT
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS has_website BOOLEAN DEFAULT FALSE;
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS has_email BOOLEAN DEFAULT FALSE;
 ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS has_phone BOOLEAN DEFAULT FALSE;
+ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS content_hash CHAR(32); -- hash of the scraped fields, skips no-op upserts
+ALTER TABLE lawyers ADD COLUMN IF NOT EXISTS identity_key TEXT; -- normalized name|phone|zip; run compact_lawyers.py to make it unique
 
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_lawyers_google_place_id ON lawyers(google_place_id);
 CREATE INDEX IF NOT EXISTS idx_lawyers_location ON lawyers(latitude, longitude);
+CREATE INDEX IF NOT EXISTS idx_lawyers_geo_cell ON lawyers(geo_cell);
 CREATE INDEX IF NOT EXISTS idx_lawyers_sponsored ON lawyers(is_sponsored, sponsorship_tier);
 CREATE INDEX IF NOT EXISTS idx_lawyers_search_count ON lawyers(search_count DESC);
 CREATE INDEX IF NOT EXISTS idx_lawyers_city_state_sponsored ON lawyers(city, state, is_sponsored);
@@ -119,7 +132,9 @@ CREATE TABLE IF NOT EXISTS sponsorship_history (
 );
 
 -- Sample query to get sponsored lawyers for a specific location
--- This is what your API will use
+-- This is what your API will use. Filtering on the distance alone scans every
+-- row; Database.find_lawyers_near() adds geo_cell ranges and a bounding box on
+-- latitude/longitude so only the grid cells around the point are read
 /*
 SELECT 
   l.*,